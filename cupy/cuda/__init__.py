@@ -1,3 +1,4 @@
+from wgpy_backends.runtime import get_buffer_pool
 from wgpy_backends.runtime.device import Device, device
 
 
@@ -10,11 +11,46 @@ class Stream:
 
 
 class MemoryPool:
-    pass
+    """
+    View of the GPU buffer pool of the backend. All instances share the same pool.
+    """
+
+    def used_bytes(self) -> int:
+        return get_buffer_pool().used_bytes
+
+    def free_bytes(self) -> int:
+        return get_buffer_pool().pooled_bytes
+
+    def total_bytes(self) -> int:
+        return get_buffer_pool().total_bytes
+
+    def n_free_blocks(self) -> int:
+        return get_buffer_pool().pooled_count
+
+    def free_all_blocks(self, stream=None):
+        get_buffer_pool().free_all()
+
+    def set_limit(self, size=None, fraction=None):
+        if fraction is not None:
+            # total device memory is not available in WebGPU / WebGL
+            raise NotImplementedError("set_limit: fraction is not supported")
+        get_buffer_pool().set_limit(size or 0)
+
+    def get_limit(self) -> int:
+        return get_buffer_pool().limit
 
 
 class PinnedMemoryPool:
-    pass
+    """
+    Host to device transfer uses single communication buffer,
+    so there is no pinned memory block to manage.
+    """
+
+    def n_free_blocks(self) -> int:
+        return 0
+
+    def free_all_blocks(self):
+        pass
 
 
 # cuda.cupy.cuda.get_device_id()
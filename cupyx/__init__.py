@@ -1,4 +1,5 @@
 from wgpy_backends.runtime.ndarray import ndarray
+from wgpy.indexing import scatter_add as _scatter_add
 
 
 def get_runtime_info():
@@ -9,5 +10,8 @@ def rsqrt(x: ndarray, out=None) -> ndarray:
     return x.array_func.ufunc.rsqrt(x, out=out)
 
 
-def scatter_add(a: ndarray, slices: object, value: ndarray) -> ndarray:
-    a[slices] = a[slices] + value
+def scatter_add(
+    a: ndarray, slices: object, value: ndarray, deterministic: bool = False
+) -> ndarray:
+    # accumulated for duplicate indices
+    _scatter_add(a, slices, value, deterministic)
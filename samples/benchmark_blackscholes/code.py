@@ -155,6 +155,9 @@ def run_once(price, strike, t, use_gpu, kernel_type):
     if use_gpu:
         if kernel_type == "normal":
             ret = BlackScholes(price, strike, t, 0.1, 0.2)
+        elif kernel_type == "lazy":
+            with cp.lazy():
+                ret = BlackScholes(price, strike, t, 0.1, 0.2)
         elif kernel_type == "custom":
             ret = customBlackScholes(price, strike, t, 0.1, 0.2)
         elif kernel_type == "nop":
@@ -4,6 +4,7 @@ import {
   getNNWebGLContext,
   initializeNNWebGLContext,
   TensorTextureShape,
+  TextureRect,
   WebGLTensorBuffer,
   WebGLUniformItem,
 } from './webglContext';
@@ -37,6 +38,7 @@ export interface ComputeContextGLMessageSetData {
   method: 'gl.setData';
   id: number;
   data: Float32Array;
+  rect?: TextureRect;
 }
 
 export interface ComputeContextGLMessageGetData {
@@ -45,6 +47,14 @@ export interface ComputeContextGLMessageGetData {
   data: SharedArrayBuffer; // TypedArray of SharedArrayBuffer
   notify: SharedArrayBuffer; // Int32Array(1) of SharedArrayBuffer
   ctorType: string;
+  rect?: TextureRect;
+}
+
+export interface ComputeContextGLMessageGetDataAsync {
+  method: 'gl.getDataAsync';
+  id: number;
+  rect?: TextureRect;
+  requestId: number;
 }
 
 export interface ComputeContextGLMessageAddKernel {
@@ -53,17 +63,35 @@ export interface ComputeContextGLMessageAddKernel {
   descriptor: { source: string };
 }
 
+export interface ComputeContextGLMessageAddKernelAsync {
+  method: 'gl.addKernelAsync';
+  name: string;
+  descriptor: { source: string };
+}
+
 export interface ComputeContextGLMessageRunKernel {
   method: 'gl.runKernel';
   descriptor: GLKernelRunDescriptor;
 }
 
+export type GLQueuedCommand =
+  | { method: 'runKernel'; descriptor: GLKernelRunDescriptor }
+  | { method: 'disposeBuffer'; id: number };
+
+export interface ComputeContextGLMessageRunCommands {
+  method: 'gl.runCommands';
+  commands: GLQueuedCommand[];
+}
+
 export type ComputeContextGLMessage =
   | ComputeContextGLMessageAddKernel
+  | ComputeContextGLMessageAddKernelAsync
   | ComputeContextGLMessageCreateBuffer
   | ComputeContextGLMessageDisposeBuffer
   | ComputeContextGLMessageGetData
+  | ComputeContextGLMessageGetDataAsync
   | ComputeContextGLMessageRunKernel
+  | ComputeContextGLMessageRunCommands
   | ComputeContextGLMessageSetData;
 
 export class ComputeContextGL {
@@ -96,16 +124,16 @@ export class ComputeContextGL {
     }
   }
 
-  setData(id: number, data: ArrayBufferView): void {
+  setData(id: number, data: ArrayBufferView, rect?: TextureRect): void {
     // no pack
     const tb = this.tensorBuffers.get(id);
     if (!tb) {
       return;
     }
-    tb.setDataRaw(data);
+    tb.setDataRaw(data, rect);
   }
 
-  getData(id: number): Promise<Uint16Array> {
+  getData(id: number, rect?: TextureRect): Promise<Uint16Array> {
     // no pack
     // not necessarily async, but matching WebGPU API
     const tb = this.tensorBuffers.get(id);
@@ -114,7 +142,7 @@ export class ComputeContextGL {
     }
     // TODO consider data format
     // const data = tb.getDataRawFloat32();
-    const data = tb.getDataRaw();
+    const data = tb.getDataRaw(rect);
     return Promise.resolve(data.buffer as Uint16Array);
   }
 
@@ -123,6 +151,11 @@ export class ComputeContextGL {
     ctx.addKernel(name, descriptor.source);
   }
 
+  addKernelAsync(name: string, descriptor: { source: string }) {
+    const ctx = getNNWebGLContext();
+    ctx.addKernelAsync(name, descriptor.source);
+  }
+
   runKernel(descriptor: GLKernelRunDescriptor) {
     const ctx = getNNWebGLContext();
     const inputs = descriptor.inputs.map(({ name, id }) => ({
@@ -133,14 +166,29 @@ export class ComputeContextGL {
     ctx.runKernel(descriptor.name, inputs, output, descriptor.uniforms);
   }
 
+  runCommands(commands: GLQueuedCommand[]) {
+    for (const command of commands) {
+      switch (command.method) {
+        case 'runKernel':
+          this.runKernel(command.descriptor);
+          break;
+        case 'disposeBuffer':
+          this.disposeBuffer(command.id);
+          break;
+      }
+    }
+  }
+
   mdata: SharedArrayBuffer | null = null;
   mnotify: Int32Array | null = null;
-  // eslint-disable-next-line @typescript-eslint/no-unused-vars
   handleMessage(message: ComputeContextGLMessage, worker: Worker) {
     switch (message.method) {
       case 'gl.addKernel':
         this.addKernel(message.name, message.descriptor);
         break;
+      case 'gl.addKernelAsync':
+        this.addKernelAsync(message.name, message.descriptor);
+        break;
       case 'gl.createBuffer':
         this.createBuffer(message.id, message.textureShape);
         break;
@@ -154,7 +202,7 @@ export class ComputeContextGL {
         if (message.notify) {
           this.mnotify = new Int32Array(message.notify);
         }
-        this.getData(message.id)
+        this.getData(message.id, message.rect)
           .then((data) => {
             const ctor = {
               Float32Array: Float32Array,
@@ -173,11 +221,34 @@ export class ComputeContextGL {
             console.error(reason);
           });
         break;
+      case 'gl.getDataAsync': {
+        // the result is sent back to the worker by message, so the worker does not wait for it
+        const requestId = message.requestId;
+        this.getData(message.id, message.rect)
+          .then((data) => {
+            worker.postMessage(
+              {
+                namespace: 'wgpy',
+                method: 'getDataAsyncComplete',
+                requestId,
+                data,
+              },
+              [data.buffer]
+            );
+          })
+          .catch((reason) => {
+            console.error(reason);
+          });
+        break;
+      }
       case 'gl.runKernel':
         this.runKernel(message.descriptor);
         break;
+      case 'gl.runCommands':
+        this.runCommands(message.commands);
+        break;
       case 'gl.setData':
-        this.setData(message.id, message.data);
+        this.setData(message.id, message.data, message.rect);
         break;
     }
   }
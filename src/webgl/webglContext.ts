@@ -125,6 +125,16 @@ export type TensorTextureShape =
   | TensorTextureShape2D
   | TensorTextureShape2DArray;
 
+// Sub-rectangle of texture in pixels. layer and depth are for 2DArray (layer = 0, depth = 1 for 2D).
+export interface TextureRect {
+  x: number;
+  y: number;
+  width: number;
+  height: number;
+  layer: number;
+  depth: number;
+}
+
 export class WebGLTensorBuffer {
   public readonly texture: WebGLTexture;
   public ref: number;
@@ -280,7 +290,7 @@ export class WebGLTensorBuffer {
     return buf;
   }
 
-  getDataRaw():
+  getDataRaw(rect?: TextureRect):
     | { type: 'Float32Array'; buffer: Float32Array }
     | { type: 'Uint16Array'; buffer: Uint16Array }
     | { type: 'Int32Array'; buffer: Int32Array }
@@ -298,95 +308,64 @@ export class WebGLTensorBuffer {
     //   }
     //   return packedData;
     // }
-    switch (this.textureShape.dim) {
-      case '2D': {
-        const length =
-          this.textureShape.height * this.textureShape.width * this.dimPerPixel;
-        switch (this.textureShape.type) {
-          case WebGL2RenderingContext.FLOAT: {
-            const buffer = new Float32Array(length);
-            this.readPixels2D(buffer);
-            return { type: 'Float32Array', buffer };
-          }
-          case WebGL2RenderingContext.HALF_FLOAT: {
-            const buffer = new Uint16Array(length);
-            this.readPixels2D(buffer);
-            return { type: 'Uint16Array', buffer };
-          }
-          case WebGL2RenderingContext.INT: {
-            const buffer = new Int32Array(length);
-            this.readPixels2D(buffer);
-            return { type: 'Int32Array', buffer };
-          }
-          case WebGL2RenderingContext.UNSIGNED_BYTE: {
-            const buffer = new Uint8Array(length);
-            this.readPixels2D(buffer);
-            return { type: 'Uint8Array', buffer };
-          }
-          default:
-            throw new Error();
-        }
+    // When rect is given, only the sub-rectangle (in pixels) of the layers is read.
+    const r: TextureRect = rect || {
+      x: 0,
+      y: 0,
+      width: this.textureShape.width,
+      height: this.textureShape.height,
+      layer: 0,
+      depth: this.textureShape.dim === '2DArray' ? this.textureShape.depth : 1,
+    };
+    const sliceLength = r.height * r.width * this.dimPerPixel;
+    const totalLength = sliceLength * r.depth;
+    switch (this.textureShape.type) {
+      case WebGL2RenderingContext.FLOAT: {
+        const buffer = new Float32Array(totalLength);
+        this.readPixelsRect(buffer, sliceLength, r);
+        return { type: 'Float32Array', buffer };
+      }
+      case WebGL2RenderingContext.HALF_FLOAT: {
+        const buffer = new Uint16Array(totalLength);
+        this.readPixelsRect(buffer, sliceLength, r);
+        return { type: 'Uint16Array', buffer };
+      }
+      case WebGL2RenderingContext.INT: {
+        const buffer = new Int32Array(totalLength);
+        this.readPixelsRect(buffer, sliceLength, r);
+        return { type: 'Int32Array', buffer };
       }
-      case '2DArray': {
-        const sliceLength =
-          this.textureShape.height * this.textureShape.width * this.dimPerPixel;
-        const totalLength = sliceLength * this.textureShape.depth;
-        switch (this.textureShape.type) {
-          case WebGL2RenderingContext.FLOAT: {
-            const buffer = new Float32Array(totalLength);
-            this.readPixels2DArray(
-              buffer,
-              sliceLength,
-              this.textureShape.depth
-            );
-            return { type: 'Float32Array', buffer };
-          }
-          case WebGL2RenderingContext.HALF_FLOAT: {
-            const buffer = new Uint16Array(totalLength);
-            this.readPixels2DArray(
-              buffer,
-              sliceLength,
-              this.textureShape.depth
-            );
-            return { type: 'Uint16Array', buffer };
-          }
-          case WebGL2RenderingContext.INT: {
-            const buffer = new Int32Array(totalLength);
-            this.readPixels2DArray(
-              buffer,
-              sliceLength,
-              this.textureShape.depth
-            );
-            return { type: 'Int32Array', buffer };
-          }
-          case WebGL2RenderingContext.UNSIGNED_BYTE: {
-            const buffer = new Uint8Array(totalLength);
-            this.readPixels2DArray(
-              buffer,
-              sliceLength,
-              this.textureShape.depth
-            );
-            return { type: 'Uint8Array', buffer };
-          }
-          default:
-            throw new Error();
-        }
+      case WebGL2RenderingContext.UNSIGNED_BYTE: {
+        const buffer = new Uint8Array(totalLength);
+        this.readPixelsRect(buffer, sliceLength, r);
+        return { type: 'Uint8Array', buffer };
       }
+      default:
+        throw new Error();
     }
   }
 
-  setDataRaw(data: ArrayBufferView): void {
+  setDataRaw(data: ArrayBufferView, rect?: TextureRect): void {
+    // When rect is given, only the sub-rectangle (in pixels) of the layers is written.
     const ctx = getNNWebGLContext();
+    const r: TextureRect = rect || {
+      x: 0,
+      y: 0,
+      width: this.textureShape.width,
+      height: this.textureShape.height,
+      layer: 0,
+      depth: this.textureShape.dim === '2DArray' ? this.textureShape.depth : 1,
+    };
     this.bindToReadTexture(0);
     switch (this.textureShape.dim) {
       case '2D':
         ctx.gl.texSubImage2D(
           this.target,
           0,
-          0,
-          0,
-          this.textureShape.width,
-          this.textureShape.height,
+          r.x,
+          r.y,
+          r.width,
+          r.height,
           this.textureShape.format,
           this.textureShape.type,
           data,
@@ -397,12 +376,12 @@ export class WebGLTensorBuffer {
         ctx.gl.texSubImage3D(
           this.target,
           0,
-          0,
-          0,
-          0,
-          this.textureShape.width,
-          this.textureShape.height,
-          this.textureShape.depth,
+          r.x,
+          r.y,
+          r.layer,
+          r.width,
+          r.height,
+          r.depth,
           this.textureShape.format,
           this.textureShape.type,
           data,
@@ -433,23 +412,27 @@ export class WebGLTensorBuffer {
     this.unbindFromDrawTexture();
   }
 
-  private readPixels2DArray(
+  private readPixelsRect(
     buf: ArrayBufferView,
     sliceLength: number,
-    depth: number
+    rect: TextureRect
   ) {
     const ctx = getNNWebGLContext();
-    for (let layer = 0; layer < depth; layer++) {
-      this.bindToDrawTexture(layer);
+    for (let i = 0; i < rect.depth; i++) {
+      if (this.textureShape.dim === '2DArray') {
+        this.bindToDrawTexture(rect.layer + i);
+      } else {
+        this.bindToDrawTexture();
+      }
       ctx.gl.readPixels(
-        0,
-        0,
-        this.textureShape.width,
-        this.textureShape.height,
+        rect.x,
+        rect.y,
+        rect.width,
+        rect.height,
         this.textureShape.format,
         this.textureShape.type,
         buf,
-        sliceLength * layer
+        sliceLength * i
       );
       this.unbindFromDrawTexture();
     }
@@ -495,6 +478,11 @@ export class NNWebGLContext {
   canReadRedTexture: boolean;
   canReadNon32bitTexture: boolean;
   private programs: Map<string, { program: WebGLProgram }> = new Map();
+  // programs whose compilation is started but whose status is not yet checked
+  private pendingPrograms: Map<
+    string,
+    { program: WebGLProgram; fshader: WebGLShader; sourceCode: string }
+  > = new Map();
   private vshader!: WebGLShader;
 
   constructor() {
@@ -528,6 +516,8 @@ export class NNWebGLContext {
     gl.enable(gl.CULL_FACE);
     gl.cullFace(gl.BACK);
     gl.pixelStorei(gl.UNPACK_ALIGNMENT, 1);
+    // Lets the driver compile shaders in parallel while their status is not queried
+    gl.getExtension('KHR_parallel_shader_compile');
 
     const vertexBuffer = this.createArrayBuffer(vertexArray);
     this.bindArrayBuffer(vertexBuffer);
@@ -609,10 +599,20 @@ export class NNWebGLContext {
   }
 
   createShader(type: number, source: string, name?: string): WebGLShader {
+    const shader = this.startCompileShader(type, source);
+    this.checkShader(shader, source, name);
+    return shader;
+  }
+
+  private startCompileShader(type: number, source: string): WebGLShader {
     const shader = nonNull(this.gl.createShader(type));
 
     this.gl.shaderSource(shader, source);
     this.gl.compileShader(shader);
+    return shader;
+  }
+
+  private checkShader(shader: WebGLShader, source: string, name?: string) {
     if (!this.gl.getShaderParameter(shader, this.gl.COMPILE_STATUS)) {
       throw Error(
         `Shader Compile failed (name=${name}): ${this.gl.getShaderInfoLog(
@@ -620,31 +620,65 @@ export class NNWebGLContext {
         )}\n${source}`
       );
     }
-
-    return shader;
   }
 
   addKernel(name: string, sourceCode: string): void {
-    if (this.programs.has(name)) {
+    if (this.hasKernel(name)) {
       return;
     }
     this.programs.set(name, { program: this.compileKernel(sourceCode, name) });
   }
 
+  /**
+   * Starts compiling the kernel without waiting for the result.
+   * The status is checked (and waited for if compilation is not finished) on the first use of the kernel.
+   */
+  addKernelAsync(name: string, sourceCode: string): void {
+    if (this.hasKernel(name)) {
+      return;
+    }
+    const { gl } = this;
+    this.prepareVertexShader();
+    const fshader = this.startCompileShader(gl.FRAGMENT_SHADER, sourceCode),
+      program = nonNull(gl.createProgram());
+
+    gl.attachShader(program, fshader);
+    gl.attachShader(program, this.vshader);
+    gl.linkProgram(program);
+    this.pendingPrograms.set(name, { program, fshader, sourceCode });
+  }
+
   hasKernel(name: string): boolean {
-    return this.programs.has(name);
+    return this.programs.has(name) || this.pendingPrograms.has(name);
   }
 
-  compileKernel(sourceCode: string, name?: string): WebGLProgram {
-    const { gl } = this;
+  private getKernel(name: string): { program: WebGLProgram } | undefined {
+    const pending = this.pendingPrograms.get(name);
+    if (pending) {
+      this.pendingPrograms.delete(name);
+      const { program, fshader, sourceCode } = pending;
+      if (!this.gl.getProgramParameter(program, this.gl.LINK_STATUS)) {
+        this.checkShader(fshader, sourceCode, name);
+        throw new Error('ShaderProgram Initialization failed.');
+      }
+      this.programs.set(name, { program });
+    }
+    return this.programs.get(name);
+  }
+
+  private prepareVertexShader() {
     if (!this.vshader) {
       this.vshader = this.createShader(
-        gl.VERTEX_SHADER,
+        this.gl.VERTEX_SHADER,
         vertex_shader_source_2,
         'vertex_shader'
       );
     }
-    const fshader = this.createShader(gl.FRAGMENT_SHADER, sourceCode, name),
+  }
+
+  compileKernel(sourceCode: string, name?: string): WebGLProgram {
+    this.prepareVertexShader();
+    const fshader = this.createShader(this.gl.FRAGMENT_SHADER, sourceCode, name),
       program = nonNull(this.gl.createProgram());
 
     this.gl.attachShader(program, fshader);
@@ -688,7 +722,7 @@ export class NNWebGLContext {
     drawLayer: number | null
   ): void {
     const { gl } = this;
-    const kobj = this.programs.get(name);
+    const kobj = this.getKernel(name);
     if (!kobj) {
       throw new Error(`Unknown kernel ${name}`);
     }
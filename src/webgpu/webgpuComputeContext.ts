@@ -1,5 +1,10 @@
 import { nonNull } from '../util';
-import { getNNWebGPUContext, initializeNNWebGPUContext } from './webgpuContext';
+import {
+  getNNWebGPUContext,
+  initializeNNWebGPUContext,
+  WebGPUCopyRequest,
+  WebGPURunnerRequest,
+} from './webgpuContext';
 import {
   WebGPUTensorBuffer,
 } from './webgpuTensorBuffer';
@@ -9,6 +14,8 @@ export type WorkGroupDim = 'x' | 'y' | 'z';
 
 export interface GPUKernelRunDescriptor {
   name: string;
+  // range of the uniform buffer holding uniform values of this dispatch
+  meta?: { offset: number; size: number };
   tensors: number[];
   workGroups: { [key in WorkGroupDim]: number };
 }
@@ -19,13 +26,6 @@ export interface ComputeContextGPUMessageCreateBuffer {
   byteLength: number;
 }
 
-export interface ComputeContextGPUMessageCreateMetaBuffer {
-  method: 'gpu.createMetaBuffer';
-  id: number;
-  byteLength: number;
-  data: Uint8Array;
-}
-
 export interface ComputeContextGPUMessageDisposeBuffer {
   method: 'gpu.disposeBuffer';
   id: number;
@@ -35,24 +35,54 @@ export interface ComputeContextGPUMessageSetData {
   method: 'gpu.setData';
   id: number;
   data: Uint8Array;
+  byteOffset: number;
 }
 
 export interface ComputeContextGPUMessageGetData {
   method: 'gpu.getData';
   id: number;
+  byteLength: number;
+  byteOffset: number;
   data: SharedArrayBuffer; // TypedArray of SharedArrayBuffer
   notify: SharedArrayBuffer; // Int32Array(1) of SharedArrayBuffer
 }
 
+export interface ComputeContextGPUMessageGetDataAsync {
+  method: 'gpu.getDataAsync';
+  id: number;
+  byteLength: number;
+  byteOffset: number;
+  requestId: number;
+}
+
 export interface ComputeContextGPUMessageAddKernel {
   method: 'gpu.addKernel';
   name: string;
   descriptor: { source: string; bindingTypes: GPUBufferBindingType[] };
 }
 
-export interface ComputeContextGPUMessageRunKernel {
-  method: 'gpu.runKernel';
-  descriptor: GPUKernelRunDescriptor;
+export interface ComputeContextGPUMessageAddKernelAsync {
+  method: 'gpu.addKernelAsync';
+  name: string;
+  descriptor: { source: string; bindingTypes: GPUBufferBindingType[] };
+}
+
+export type GPUQueuedCommand =
+  | { method: 'runKernel'; descriptor: GPUKernelRunDescriptor }
+  | {
+      method: 'copyBuffer';
+      srcId: number;
+      srcByteOffset: number;
+      dstId: number;
+      dstByteOffset: number;
+      byteLength: number;
+    }
+  | { method: 'disposeBuffer'; id: number };
+
+export interface ComputeContextGPUMessageRunCommands {
+  method: 'gpu.runCommands';
+  commands: GPUQueuedCommand[];
+  uniforms?: Uint8Array;
 }
 
 export interface ComputeContextGPUMessageCreateTexture {
@@ -83,11 +113,12 @@ export interface ComputeContextGPUMessagePresentTexture {
 
 export type ComputeContextGPUMessage =
   | ComputeContextGPUMessageAddKernel
+  | ComputeContextGPUMessageAddKernelAsync
   | ComputeContextGPUMessageCreateBuffer
-  | ComputeContextGPUMessageCreateMetaBuffer
   | ComputeContextGPUMessageDisposeBuffer
   | ComputeContextGPUMessageGetData
-  | ComputeContextGPUMessageRunKernel
+  | ComputeContextGPUMessageGetDataAsync
+  | ComputeContextGPUMessageRunCommands
   | ComputeContextGPUMessageSetData
   | ComputeContextGPUMessageCreateTexture
   | ComputeContextGPUMessageDisposeTexture
@@ -115,18 +146,6 @@ export class ComputeContextGPU {
     this.tensorBuffers.set(id, tensorBuffer);
   }
 
-  createMetaBuffer(
-    id: number,
-    byteLength: number,
-    data: Uint8Array,
-  ) {
-    const tensorBuffer = new WebGPUTensorBuffer({
-      byteLength,
-    }, true);
-    tensorBuffer.setMetaBufferContent(data);
-    this.tensorBuffers.set(id, tensorBuffer);
-  }
-
   disposeBuffer(id: number) {
     const tb = this.tensorBuffers.get(id);
     if (tb) {
@@ -135,20 +154,24 @@ export class ComputeContextGPU {
     }
   }
 
-  setData(id: number, data: Uint8Array): void {
+  setData(id: number, data: Uint8Array, byteOffset = 0): void {
     const tb = this.tensorBuffers.get(id);
     if (!tb) {
       return;
     }
-    tb.setDataRaw(data);
+    tb.setDataRaw(data, byteOffset);
   }
 
-  getData(id: number): Promise<Uint8Array> {
+  getData(
+    id: number,
+    byteLength: number,
+    byteOffset = 0
+  ): Promise<Uint8Array> {
     const tb = this.tensorBuffers.get(id);
     if (!tb) {
       return Promise.reject();
     }
-    return tb.getDataRaw() as Promise<Uint8Array>;
+    return tb.getDataRaw(byteLength, byteOffset) as Promise<Uint8Array>;
   }
 
   addKernel(
@@ -159,16 +182,53 @@ export class ComputeContextGPU {
     ctx.createPipeline(name, descriptor.source, descriptor.bindingTypes);
   }
 
-  runKernel(descriptor: GPUKernelRunDescriptor) {
+  addKernelAsync(
+    name: string,
+    descriptor: { source: string; bindingTypes: GPUBufferBindingType[] }
+  ) {
     const ctx = getNNWebGPUContext();
-    const tensor = descriptor.tensors.map((id) =>
-      nonNull(this.tensorBuffers.get(id))
-    );
-    ctx.runKernel({
-      pipelineName: descriptor.name,
-      tensorBuffers: tensor,
-      workGroups: descriptor.workGroups,
-    });
+    ctx.createPipelineAsync(name, descriptor.source, descriptor.bindingTypes);
+  }
+
+  runCommands(commands: GPUQueuedCommand[], uniforms?: Uint8Array) {
+    // All dispatches and copies are encoded into one command encoder and submitted once.
+    // Buffers are disposed after submission because preceding dispatches may use them.
+    const ctx = getNNWebGPUContext();
+    if (uniforms) {
+      ctx.writeUniforms(uniforms);
+    }
+    const requests: (WebGPURunnerRequest | WebGPUCopyRequest)[] = [];
+    const disposeIds: number[] = [];
+    for (const command of commands) {
+      switch (command.method) {
+        case 'runKernel':
+          requests.push({
+            pipelineName: command.descriptor.name,
+            tensorBuffers: command.descriptor.tensors.map((id) =>
+              nonNull(this.tensorBuffers.get(id))
+            ),
+            uniform: command.descriptor.meta,
+            workGroups: command.descriptor.workGroups,
+          });
+          break;
+        case 'copyBuffer':
+          requests.push({
+            src: nonNull(this.tensorBuffers.get(command.srcId)),
+            srcByteOffset: command.srcByteOffset,
+            dst: nonNull(this.tensorBuffers.get(command.dstId)),
+            dstByteOffset: command.dstByteOffset,
+            byteLength: command.byteLength,
+          });
+          break;
+        case 'disposeBuffer':
+          disposeIds.push(command.id);
+          break;
+      }
+    }
+    ctx.runKernels(requests);
+    for (const id of disposeIds) {
+      this.disposeBuffer(id);
+    }
   }
 
   createTexture(id: number, width: number, height: number, format: GPUTextureFormat) {
@@ -352,21 +412,20 @@ export class ComputeContextGPU {
 
   mdata: SharedArrayBuffer | null = null;
   mnotify: Int32Array | null = null;
-  // eslint-disable-next-line @typescript-eslint/no-unused-vars
   handleMessage(message: ComputeContextGPUMessage, worker: Worker) {
     switch (message.method) {
       case 'gpu.addKernel':
         this.addKernel(message.name, message.descriptor);
         break;
+      case 'gpu.addKernelAsync':
+        this.addKernelAsync(message.name, message.descriptor);
+        break;
       case 'gpu.createBuffer':
         this.createBuffer(
           message.id,
           message.byteLength,
         );
         break;
-      case 'gpu.createMetaBuffer':
-        this.createMetaBuffer(message.id, message.byteLength, message.data);
-        break;
       case 'gpu.disposeBuffer':
         this.disposeBuffer(message.id);
         break;
@@ -377,7 +436,7 @@ export class ComputeContextGPU {
         if (message.notify) {
           this.mnotify = new Int32Array(message.notify);
         }
-        this.getData(message.id)
+        this.getData(message.id, message.byteLength, message.byteOffset)
           .then((data) => {
             (new Uint8Array(this.mdata!)).set(data);
             this.mnotify![0] = 1;
@@ -387,11 +446,31 @@ export class ComputeContextGPU {
             console.error(reason);
           });
         break;
-      case 'gpu.runKernel':
-        this.runKernel(message.descriptor);
+      case 'gpu.getDataAsync': {
+        // the result is sent back to the worker by message, so the worker does not wait for it
+        const requestId = message.requestId;
+        this.getData(message.id, message.byteLength, message.byteOffset)
+          .then((data) => {
+            worker.postMessage(
+              {
+                namespace: 'wgpy',
+                method: 'getDataAsyncComplete',
+                requestId,
+                data,
+              },
+              [data.buffer]
+            );
+          })
+          .catch((reason) => {
+            console.error(reason);
+          });
+        break;
+      }
+      case 'gpu.runCommands':
+        this.runCommands(message.commands, message.uniforms);
         break;
       case 'gpu.setData':
-        this.setData(message.id, message.data);
+        this.setData(message.id, message.data, message.byteOffset);
         break;
       case 'gpu.createTexture':
         this.createTexture(message.id, message.width, message.height, message.format);
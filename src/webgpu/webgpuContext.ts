@@ -3,6 +3,7 @@ import { WebGPUTensorBuffer } from './webgpuTensorBuffer';
 interface WebGPURunnerPipeline {
   bindGroupLayout: GPUBindGroupLayout;
   pipeline: GPUComputePipeline;
+  bindingTypes: GPUBufferBindingType[];
 }
 
 type WorkGroupDim = 'x' | 'y' | 'z';
@@ -19,9 +20,30 @@ export interface WebGPUMetaBufferContent {
 export interface WebGPURunnerRequest {
   pipelineName: string;
   tensorBuffers: WebGPUTensorBuffer[];
+  // range of the uniform buffer bound to the 'uniform' binding, with offset as dynamic offset
+  uniform?: { offset: number; size: number };
   workGroups: { [key in WorkGroupDim]: number };
 }
 
+// copy between buffers, ordered with the dispatches of the same runKernels
+export interface WebGPUCopyRequest {
+  src: WebGPUTensorBuffer;
+  srcByteOffset: number;
+  dst: WebGPUTensorBuffer;
+  dstByteOffset: number;
+  byteLength: number;
+}
+
+function endComputePass(passEncoder: GPUComputePassEncoder): void {
+  if (passEncoder.end) {
+    passEncoder.end();
+  } else {
+    // deprecated
+    // Firefox Nightly 111 has this
+    (passEncoder as any).endPass();
+  }
+}
+
 export class NNWebGPUContext {
   initialized: boolean;
 
@@ -31,6 +53,15 @@ export class NNWebGPUContext {
 
   private pipelines: Map<string, WebGPURunnerPipeline>;
 
+  // uniform values of the dispatches of the latest runKernels, rewritten on each flush
+  private uniformBuffer: GPUBuffer | null = null;
+
+  // pipelines being compiled by createComputePipelineAsync
+  private pendingPipelines: Map<
+    string,
+    { source: string; bindingTypes: GPUBufferBindingType[] }
+  >;
+
   constructor() {
     if (
       typeof navigator.gpu !== 'object' ||
@@ -41,6 +72,7 @@ export class NNWebGPUContext {
     this.initialized = false;
     this.isSupported = false;
     this.pipelines = new Map();
+    this.pendingPipelines = new Map();
   }
 
   async initialize(): Promise<void> {
@@ -59,20 +91,23 @@ export class NNWebGPUContext {
   }
 
   hasPipeline(name: string): boolean {
-    return this.pipelines.has(name);
+    return this.pipelines.has(name) || this.pendingPipelines.has(name);
   }
 
-  createPipeline(name: string, source: string, bindingTypes: GPUBufferBindingType[]): void {
-    if (this.hasPipeline(name)) {
-      return;
-    }
+  private createLayouts(bindingTypes: GPUBufferBindingType[]): {
+    bindGroupLayout: GPUBindGroupLayout;
+    pipelineLayout: GPUPipelineLayout;
+  } {
     const { device } = this,
       bindings: GPUBindGroupLayoutEntry[] = [];
     for (let i = 0; i < bindingTypes.length; i++) {
       bindings.push({
         binding: i,
         visibility: GPUShaderStage.COMPUTE,
-        buffer: { type: bindingTypes[i] },
+        buffer: {
+          type: bindingTypes[i],
+          hasDynamicOffset: bindingTypes[i] === 'uniform',
+        },
       });
     }
     const bindGroupLayout = device.createBindGroupLayout({
@@ -80,7 +115,16 @@ export class NNWebGPUContext {
       }),
       pipelineLayout = device.createPipelineLayout({
         bindGroupLayouts: [bindGroupLayout],
-      }),
+      });
+    return { bindGroupLayout, pipelineLayout };
+  }
+
+  createPipeline(name: string, source: string, bindingTypes: GPUBufferBindingType[]): void {
+    if (this.hasPipeline(name)) {
+      return;
+    }
+    const { device } = this,
+      { bindGroupLayout, pipelineLayout } = this.createLayouts(bindingTypes),
       shaderModule = device.createShaderModule({ code: source }),
       pipeline = device.createComputePipeline({
         layout: pipelineLayout,
@@ -90,41 +134,143 @@ export class NNWebGPUContext {
         },
       });
 
-    this.pipelines.set(name, { bindGroupLayout, pipeline });
+    this.pipelines.set(name, { bindGroupLayout, pipeline, bindingTypes });
   }
 
-  runKernel(request: WebGPURunnerRequest): void {
-    const pipeline = this.pipelines.get(request.pipelineName);
-    if (!pipeline) {
-      throw new Error(`Pipeline ${pipeline} not found`);
+  /**
+   * Starts compiling the pipeline without blocking.
+   * If the pipeline is used before compilation finishes, it is compiled synchronously instead.
+   */
+  createPipelineAsync(name: string, source: string, bindingTypes: GPUBufferBindingType[]): void {
+    if (this.hasPipeline(name)) {
+      return;
     }
+    this.pendingPipelines.set(name, { source, bindingTypes });
     const { device } = this,
-      entries: GPUBindGroupEntry[] = request.tensorBuffers.map((t, i) => ({
-        binding: i,
-        resource: {
-          buffer: t.gpuBuffer,
-          size: t.bufferShape.byteLength,
+      { bindGroupLayout, pipelineLayout } = this.createLayouts(bindingTypes),
+      shaderModule = device.createShaderModule({ code: source });
+    device
+      .createComputePipelineAsync({
+        layout: pipelineLayout,
+        compute: {
+          module: shaderModule,
+          entryPoint: 'main',
         },
-      }));
-    const bindGroup = device.createBindGroup({
+      })
+      .then(
+        (pipeline) => {
+          // not pending anymore if it was already compiled synchronously
+          if (this.pendingPipelines.delete(name)) {
+            this.pipelines.set(name, { bindGroupLayout, pipeline, bindingTypes });
+          }
+        },
+        (error) => {
+          // keep it pending; synchronous compilation on first use reports the error
+          console.warn(`Precompiling pipeline ${name} failed`, error);
+        }
+      );
+  }
+
+  private getPipeline(name: string): WebGPURunnerPipeline | undefined {
+    const pending = this.pendingPipelines.get(name);
+    if (pending) {
+      this.pendingPipelines.delete(name);
+      this.createPipeline(name, pending.source, pending.bindingTypes);
+    }
+    return this.pipelines.get(name);
+  }
+
+  /**
+   * Uploads uniform values referenced by the following runKernels.
+   * Queue operations are ordered, so previously submitted dispatches still read the old values.
+   */
+  writeUniforms(data: Uint8Array): void {
+    if (!this.uniformBuffer || this.uniformBuffer.size < data.byteLength) {
+      if (this.uniformBuffer) {
+        this.uniformBuffer.destroy();
+      }
+      let size = 65536;
+      while (size < data.byteLength) {
+        size *= 2;
+      }
+      this.uniformBuffer = this.device.createBuffer({
+        size,
+        usage: GPUBufferUsage.UNIFORM | GPUBufferUsage.COPY_DST,
+      });
+    }
+    this.device.queue.writeBuffer(this.uniformBuffer, 0, data);
+  }
+
+  runKernels(requests: (WebGPURunnerRequest | WebGPUCopyRequest)[]): void {
+    if (requests.length === 0) {
+      return;
+    }
+    const { device } = this,
+      commandEncoder = device.createCommandEncoder();
+    let passEncoder: GPUComputePassEncoder | null = null;
+    // Each dispatch is a separate usage scope, so writes of a dispatch are visible to following dispatches in the same pass.
+    // A copy is encoded between compute passes, so it is ordered with the dispatches before and after it.
+    for (const request of requests) {
+      if ('src' in request) {
+        if (passEncoder) {
+          endComputePass(passEncoder);
+          passEncoder = null;
+        }
+        commandEncoder.copyBufferToBuffer(
+          request.src.gpuBuffer,
+          request.srcByteOffset,
+          request.dst.gpuBuffer,
+          request.dstByteOffset,
+          request.byteLength
+        );
+        continue;
+      }
+      if (!passEncoder) {
+        passEncoder = commandEncoder.beginComputePass();
+      }
+      const pipeline = this.getPipeline(request.pipelineName);
+      if (!pipeline) {
+        throw new Error(`Pipeline ${request.pipelineName} not found`);
+      }
+      const entries: GPUBindGroupEntry[] = [],
+        dynamicOffsets: number[] = [];
+      let tensorIndex = 0;
+      for (let i = 0; i < pipeline.bindingTypes.length; i++) {
+        if (pipeline.bindingTypes[i] === 'uniform') {
+          const uniform = request.uniform;
+          if (!uniform || !this.uniformBuffer) {
+            throw new Error(`Uniform values for ${request.pipelineName} not given`);
+          }
+          entries.push({
+            binding: i,
+            resource: { buffer: this.uniformBuffer, size: uniform.size },
+          });
+          dynamicOffsets.push(uniform.offset);
+        } else {
+          const t = request.tensorBuffers[tensorIndex++];
+          entries.push({
+            binding: i,
+            resource: {
+              buffer: t.gpuBuffer,
+              size: t.bufferShape.byteLength,
+            },
+          });
+        }
+      }
+      const bindGroup = device.createBindGroup({
         layout: pipeline.bindGroupLayout,
         entries,
-      }),
-      commandEncoder = device.createCommandEncoder(),
-      passEncoder = commandEncoder.beginComputePass();
-    passEncoder.setBindGroup(0, bindGroup);
-    passEncoder.setPipeline(pipeline.pipeline);
-    passEncoder.dispatchWorkgroups(
-      request.workGroups.x,
-      request.workGroups.y,
-      request.workGroups.z
-    );
-    if (passEncoder.end) {
-      passEncoder.end();
-    } else {
-      // deprecated
-      // Firefox Nightly 111 has this
-      (passEncoder as any).endPass();
+      });
+      passEncoder.setBindGroup(0, bindGroup, dynamicOffsets);
+      passEncoder.setPipeline(pipeline.pipeline);
+      passEncoder.dispatchWorkgroups(
+        request.workGroups.x,
+        request.workGroups.y,
+        request.workGroups.z
+      );
+    }
+    if (passEncoder) {
+      endComputePass(passEncoder);
     }
 
     device.queue.submit([commandEncoder.finish()]);
@@ -35,11 +35,13 @@ export class WebGPUTensorBuffer {
     this.gpuBuffer.unmap();
   }
 
-  setDataRaw(data: Uint8Array): void {
+  setDataRaw(data: Uint8Array, byteOffset = 0): void {
+    // data may be shorter than the buffer (buffer size is rounded up to size class)
+    // or written to the part of the buffer starting at byteOffset
     const ctx = getNNWebGPUContext();
     const copySrcBuffer = ctx.device.createBuffer({
       mappedAtCreation: true, // by using this option, async is not needed
-      size: this.gpuBuffer.size,
+      size: data.byteLength,
       usage: GPUBufferUsage.COPY_SRC | GPUBufferUsage.MAP_WRITE,
     });
 
@@ -49,33 +51,36 @@ export class WebGPUTensorBuffer {
     copySrcBuffer.unmap();
 
     const commandEncoder = ctx.device.createCommandEncoder();
-    commandEncoder.copyBufferToBuffer(copySrcBuffer, 0, this.gpuBuffer, 0, this.gpuBuffer.size);
+    commandEncoder.copyBufferToBuffer(copySrcBuffer, 0, this.gpuBuffer, byteOffset, data.byteLength);
 
     ctx.device.queue.submit([commandEncoder.finish()]);
 
     copySrcBuffer.destroy();
   }
 
-  async getDataRaw(): Promise<Uint8Array> {
+  async getDataRaw(
+    byteLength: number = this.bufferShape.byteLength,
+    byteOffset = 0
+  ): Promise<Uint8Array> {
     const ctx = getNNWebGPUContext();
 
-    const data = new Uint8Array(this.bufferShape.byteLength),
+    const data = new Uint8Array(byteLength),
       dst = ctx.device.createBuffer({
-        size: this.bufferShape.byteLength,
+        size: byteLength,
         usage: GPUBufferUsage.COPY_DST | GPUBufferUsage.MAP_READ,
       }),
       commandEncoder = ctx.device.createCommandEncoder();
     commandEncoder.copyBufferToBuffer(
       this.gpuBuffer,
-      0,
+      byteOffset,
       dst,
       0,
-      this.bufferShape.byteLength
+      byteLength
     );
     ctx.device.queue.submit([commandEncoder.finish()]);
     await dst.mapAsync(GPUMapMode.READ);
     const arrayBuffer = dst.getMappedRange(),
-      buffer_mapped_array = new Uint8Array(arrayBuffer, 0, this.bufferShape.byteLength);
+      buffer_mapped_array = new Uint8Array(arrayBuffer, 0, byteLength);
     data.set(buffer_mapped_array);
     dst.unmap();
     dst.destroy();
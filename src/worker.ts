@@ -1,7 +1,6 @@
 import { WgpyBackend } from './backend';
 import { GLKernelRunDescriptor } from './webgl/webglComputeContext';
-import { TensorTextureShape } from './webgl/webglContext';
-import { GPUKernelRunDescriptor } from './webgpu/webgpuComputeContext';
+import { TensorTextureShape, TextureRect } from './webgl/webglContext';
 
 export interface WgpyInitWorkerResult {
   backend: WgpyBackend;
@@ -19,6 +18,18 @@ function postToMain(obj: any, transfer: Transferable[] = []) {
   postMessage({ namespace: 'wgpy', ...obj }, transfer);
 }
 
+// Pending asynchronous readbacks. requestId -> resolve function.
+const asyncReadCallbacks = new Map<number, (data: ArrayBufferView) => void>();
+let nextAsyncReadId = 1;
+
+function requestAsyncRead(message: any): Promise<ArrayBufferView> {
+  const requestId = nextAsyncReadId++;
+  return new Promise<ArrayBufferView>((resolve) => {
+    asyncReadCallbacks.set(requestId, resolve);
+    postToMain({ ...message, requestId });
+  });
+}
+
 function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
   let sharedBufferSent = false;
   let notifyBuffer: SharedArrayBuffer | undefined = undefined;
@@ -52,7 +63,11 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
       data.destroy();
       commBufUint8Array = commBuf.data;
     },
-    setData: (id: number, ctorType: string, size: number) => {
+    setData: (id: number, ctorType: string, size: number, rect?: any) => {
+      // rect: sub-rectangle of texture to write; whole texture if omitted.
+      const rectObj: TextureRect | undefined = rect
+        ? dictToObj(rect)
+        : undefined;
       const ctor = {
         Float32Array: Float32Array,
         Int32Array: Int32Array,
@@ -76,12 +91,52 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
       }
       const transferData = new ctor(size);
       transferData.set(dataSrc);
-      postToMain({ method: 'gl.setData', id, data: transferData }, [
-        transferData.buffer,
-      ]);
+      postToMain(
+        { method: 'gl.setData', id, data: transferData, rect: rectObj },
+        [transferData.buffer]
+      );
       return true;
     },
-    getData: (id: number, ctorType: string, size: number) => {
+    setDataFromHeap: (
+      id: number,
+      ctorType: string,
+      address: number,
+      size: number,
+      rect?: any
+    ) => {
+      // data is read directly from the WASM heap at address, instead of comm buffer.
+      const rectObj: TextureRect | undefined = rect
+        ? dictToObj(rect)
+        : undefined;
+      const ctor = {
+        Float32Array: Float32Array,
+        Int32Array: Int32Array,
+        Uint16Array: Uint16Array,
+        Uint8Array: Uint8Array,
+      }[ctorType];
+      if (!ctor) {
+        throw new Error('ctorType unknown ' + ctorType);
+      }
+      let dataSrc: Float32Array | Int32Array | Uint16Array | Uint8Array;
+      try {
+        // commBufUint8Array is a view of the WASM heap
+        dataSrc = new ctor(commBufUint8Array!.buffer, address, size);
+      } catch (e) {
+        return false;
+      }
+      const transferData = new ctor(size);
+      transferData.set(dataSrc);
+      postToMain(
+        { method: 'gl.setData', id, data: transferData, rect: rectObj },
+        [transferData.buffer]
+      );
+      return true;
+    },
+    getData: (id: number, ctorType: string, size: number, rect?: any) => {
+      // rect: sub-rectangle of texture to read ({x, y, width, height, layer, depth}); whole texture if omitted.
+      const rectObj: TextureRect | undefined = rect
+        ? dictToObj(rect)
+        : undefined;
       const ctor = {
         Float32Array: Float32Array,
         Int32Array: Int32Array,
@@ -119,7 +174,7 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
       }
       notifyBufferView![0] = 0;
       if (sharedBufferSent) {
-        postToMain({ method: 'gl.getData', id, ctorType });
+        postToMain({ method: 'gl.getData', id, ctorType, rect: rectObj });
       } else {
         postToMain({
           method: 'gl.getData',
@@ -127,6 +182,7 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
           data: placeholderBuffer,
           notify: notifyBuffer,
           ctorType,
+          rect: rectObj,
         });
         sharedBufferSent = true;
       }
@@ -137,6 +193,13 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
       dataSrc.set(placeholderData);
       return true;
     },
+    getDataAsync: (id: number, rect?: any) => {
+      // resolves with the typed array of texture data without blocking the worker
+      const rectObj: TextureRect | undefined = rect
+        ? dictToObj(rect)
+        : undefined;
+      return requestAsyncRead({ method: 'gl.getDataAsync', id, rect: rectObj });
+    },
     addKernel: (name: string, descriptor: { source: string }) => {
       postToMain({
         method: 'gl.addKernel',
@@ -144,9 +207,19 @@ function initGLInterface(glAvailable: boolean, glDeviceInfo: any) {
         descriptor: dictToObj(descriptor),
       });
     },
+    addKernelAsync: (name: string, descriptor: { source: string }) => {
+      postToMain({
+        method: 'gl.addKernelAsync',
+        name,
+        descriptor: dictToObj(descriptor),
+      });
+    },
     runKernel: (descriptor: GLKernelRunDescriptor) => {
       postToMain({ method: 'gl.runKernel', descriptor: dictToObj(descriptor) });
     },
+    runCommands: (commands: any) => {
+      postToMain({ method: 'gl.runCommands', commands: dictToObj(commands) });
+    },
   };
 }
 
@@ -174,24 +247,6 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
         byteLength,
       });
     },
-    createMetaBuffer: (
-      id: number,
-      byteLength: number,
-    ) => {
-      const dataSrc = new Uint8Array(
-        commBufUint8Array!.buffer,
-        commBufUint8Array!.byteOffset,
-        byteLength
-      );
-      const transferData = new Uint8Array(byteLength);
-      transferData.set(dataSrc);
-      postToMain({
-        method: 'gpu.createMetaBuffer',
-        id,
-        byteLength,
-        data: transferData
-      }, [transferData.buffer]);
-    },
     disposeBuffer: (id: number) => {
       postToMain({ method: 'gpu.disposeBuffer', id });
     },
@@ -204,7 +259,7 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
       data.destroy();
       commBufUint8Array = commBuf.data;
     },
-    setData: (id: number, byteLength: number) => {
+    setData: (id: number, byteLength: number, byteOffset = 0) => {
       // When wasm buffer is reallocated, commBufUint8Array is detached.
       // 'TypeError: Cannot perform Construct on a detached ArrayBuffer' is thrown.
       let dataSrc: Uint8Array;
@@ -219,12 +274,35 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
       }
       const transferData = new Uint8Array(byteLength);
       transferData.set(dataSrc);
-      postToMain({ method: 'gpu.setData', id, data: transferData }, [
-        transferData.buffer,
-      ]);
+      postToMain(
+        { method: 'gpu.setData', id, data: transferData, byteOffset },
+        [transferData.buffer]
+      );
       return true;
     },
-    getData: (id: number, byteLength: number) => {
+    setDataFromHeap: (
+      id: number,
+      address: number,
+      byteLength: number,
+      byteOffset = 0
+    ) => {
+      // data is read directly from the WASM heap at address, instead of comm buffer.
+      let dataSrc: Uint8Array;
+      try {
+        // commBufUint8Array is a view of the WASM heap
+        dataSrc = new Uint8Array(commBufUint8Array!.buffer, address, byteLength);
+      } catch (e) {
+        return false;
+      }
+      const transferData = new Uint8Array(byteLength);
+      transferData.set(dataSrc);
+      postToMain(
+        { method: 'gpu.setData', id, data: transferData, byteOffset },
+        [transferData.buffer]
+      );
+      return true;
+    },
+    getData: (id: number, byteLength: number, byteOffset = 0) => {
       let dataSrc: Uint8Array;
       try {
         // same as setData
@@ -253,11 +331,13 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
       }
       notifyBufferView![0] = 0;
       if (sharedBufferSent) {
-        postToMain({ method: 'gpu.getData', id });
+        postToMain({ method: 'gpu.getData', id, byteLength, byteOffset });
       } else {
         postToMain({
           method: 'gpu.getData',
           id,
+          byteLength,
+          byteOffset,
           data: placeholderBuffer,
           notify: notifyBuffer,
         });
@@ -271,6 +351,15 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
       dataSrc.set(placeholderData);
       return true;
     },
+    getDataAsync: (id: number, byteLength: number, byteOffset = 0) => {
+      // resolves with Uint8Array of buffer data without blocking the worker
+      return requestAsyncRead({
+        method: 'gpu.getDataAsync',
+        id,
+        byteLength,
+        byteOffset,
+      });
+    },
     addKernel: (
       name: string,
       descriptor: { source: string; bindingTypes: GPUBufferBindingType[] }
@@ -281,12 +370,48 @@ function initGPUInterface(gpuAvailable: boolean, gpuDeviceInfo: any) {
         descriptor: dictToObj(descriptor),
       });
     },
-    runKernel: (descriptor: GPUKernelRunDescriptor) => {
+    addKernelAsync: (
+      name: string,
+      descriptor: { source: string; bindingTypes: GPUBufferBindingType[] }
+    ) => {
       postToMain({
-        method: 'gpu.runKernel',
+        method: 'gpu.addKernelAsync',
+        name,
         descriptor: dictToObj(descriptor),
       });
     },
+    runCommands: (
+      commands: any,
+      uniformAddress = 0,
+      uniformByteLength = 0
+    ) => {
+      // list of queued commands is converted and posted at once.
+      // uniform values of the dispatches are read from the WASM heap at uniformAddress.
+      let uniforms: Uint8Array | undefined = undefined;
+      if (uniformByteLength > 0) {
+        let dataSrc: Uint8Array;
+        try {
+          dataSrc = new Uint8Array(
+            commBufUint8Array!.buffer,
+            uniformAddress,
+            uniformByteLength
+          );
+        } catch (e) {
+          return false;
+        }
+        uniforms = new Uint8Array(uniformByteLength);
+        uniforms.set(dataSrc);
+      }
+      postToMain(
+        {
+          method: 'gpu.runCommands',
+          commands: dictToObj(commands),
+          uniforms,
+        },
+        uniforms ? [uniforms.buffer] : []
+      );
+      return true;
+    },
     createTexture: (id: number, width: number, height: number, format: string) => {
       postToMain({
         method: 'gpu.createTexture',
@@ -346,6 +471,14 @@ export async function initWorker(): Promise<WgpyInitWorkerResult> {
           initPromiseReject(new Error('wgpy: failed to initialize any backend'));
         }
         break;
+      case 'getDataAsyncComplete': {
+        const resolve = asyncReadCallbacks.get(e.data.requestId);
+        if (resolve) {
+          asyncReadCallbacks.delete(e.data.requestId);
+          resolve(e.data.data);
+        }
+        break;
+      }
     }
   });
 
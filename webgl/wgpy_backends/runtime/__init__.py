@@ -1,2 +1,29 @@
+from wgpy_backends.webgl.platform import get_platform
+from wgpy_backends.webgl import webgl_buffer
+
+
 def get_backend_name() -> str:
     return "webgl"
+
+
+def synchronize():
+    get_platform().flush()
+
+
+def get_kernel_manifest() -> dict:
+    return {"backend": "webgl", "kernels": get_platform().getKernelManifest()}
+
+
+def warmup(manifest: dict):
+    if manifest.get("backend") != "webgl":
+        # generated sources are specific to the backend
+        return
+    get_platform().addKernelsAsync(manifest["kernels"])
+
+
+def get_write_version(buffer_id: int) -> int:
+    return get_platform().getWriteVersion(buffer_id)
+
+
+def get_buffer_pool():
+    return webgl_buffer.get_buffer_pool()
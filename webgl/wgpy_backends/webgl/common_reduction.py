@@ -163,3 +163,45 @@ def min(a: ndarray, axis=None, dtype=None, out=None, keepdims=False):
         )
 
     return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def any(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="bool y",
+        map_expr="bool(x)",
+        reduce_expr="a || b",
+        post_map_expr="y = a",
+        identity="false",
+        name="any",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def all(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="bool y",
+        map_expr="bool(x)",
+        reduce_expr="a && b",
+        post_map_expr="y = a",
+        identity="true",
+        name="all",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def count_nonzero(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="int y",
+        map_expr="int(bool(x))",
+        reduce_expr="a + b",
+        post_map_expr="y = a",
+        identity="int(0)",
+        name="count_nonzero",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
@@ -0,0 +1,102 @@
+from typing import List
+import numpy as np
+from wgpy import lazy_evaluation
+from wgpy_backends.webgl.elementwise_kernel import ElementwiseKernel
+from wgpy_backends.webgl.ndarray import ndarray
+from wgpy_backends.webgl.webgl_buffer import WebGLBuffer
+
+# Number of inputs gathered by one kernel, within the texture units of a fragment shader
+_MAX_INPUTS = 8
+
+_kernels = {}  # (number of inputs, whether old values are kept) -> ElementwiseKernel
+
+
+def _get_kernel(n_inputs: int, keep_old: bool) -> ElementwiseKernel:
+    # Fragment shader cannot scatter, so each element of the output gathers its value
+    # from the input whose slab contains it.
+    kernel = _kernels.get((n_inputs, keep_old))
+    if kernel is None:
+        in_params = ["raw T old"] if keep_old else []
+        uniforms = ["int row"]
+        operation = "int o = _y_0 / row;\nint r = _y_0 - o * row;\n"
+        operation += "y = old(_y_0);\n" if keep_old else "y = T(0);\n"
+        for j in range(n_inputs):
+            in_params.append(f"raw T x{j}")
+            uniforms += [f"int start_{j}", f"int len_{j}"]
+            operation += f"""if (r >= start_{j} && r < start_{j} + len_{j}) {{
+    y = x{j}(o * len_{j} + r - start_{j});
+}}
+"""
+        kernel = ElementwiseKernel(
+            in_params=",".join(in_params),
+            out_params="T y",
+            operation=operation,
+            name=f"concatenate_{n_inputs}{'_old' if keep_old else ''}",
+            uniforms=",".join(uniforms),
+        )
+        _kernels[(n_inputs, keep_old)] = kernel
+    return kernel
+
+
+def _assign_slabs(arrays: List[ndarray], axis: int, out: ndarray):
+    start = 0
+    for a in arrays:
+        stop = start + a.shape[axis]
+        out[(slice(None),) * axis + (slice(start, stop),)]._assign(a)
+        start = stop
+
+
+def concatenate_into(arrays: List[ndarray], axis: int, out: ndarray):
+    """
+    Writes the arrays into consecutive slabs of out along axis.
+    Each group of up to _MAX_INPUTS inputs is gathered into the whole texture
+    by one kernel, instead of writing the texture once per input.
+    """
+    # inputs sharing the buffer of out are copied before any slab is written
+    arrays = [a.copy() if a.size > 0 and a.buffer is out.buffer else a for a in arrays]
+    # copies above may be pending in lazy evaluation; they are evaluated here
+    lazy_evaluation.before_write(out)
+    if out.size == 0:
+        return
+    if not out.flags.c_contiguous_full:
+        # a view of the texture is written by the strided copy of each input
+        _assign_slabs(arrays, axis, out)
+        return
+    inner = int(np.prod(out.shape[axis + 1 :]))
+    slabs = []  # (input, start, length) in elements of a row of out
+    start = 0
+    bound_buffers = set()
+    for a in arrays:
+        length = a.shape[axis] * inner
+        if a.size > 0:
+            if a.dtype != out.dtype:
+                a = a.astype(out.dtype)
+            elif id(a.buffer) in bound_buffers:
+                # Cannot assign the same texture as multiple inputs
+                a = a.copy()
+            bound_buffers.add(id(a.buffer))
+            slabs.append((a, start, length))
+        start += length
+    buffer = out.buffer
+    for first in range(0, len(slabs), _MAX_INPUTS):
+        group = slabs[first : first + _MAX_INPUTS]
+        uniforms = {"row": out.shape[axis] * inner}
+        for j, (_, slab_start, length) in enumerate(group):
+            uniforms[f"start_{j}"] = slab_start
+            uniforms[f"len_{j}"] = length
+        inputs = [a for a, _, _ in group]
+        kernel = _get_kernel(len(group), first > 0)
+        if first == 0:
+            flat = ndarray((buffer.size,), out.dtype, buffer=buffer, owndata=False)
+            kernel(*inputs, flat, uniforms=uniforms)
+        else:
+            # the texture being read cannot be the output; written into a new texture
+            old = ndarray((buffer.size,), out.dtype, buffer=buffer, owndata=False)
+            new_buffer = WebGLBuffer(buffer.size, buffer.dtype, buffer.texture_shape)
+            new = ndarray((buffer.size,), out.dtype, buffer=new_buffer)
+            kernel(old, *inputs, new, uniforms=uniforms)
+            # swap textures so that the buffer shared by views refers to the new texture
+            buffer.buffer_id, new_buffer.buffer_id = (
+                new_buffer.buffer_id,
+                buffer.buffer_id,
+            )
@@ -1,3 +1,6 @@
+from wgpy_backends.webgl.platform import get_platform
+
+
 class Device:
     def __init__(self, device=None) -> None:
         self.id = 0  # single device
@@ -14,5 +17,8 @@ class Device:
     def get_device_id(self):
         return self.id
 
+    def synchronize(self):
+        get_platform().flush()
+
 
 device = Device()
@@ -10,8 +10,12 @@ from wgpy_backends.webgl.shader_util import (
 )
 from wgpy_backends.webgl.kernel_common import (
     GenericResolveResult,
+    ScalarArg,
+    is_host_scalar,
     make_input_uniform,
     make_output_uniform,
+    make_scalar_args,
+    make_scalar_input_uniform,
     InParam,
     OutParam,
     UniformDefinition,
@@ -21,6 +25,7 @@ from wgpy_backends.webgl.kernel_common import (
     resolve_generic_type,
 )
 from wgpy_backends.webgl.platform import get_platform
+from wgpy import lazy_evaluation
 
 added_kernels = set()
 
@@ -43,6 +48,13 @@ def get_input_key(
     )
 
 
+def get_scalar_input_key(name, dtype):
+    """
+    Obtain the key that is the branching factor for kernel generation
+    """
+    return (name, 0, "scalar", dtype)
+
+
 def make_output_key(name, ndim, dtype, texture_shape):
     """
     Obtain the key that is the branching factor for kernel generation
@@ -187,6 +199,15 @@ def make_input_def(
     return uniform, func_def, loop_head
 
 
+def make_scalar_input_def(param: InParam, scalar: ScalarArg):
+    # scalar value is given as uniform, no texture is needed
+    name = param.name
+    uniform = f"uniform {scalar.uniform_type} _{name}_scalar;\n"
+    native_type = param.native_type_or_generic
+    loop_head = f"{native_type} {name} = {native_type}(_{name}_scalar);\n"
+    return uniform, loop_head
+
+
 def make_output_def(
     param: OutParam, ndim, dtype, texture_shape: WebGLArrayTextureShape
 ):
@@ -317,6 +338,11 @@ class ElementwiseKernel:
         uniform = make_uniform_def(self.parsed_uniforms)
         uniform_all += uniform
         for k, ary in zip(self.parsed_in_params, in_array_impls):
+            if isinstance(ary, ScalarArg):
+                uniform, loop_head = make_scalar_input_def(k, ary)
+                uniform_all += uniform
+                loop_head_all += loop_head
+                continue
             uniform, func_def, loop_head = make_input_def(
                 k,
                 self.parsed_out_param.name,
@@ -373,10 +399,21 @@ for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
 
         assert len(arrays) == self.nin or len(arrays) == self.nin + self.nout
 
-        in_arrays = [asarray(array) for array in arrays[: self.nin]]
+        in_arrays = []
+        for pip, array in zip(self.parsed_in_params, arrays[: self.nin]):
+            if not (pip.raw or pip.rawnd) and is_host_scalar(array):
+                # passed as uniform, without uploading
+                in_arrays.append(array)
+            else:
+                in_arrays.append(asarray(array))
+        in_arrays = make_scalar_args(in_arrays, self.parsed_in_params)
         out_array = None
         if len(arrays) == self.nin + self.nout:
             out_array = arrays[self.nin]  # maybe None
+        if out_array is not None:
+            # pending lazy results which read the output are evaluated before it is
+            # written
+            lazy_evaluation.before_write(out_array)
 
         # broadcasting
         target_shapes = []
@@ -394,7 +431,7 @@ for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
         in_array_impls = []  # type: List[ndarray]
         for i, array in enumerate(in_arrays):
             pip = self.parsed_in_params[i]
-            if pip.raw or pip.rawnd:
+            if pip.raw or pip.rawnd or isinstance(array, ScalarArg):
                 in_array_impls.append(array)
             else:
                 in_array_impls.append(array.broadcast_to(result_shape))
@@ -412,20 +449,38 @@ for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
             assert out_array.shape == result_shape
             assert out_array.dtype == generic_resolve_result.out_dtype
             if not out_array.flags.c_contiguous_full:
-                raise NotImplementedError
+                # fragment shader writes every texel of the output texture, so the
+                # result is computed into a new array and written into the view on GPU.
+                from wgpy_backends.webgl.strided_write import write_strided
+
+                result = ndarray(result_shape, out_array.dtype)
+                self(*arrays[: self.nin], result, uniforms=uniforms)
+                if not write_strided(out_array, result):
+                    raise NotImplementedError(
+                        "Output view whose elements overlap is not supported."
+                    )
+                if self.no_return:
+                    return None
+                if self.return_tuple:
+                    return (out_array,)
+                return out_array
         out_array_impl = out_array
 
         # even if same instance, different source code is generated for dtype, ndim etc.
         # assigning unique key among same application.
         kernel_key = (
             tuple(
-                get_input_key(
-                    k.name,
-                    self.parsed_out_param.name,
-                    ary.ndim,
-                    True,
-                    ary.dtype,
-                    ary.buffer.texture_shape,
+                (
+                    get_scalar_input_key(k.name, ary.dtype)
+                    if isinstance(ary, ScalarArg)
+                    else get_input_key(
+                        k.name,
+                        self.parsed_out_param.name,
+                        ary.ndim,
+                        True,
+                        ary.dtype,
+                        ary.buffer.texture_shape,
+                    )
                 )
                 for k, ary in zip(self.parsed_in_params, in_array_impls)
             ),
@@ -449,7 +504,10 @@ for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
             added_kernels.add(kernel_name)
         all_uniforms = []
         for k, array in zip(self.parsed_in_params, in_array_impls):
-            all_uniforms.extend(make_input_uniform(k, array))
+            if isinstance(array, ScalarArg):
+                all_uniforms.extend(make_scalar_input_uniform(k, array))
+            else:
+                all_uniforms.extend(make_input_uniform(k, array))
         all_uniforms.extend(
             make_output_uniform(self.parsed_out_param, out_array_impl, False)
         )
@@ -471,6 +529,7 @@ for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
                 "inputs": [
                     {"name": f"_{k.name}_texture", "id": array.buffer.buffer_id}
                     for k, array in zip(self.parsed_in_params, in_array_impls)
+                    if not isinstance(array, ScalarArg)
                 ],
                 "output": out_array_impl.buffer.buffer_id,
                 "uniforms": all_uniforms,
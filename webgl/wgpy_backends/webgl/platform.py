@@ -1,44 +1,171 @@
 # platform call interface
+from typing import Optional
 import numpy as np
 from js import gl  # Pyodide-dependent
+from wgpy.common.kernel_registry import KernelRegistry
+
+performance_metrics = {
+    "webgl.queue.flush_count": 0,
+    "webgl.queue.dispatch_count": 0,
+    "webgl.queue.dispatch_per_flush_last": 0,
+    "webgl.queue.dispatch_per_flush_max": 0,
+}
+
+# Number of queued commands that triggers a flush without an explicit synchronization
+# point.
+_DEFAULT_FLUSH_THRESHOLD = 256
 
 
 class WebGLPlatform:
     def __init__(self) -> None:
         self._latest_comm_buf = None
+        # Commands which do not need an immediate response (runKernel, disposeBuffer)
+        # are recorded here and sent to JS in one call.
+        self._command_queue = []
+        self._queued_dispatch_count = 0
+        self.flush_threshold = _DEFAULT_FLUSH_THRESHOLD
+        self._kernels = KernelRegistry(performance_metrics, "webgl.kernel")
+        # versions of writes increase monotonically across buffers
+        self._write_version = 0
+        self._buffer_write_versions = {}  # buffer_id -> version of the last write
+
+    def _enqueue(self, command: dict):
+        self._command_queue.append(command)
+        if len(self._command_queue) >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """
+        Sends queued commands to the GPU.
+        Must be called before any operation whose result depends on the queued commands.
+        """
+        if len(self._command_queue) == 0:
+            return
+        commands = self._command_queue
+        dispatch_count = self._queued_dispatch_count
+        self._command_queue = []
+        self._queued_dispatch_count = 0
+        gl.runCommands(commands)
+        performance_metrics["webgl.queue.flush_count"] += 1
+        performance_metrics["webgl.queue.dispatch_count"] += dispatch_count
+        performance_metrics["webgl.queue.dispatch_per_flush_last"] = dispatch_count
+        performance_metrics["webgl.queue.dispatch_per_flush_max"] = max(
+            performance_metrics["webgl.queue.dispatch_per_flush_max"], dispatch_count
+        )
+
+    def _mark_written(self, buffer_id: int):
+        self._write_version += 1
+        self._buffer_write_versions[buffer_id] = self._write_version
+
+    def getWriteVersion(self, buffer_id: int) -> int:
+        """
+        Returns the version of the last write to the buffer (by kernel or data upload).
+        The version changes whenever the content of the buffer may change.
+        """
+        return self._buffer_write_versions.get(buffer_id, 0)
 
     def getDeviceInfo(self) -> dict:
         return gl.getDeviceInfo().to_py()
 
     def createBuffer(self, buffer_id: int, texture_shape_json: str):
+        # new buffer id is never referenced by queued commands, so no flush is needed
         return gl.createBuffer(buffer_id, texture_shape_json)
 
     def disposeBuffer(self, buffer_id: int):
-        return gl.disposeBuffer(buffer_id)
+        # queued kernels may still use the buffer
+        self._buffer_write_versions.pop(buffer_id, None)
+        self._enqueue({"method": "disposeBuffer", "id": buffer_id})
 
     def setCommBuf(self, buffer: np.ndarray):
         self._latest_comm_buf = buffer
         return gl.setCommBuf(buffer)
 
-    def setData(self, buffer_id: int, js_ctor_type: str, size: int):
-        if not gl.setData(buffer_id, js_ctor_type, size):
+    def setData(
+        self, buffer_id: int, js_ctor_type: str, size: int, rect: Optional[dict] = None
+    ):
+        # rect: sub-rectangle of the texture to write (same format as getData).
+        # Whole texture if None.
+        # queued kernels may read the buffer before it is overwritten
+        self.flush()
+        self._mark_written(buffer_id)
+        if not gl.setData(buffer_id, js_ctor_type, size, rect):
             # WASM buffer may reallocated
             self.setCommBuf(self._latest_comm_buf)
-            if not gl.setData(buffer_id, js_ctor_type, size):
+            if not gl.setData(buffer_id, js_ctor_type, size, rect):
                 raise ValueError("setData failed twice")
 
-    def getData(self, buffer_id: int, js_ctor_type: str, size: int):
-        if not gl.getData(buffer_id, js_ctor_type, size):
+    def setDataFromHeap(
+        self,
+        buffer_id: int,
+        js_ctor_type: str,
+        array: np.ndarray,
+        rect: Optional[dict] = None,
+    ):
+        # writes c-contiguous array directly from WASM heap,
+        # without copying to comm buffer
+        # comm buffer must be set, because its view is used to access the heap
+        self.flush()
+        self._mark_written(buffer_id)
+        address = array.__array_interface__["data"][0]
+        if not gl.setDataFromHeap(buffer_id, js_ctor_type, address, array.size, rect):
+            # WASM heap may be grown
+            self.setCommBuf(self._latest_comm_buf)
+            if not gl.setDataFromHeap(
+                buffer_id, js_ctor_type, address, array.size, rect
+            ):
+                raise ValueError("setDataFromHeap failed twice")
+
+    def getData(
+        self, buffer_id: int, js_ctor_type: str, size: int, rect: Optional[dict] = None
+    ):
+        # rect: sub-rectangle of the texture to read
+        # ({"x", "y", "width", "height", "layer", "depth"}). Whole texture if None.
+        self.flush()
+        if not gl.getData(buffer_id, js_ctor_type, size, rect):
             # WASM buffer may reallocated
             self.setCommBuf(self._latest_comm_buf)
-            if not gl.getData(buffer_id, js_ctor_type, size):
+            if not gl.getData(buffer_id, js_ctor_type, size, rect):
                 raise ValueError("getData failed twice")
 
+    def getDataAsync(self, buffer_id: int, rect: Optional[dict] = None):
+        # requests data of the buffer without blocking;
+        # returns awaitable which resolves to np.ndarray of uint8.
+        # the request is sent immediately, so commands issued later do not affect
+        # the result.
+        self.flush()
+        return _receive_data(gl.getDataAsync(buffer_id, rect))
+
     def addKernel(self, name, descriptor):
-        return gl.addKernel(name, descriptor)
+        # kernels generating the same source (e.g. the same operation in different
+        # ElementwiseKernel instances) share one compiled kernel; compilation is skipped
+        # for the second and later names.
+        if self._kernels.register(name, descriptor):
+            return gl.addKernel(name, descriptor)
+
+    def addKernelsAsync(self, descriptors: list):
+        """
+        Starts compiling kernels listed in a manifest without waiting for completion.
+        """
+        for descriptor in descriptors:
+            name = self._kernels.register_precompiled(descriptor)
+            if name is not None:
+                gl.addKernelAsync(name, descriptor)
+
+    def getKernelManifest(self) -> list:
+        return self._kernels.manifest()
 
     def runKernel(self, descriptor):
-        return gl.runKernel(descriptor)
+        self._mark_written(descriptor["output"])
+        descriptor = {**descriptor, "name": self._kernels.resolve(descriptor["name"])}
+        self._queued_dispatch_count += 1
+        self._enqueue({"method": "runKernel", "descriptor": descriptor})
+
+
+async def _receive_data(promise) -> np.ndarray:
+    data = await promise
+    array = np.empty((data.byteLength,), dtype=np.uint8)
+    data.assign_to(array)
+    return array
 
 
 _instance = None
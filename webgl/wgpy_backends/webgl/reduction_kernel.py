@@ -2,10 +2,16 @@ from typing import List, Optional, Tuple, Union
 import numpy as np
 from wgpy.construct import asarray
 from wgpy.common.shape_util import calculate_c_contiguous_strides
-from wgpy_backends.webgl.texture import WebGL2RenderingContext, WebGLArrayTextureShape
+from wgpy_backends.webgl.texture import (
+    WebGL2RenderingContext,
+    WebGLArrayTextureShape,
+    get_rgba_texture_shape,
+)
 from wgpy_backends.webgl.ndarray import ndarray
+from wgpy_backends.webgl.webgl_buffer import WebGLBuffer
 from wgpy_backends.webgl.shader_util import (
     header,
+    native_scalar_type_for_dtype,
     native_scalar_type_for_type,
     native_pixel_type_for_internal_format,
 )
@@ -23,6 +29,7 @@ from wgpy_backends.webgl.kernel_common import (
     UniformDefinition,
 )
 from wgpy_backends.webgl.platform import get_platform
+from wgpy import lazy_evaluation
 
 added_kernels = set()
 
@@ -287,8 +294,10 @@ def make_reduction_loop(
     reduction_define = ""
     reduction_loop_open = ""
     reduction_loop_close = ""
-    for i, a in enumerate(axis):
-        reduction_define += f"#define _redi_shape_{i} {input_shape[a]}\n"
+    # extents of reduced axes are given as uniforms, so that the kernel does not
+    # depend on the input shape.
+    for i in range(len(axis)):
+        reduction_define += f"uniform int _redi_shape_{i};\n"
         reduction_loop_open += (
             f"for (int _redi_{i} = 0; _redi_{i} < _redi_shape_{i}; _redi_{i}++) {{\n"
         )
@@ -296,6 +305,140 @@ def make_reduction_loop(
     return reduction_define, reduction_loop_open, reduction_loop_close, loop_head
 
 
+def make_reduction_index(axis: Tuple[int, ...]) -> str:
+    """
+    Decomposes the flat index of reduced elements _r into _redi_0, _redi_1, ...
+    (the last reduced axis is fastest).
+    """
+    source = "int _red_t = _r;\n"
+    for i in range(len(axis) - 1, 0, -1):
+        source += f"""int _redi_{i} = _red_t % _redi_shape_{i};
+_red_t = _red_t / _redi_shape_{i};
+"""
+    if len(axis) > 0:
+        source += "int _redi_0 = _red_t;\n"
+    return source
+
+
+# number of elements (or partial results) reduced by a fragment in a pass of multi-pass
+# reduction (16x16 tile)
+_TILE_SIZE = 16 * 16
+# reduced extents from which multi-pass reduction is used.
+# a fragment looping over whole large extent may hit GPU watchdog timeout.
+_MULTI_PASS_MIN_RED_SIZE = 16 * _TILE_SIZE
+
+_partial_dtype_for_scalar_type = {
+    "float": np.dtype(np.float32),
+    "int": np.dtype(np.int32),
+    "uint": np.dtype(np.uint8),
+    "bool": np.dtype(np.bool_),
+}
+
+_partial_vector_scalar_types = {"vec": "float", "ivec": "int", "uvec": "uint"}
+
+
+def get_partial_format(reduce_type: str) -> Optional[Tuple[np.dtype, int]]:
+    """
+    Returns (dtype, number of components) of the texture storing partial results of
+    reduce_type, one result per RGBA pixel.
+    Returns None if reduce_type cannot be stored.
+    """
+    if reduce_type in _partial_dtype_for_scalar_type:
+        return _partial_dtype_for_scalar_type[reduce_type], 1
+    for prefix, scalar_type in _partial_vector_scalar_types.items():
+        if reduce_type in [f"{prefix}{n}" for n in range(2, 5)]:
+            return _partial_dtype_for_scalar_type[scalar_type], int(reduce_type[-1])
+    return None
+
+
+def make_partial_input_def(reduce_type: str, texture_shape: WebGLArrayTextureShape):
+    """
+    Declares _red_partial(q) which reads q-th partial result written by the previous
+    pass.
+    """
+    _, n_components = get_partial_format(reduce_type)
+    native_pixel_type = native_pixel_type_for_internal_format[
+        texture_shape.internal_format
+    ]
+    sampler_type = {
+        WebGL2RenderingContext.FLOAT: "sampler2D",
+        WebGL2RenderingContext.HALF_FLOAT: "sampler2D",
+        WebGL2RenderingContext.INT: "isampler2D",
+        WebGL2RenderingContext.UNSIGNED_BYTE: "usampler2D",
+    }[texture_shape.type]
+    if reduce_type == "bool":
+        value = "v.r != 0u"
+    elif n_components == 1:
+        value = "v.r"
+    else:
+        value = "v." + "xyzw"[:n_components]
+    if texture_shape.dim == "2DArray":
+        uniform = f"uniform {sampler_type}Array _red_partial_texture;\n"
+        func_def = f"""
+{reduce_type} _red_partial(int q)
+{{
+    ivec3 tsize = textureSize(_red_partial_texture, 0);
+    int y = q / tsize.x;
+    int x = q - y * tsize.x;
+    int z = y / tsize.y;
+    y = y - z * tsize.y;
+    {native_pixel_type} v = texelFetch(_red_partial_texture, ivec3(x, y, z), 0);
+    return {value};
+}}
+"""
+    else:
+        uniform = f"uniform {sampler_type} _red_partial_texture;\n"
+        func_def = f"""
+{reduce_type} _red_partial(int q)
+{{
+    ivec2 tsize = textureSize(_red_partial_texture, 0);
+    int y = q / tsize.x;
+    int x = q - y * tsize.x;
+    {native_pixel_type} v = texelFetch(_red_partial_texture, ivec2(x, y), 0);
+    return {value};
+}}
+"""
+    return uniform, func_def
+
+
+def make_partial_output_def(reduce_type: str, texture_shape: WebGLArrayTextureShape):
+    """
+    Writes the accumulator a as a partial result, one per pixel.
+    In main_head, i is the flat output index and _red_chunk_idx is the index of the
+    chunk of reduced elements.
+    """
+    _, n_components = get_partial_format(reduce_type)
+    native_pixel_type = native_pixel_type_for_internal_format[
+        texture_shape.internal_format
+    ]
+    uniform = "uniform int _red_n_chunks_out;\n"
+    uniform += "uniform int _red_partial_texture_w;\n"
+    out_def = f"out {native_pixel_type} _out_color;\n"
+    if texture_shape.dim == "2DArray":
+        uniform += "uniform int _red_partial_texture_h;\n"
+        uniform += "uniform int _draw_depth;\n"
+        main_head = """int _red_p = int(gl_FragCoord.x - 0.5) + _red_partial_texture_w
+    * (int(gl_FragCoord.y - 0.5) + _draw_depth * _red_partial_texture_h);
+"""
+    else:
+        main_head = """int _red_p = int(gl_FragCoord.x - 0.5)
+    + _red_partial_texture_w * int(gl_FragCoord.y - 0.5);
+"""
+    main_head += """int i = _red_p / _red_n_chunks_out;
+int _red_chunk_idx = _red_p - i * _red_n_chunks_out;
+if (i >= _out_ind_size) { return; }
+"""
+    if reduce_type == "bool":
+        main_tail = "_out_color = uvec4(a ? 1u : 0u, 0u, 0u, 0u);\n"
+    elif n_components == 4:
+        main_tail = f"_out_color = {native_pixel_type}(a);\n"
+    else:
+        zero = {"vec4": "0.0", "ivec4": "0", "uvec4": "0u"}[native_pixel_type]
+        padding = "".join(f", {zero}" for _ in range(4 - n_components))
+        main_tail = f"_out_color = {native_pixel_type}(a{padding});\n"
+    return uniform, out_def, main_head, main_tail
+
+
 class ReductionKernel:
     _next_idx = 1
 
@@ -371,7 +514,7 @@ class ReductionKernel:
                 axis,
                 input_shape,
                 out_array_impl.buffer.texture_shape,
-                self.reduce_type,
+                self._get_reduce_type(out_array_impl),
                 self.identity,
             )
         )
@@ -437,6 +580,275 @@ a = ({self.reduce_expr});
 """
         return source
 
+    def _generate_multi_pass_kernel_source(
+        self,
+        in_array_impls: List[ndarray],
+        out_array_impl: ndarray,
+        generic_resolve_result: GenericResolveResult,
+        axis: Tuple[int, ...],
+        src_shape: Optional[WebGLArrayTextureShape],
+        dst_shape: Optional[WebGLArrayTextureShape],
+    ):
+        """
+        Generates a pass of multi-pass reduction.
+        src_shape: texture shape of partial results read by the pass. None for the first
+            pass, which reads the inputs.
+        dst_shape: texture shape of partial results written by the pass. None for the
+            last pass, which writes the output.
+        """
+        reduce_type = self._get_reduce_type(out_array_impl)
+        out_name = self.parsed_out_param.name
+        uniform_all = ""
+        uniform_all += "uniform int _in_ind_size;\n"  # cupy's _in_ind.size()
+        uniform_all += "uniform int _red_size;\n"
+        uniform_all += "uniform int _red_n_chunks;\n"
+        uniform_all += make_uniform_def(self.parsed_uniforms)
+        func_def_all = ""
+        if dst_shape is None:
+            uniform, out_def, loop_head, loop_tail, main_head, main_tail = (
+                make_output_def(
+                    self.parsed_out_param,
+                    out_array_impl.ndim,
+                    out_array_impl.dtype,
+                    out_array_impl.buffer.texture_shape,
+                )
+            )
+            post_map_expr = self.post_map_expr
+        else:
+            uniform, out_def, main_head, main_tail = make_partial_output_def(
+                reduce_type, dst_shape
+            )
+            uniform += "uniform int _out_ind_size;\n"  # cupy's _out_ind.size()
+            loop_head = ""
+            loop_tail = ""
+            post_map_expr = ""
+        uniform_all += uniform
+        loop_head += f"{reduce_type} a = {self.identity}, b;\n"
+        reduction_define = ""
+        if src_shape is None:
+            # the first pass reduces a chunk of elements of the inputs
+            for i in range(len(axis)):
+                reduction_define += f"uniform int _redi_shape_{i};\n"
+            inner_head_all = ""
+            for k, ary in zip(self.parsed_in_params, in_array_impls):
+                uniform, func_def, inner_head = make_input_def(
+                    k,
+                    out_name,
+                    ary.ndim,
+                    ary.dtype,
+                    ary.buffer.texture_shape,
+                    axis,
+                )
+                uniform_all += uniform
+                func_def_all += func_def
+                inner_head_all += inner_head
+            for d in range(out_array_impl.ndim):
+                uniform_all += f"uniform int _{out_name}_shape_{d};\n"
+            loop_head += f"int _{out_name}_t1 = i;\n"
+            loop_head += f"int _{out_name}_t2;\n"
+            for d in range(out_array_impl.ndim - 1, 0, -1):
+                loop_head += f"""_{out_name}_t2 =
+    _{out_name}_t1 / _{out_name}_shape_{d};
+int _{out_name}_{d} =
+    _{out_name}_t1 - _{out_name}_t2 * _{out_name}_shape_{d};
+_{out_name}_t1 = _{out_name}_t2;
+"""
+            if out_array_impl.ndim > 0:
+                loop_head += f"int _{out_name}_0 = _{out_name}_t1;\n"
+            reduction_loop = f"""int _red_begin = _red_chunk_idx * {_TILE_SIZE};
+int _red_end = min(_red_begin + {_TILE_SIZE}, _red_size);
+for (int _r = _red_begin; _r < _red_end; _r++) {{
+{make_reduction_index(axis)}
+{inner_head_all}
+b = ({self.map_expr});
+a = ({self.reduce_expr});
+}}
+"""
+        else:
+            uniform, func_def = make_partial_input_def(reduce_type, src_shape)
+            uniform_all += uniform
+            func_def_all += func_def
+            if dst_shape is None:
+                # the last pass reduces all partial results of the output element
+                range_source = """int _red_begin = i * _red_n_chunks;
+int _red_end = _red_begin + _red_n_chunks;
+"""
+            else:
+                range_source = f"""int _red_begin =
+    i * _red_n_chunks + _red_chunk_idx * {_TILE_SIZE};
+int _red_end = i * _red_n_chunks
+    + min(_red_chunk_idx * {_TILE_SIZE} + {_TILE_SIZE}, _red_n_chunks);
+"""
+            reduction_loop = f"""{range_source}
+for (int _red_q = _red_begin; _red_q < _red_end; _red_q++) {{
+b = _red_partial(_red_q);
+a = ({self.reduce_expr});
+}}
+"""
+
+        if (
+            dst_shape is None
+            and out_array_impl.buffer.texture_shape.elements_per_pixel == 4
+        ):
+            # independently compute RGBA values by loop
+            body = f"""for (int _rgba_loop = 0; _rgba_loop < 4; _rgba_loop++) {{
+{loop_head}
+{reduction_loop}
+{post_map_expr};
+{loop_tail}
+}}
+"""
+        else:
+            body = f"""{loop_head}
+{reduction_loop}
+{post_map_expr};
+{loop_tail}
+"""
+        source = f"""{header}
+{self.preamble}
+{reduction_define}
+{generic_resolve_result.define_statements}
+{uniform_all}
+{out_def}
+{func_def_all}
+void main() {{
+{main_head}
+{body}
+{main_tail}
+}}
+"""
+        return source
+
+    def _get_reduce_type(self, out_array_impl: ndarray) -> str:
+        if self.reduce_type is None:
+            # not the type of texture, which is uint for bool
+            return native_scalar_type_for_dtype[out_array_impl.dtype]
+        return self.reduce_type
+
+    def _can_run_multi_pass(self, out_array_impl: ndarray, red_size: int) -> bool:
+        if red_size < _MULTI_PASS_MIN_RED_SIZE:
+            return False
+        if get_partial_format(self._get_reduce_type(out_array_impl)) is None:
+            return False
+        # raw inputs may be accessed by any index, not only by the chunk of reduced
+        # elements
+        return all(not (k.raw or k.rawnd) for k in self.parsed_in_params)
+
+    def _run_multi_pass(
+        self,
+        kernel_key,
+        in_array_impls: List[ndarray],
+        out_array_impl: ndarray,
+        generic_resolve_result: GenericResolveResult,
+        axis: Tuple[int, ...],
+        red_size: int,
+        inputs: List[dict],
+        all_uniforms: List[dict],
+    ):
+        """
+        Reduces in passes alternating between two intermediate textures of partial
+        results. Each fragment reduces _TILE_SIZE elements (or partial results of the
+        previous pass), so the number of passes is logarithmic in red_size.
+        """
+        partial_dtype, _ = get_partial_format(self._get_reduce_type(out_array_impl))
+        out_size = out_array_impl.size
+        n_chunks = (red_size + _TILE_SIZE - 1) // _TILE_SIZE
+        n_chunks_next = (n_chunks + _TILE_SIZE - 1) // _TILE_SIZE
+        # ping-pong buffers. the second one is not needed if the partial results of the
+        # first pass are reduced by the last pass.
+        partials = [
+            WebGLBuffer(
+                out_size * n_chunks * 4,
+                partial_dtype,
+                get_rgba_texture_shape(out_size * n_chunks, partial_dtype),
+            )
+        ]
+        if n_chunks_next > 1:
+            partials.append(
+                WebGLBuffer(
+                    out_size * n_chunks_next * 4,
+                    partial_dtype,
+                    get_rgba_texture_shape(out_size * n_chunks_next, partial_dtype),
+                )
+            )
+        red_uniforms = [
+            {"type": "int", "name": "_red_size", "value": red_size},
+        ]
+        src = None  # type: Optional[WebGLBuffer]
+        dst = partials[0]
+        n_chunks_src = red_size
+        while True:
+            src_shape = src.texture_shape if src is not None else None
+            dst_shape = dst.texture_shape if dst is not None else None
+            kernel_name = self._get_kernel_name(
+                kernel_key
+                + (
+                    "multi_pass",
+                    src_shape.dim if src_shape is not None else None,
+                    dst_shape.dim if dst_shape is not None else None,
+                ),
+                lambda: self._generate_multi_pass_kernel_source(
+                    in_array_impls,
+                    out_array_impl,
+                    generic_resolve_result,
+                    axis,
+                    src_shape,
+                    dst_shape,
+                ),
+            )
+            pass_uniforms = red_uniforms + [
+                {"type": "int", "name": "_red_n_chunks", "value": n_chunks_src},
+            ]
+            if dst is not None:
+                pass_uniforms += [
+                    {"type": "int", "name": "_red_n_chunks_out", "value": n_chunks},
+                    {
+                        "type": "int",
+                        "name": "_red_partial_texture_w",
+                        "value": dst_shape.width,
+                    },
+                    {
+                        "type": "int",
+                        "name": "_red_partial_texture_h",
+                        "value": dst_shape.height,
+                    },
+                ]
+            get_platform().runKernel(
+                {
+                    "name": kernel_name,
+                    "inputs": (
+                        inputs
+                        if src is None
+                        else [{"name": "_red_partial_texture", "id": src.buffer_id}]
+                    ),
+                    "output": (
+                        dst.buffer_id
+                        if dst is not None
+                        else out_array_impl.buffer.buffer_id
+                    ),
+                    "uniforms": all_uniforms + pass_uniforms,
+                }
+            )
+            if dst is None:
+                break
+            n_chunks_src = n_chunks
+            if n_chunks > _TILE_SIZE:
+                n_chunks = (n_chunks + _TILE_SIZE - 1) // _TILE_SIZE
+                src, dst = dst, partials[1] if dst is partials[0] else partials[0]
+            else:
+                src, dst = dst, None
+
+    def _get_kernel_name(self, kernel_key, generate) -> str:
+        kernel_name = self.kernel_keys.get(kernel_key, None)
+
+        if kernel_name is None:
+            kernel_name = self.kernel_name_prefix + str(len(self.kernel_keys))
+            self.kernel_keys[kernel_key] = kernel_name
+        if kernel_name not in added_kernels:
+            get_platform().addKernel(kernel_name, {"source": generate()})
+            added_kernels.add(kernel_name)
+        return kernel_name
+
     def _normalize_axis(
         self, axis: Optional[Union[int, Tuple[int, ...]]], ndim_input: int
     ) -> List[int]:
@@ -468,6 +880,10 @@ a = ({self.reduce_expr});
         out_array = None
         if len(arrays) == self.nin + self.nout:
             out_array = arrays[self.nin]  # maybe None
+        if out_array is not None:
+            # pending lazy results which read the output are evaluated before it is
+            # written
+            lazy_evaluation.before_write(out_array)
 
         # broadcasting
         target_shapes = []
@@ -497,7 +913,7 @@ a = ({self.reduce_expr});
         result_shape_keepdims = []
         for dim in range(len(input_shape)):
             if dim in n_axis:
-                axis_keys.append((dim, input_shape[dim]))
+                axis_keys.append(dim)
                 result_shape_keepdims.append(1)
             else:
                 result_shape_squeeze.append(input_shape[dim])
@@ -516,7 +932,27 @@ a = ({self.reduce_expr});
             assert out_array.shape == result_shape
             assert out_array.dtype == generic_resolve_result.out_dtype
             if not out_array.flags.c_contiguous_full:
-                raise NotImplementedError
+                # fragment shader writes every texel of the output texture, so the
+                # result is computed into a new array and written into the view on GPU.
+                from wgpy_backends.webgl.strided_write import write_strided
+
+                result = ndarray(result_shape, out_array.dtype)
+                self(
+                    *arrays[: self.nin],
+                    result,
+                    axis=axis,
+                    keepdims=keepdims,
+                    uniforms=uniforms,
+                )
+                if not write_strided(out_array, result):
+                    raise NotImplementedError(
+                        "Output view whose elements overlap is not supported."
+                    )
+                if self.no_return:
+                    return None
+                if self.return_tuple:
+                    return (out_array,)
+                return out_array
         out_array_impl_squeeze = out_array.get_view(
             result_shape_squeeze,
             out_array.dtype,
@@ -546,25 +982,14 @@ a = ({self.reduce_expr});
             ),
             tuple(axis_keys),
         )
-        kernel_name = self.kernel_keys.get(kernel_key, None)
-
-        if kernel_name is None:
-            kernel_name = self.kernel_name_prefix + str(len(self.kernel_keys))
-            self.kernel_keys[kernel_key] = kernel_name
-        if kernel_name not in added_kernels:
-            source = self._generate_kernel_source(
-                in_array_impls,
-                out_array_impl_squeeze,
-                generic_resolve_result,
-                n_axis,
-                input_shape,
-            )
-            get_platform().addKernel(kernel_name, {"source": source})
-            added_kernels.add(kernel_name)
         all_uniforms = []
         for k, array in zip(self.parsed_in_params, in_array_impls):
             all_uniforms.extend(make_input_uniform(k, array))
         all_uniforms.extend(make_input_reduction_uniform(input_shape))
+        all_uniforms.extend(
+            {"type": "int", "name": f"_redi_shape_{i}", "value": input_shape[a]}
+            for i, a in enumerate(n_axis)
+        )
         all_uniforms.extend(
             make_output_uniform(self.parsed_out_param, out_array_impl_squeeze, True)
         )
@@ -580,17 +1005,43 @@ a = ({self.reduce_expr});
         else:
             assert len(self.parsed_uniforms) == 0
 
-        get_platform().runKernel(
-            {
-                "name": kernel_name,
-                "inputs": [
-                    {"name": f"_{k.name}_texture", "id": array.buffer.buffer_id}
-                    for k, array in zip(self.parsed_in_params, in_arrays)
-                ],
-                "output": out_array_impl_squeeze.buffer.buffer_id,
-                "uniforms": all_uniforms,
-            }
-        )
+        inputs = [
+            {"name": f"_{k.name}_texture", "id": array.buffer.buffer_id}
+            for k, array in zip(self.parsed_in_params, in_arrays)
+        ]
+        red_size = 1
+        for a in n_axis:
+            red_size *= input_shape[a]
+        if self._can_run_multi_pass(out_array_impl_squeeze, red_size):
+            self._run_multi_pass(
+                kernel_key,
+                in_array_impls,
+                out_array_impl_squeeze,
+                generic_resolve_result,
+                n_axis,
+                red_size,
+                inputs,
+                all_uniforms,
+            )
+        else:
+            kernel_name = self._get_kernel_name(
+                kernel_key,
+                lambda: self._generate_kernel_source(
+                    in_array_impls,
+                    out_array_impl_squeeze,
+                    generic_resolve_result,
+                    n_axis,
+                    input_shape,
+                ),
+            )
+            get_platform().runKernel(
+                {
+                    "name": kernel_name,
+                    "inputs": inputs,
+                    "output": out_array_impl_squeeze.buffer.buffer_id,
+                    "uniforms": all_uniforms,
+                }
+            )
         if self.no_return:
             return None
         if self.return_tuple:
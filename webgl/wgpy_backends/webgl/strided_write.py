@@ -0,0 +1,107 @@
+from typing import List, Optional, Tuple
+from wgpy_backends.webgl.elementwise_kernel import ElementwiseKernel
+from wgpy_backends.webgl.ndarray import ndarray
+from wgpy_backends.webgl.webgl_buffer import WebGLBuffer
+
+_kernels = {}  # ndim -> ElementwiseKernel
+
+
+def _get_kernel(ndim: int) -> ElementwiseKernel:
+    # Fragment shader cannot scatter, so each element of the buffer gathers its value:
+    # the element index is decomposed by dst strides (largest first) to find whether
+    # it is in the view.
+    kernel = _kernels.get(ndim)
+    if kernel is None:
+        uniforms = ["int dst_offset", "int src_offset"]
+        operation = """
+int r = _y_0 - dst_offset;
+int s = src_offset;
+bool inside = r >= 0;
+int k;
+"""
+        for d in range(ndim):
+            uniforms += [f"int shape_{d}", f"int dst_stride_{d}", f"int src_stride_{d}"]
+            operation += f"""k = r / dst_stride_{d};
+inside = inside && k < shape_{d};
+r -= k * dst_stride_{d};
+s += k * src_stride_{d};
+"""
+        operation += "y = (inside && r == 0) ? src(s) : old(_y_0)"
+        kernel = ElementwiseKernel(
+            in_params="raw T old, raw T src",
+            out_params="T y",
+            operation=operation,
+            name=f"strided_write_{ndim}",
+            uniforms=",".join(uniforms),
+        )
+        _kernels[ndim] = kernel
+    return kernel
+
+
+def _normalize_view(
+    dst: ndarray,
+) -> Optional[Tuple[int, int, List[Tuple[int, int, int]]]]:
+    """
+    Returns (dst_offset, src_offset, [(shape, dst_stride, src_stride)]) in elements,
+    where dst strides are positive and sorted in descending order.
+    Returns None if elements of the view overlap (e.g. zero stride), which cannot be
+    decomposed.
+    """
+    dst_offset = dst.offset // dst.itemsize
+    src_offset = 0
+    dims = []
+    src_stride = 1
+    for d in range(dst.ndim - 1, -1, -1):
+        n = dst.shape[d]
+        dst_stride = dst.strides[d] // dst.itemsize
+        if n > 1:
+            if dst_stride == 0:
+                return None
+            if dst_stride < 0:
+                dst_offset += (n - 1) * dst_stride
+                dims.append((n, -dst_stride, -src_stride))
+                src_offset += (n - 1) * src_stride
+            else:
+                dims.append((n, dst_stride, src_stride))
+        src_stride *= n
+    dims.sort(key=lambda dim: dim[1], reverse=True)
+    reach = 0
+    for n, dst_stride, _ in reversed(dims):
+        if dst_stride <= reach:
+            return None
+        reach += (n - 1) * dst_stride
+    return dst_offset, src_offset, dims
+
+
+def write_strided(dst: ndarray, src: ndarray) -> bool:
+    """
+    Writes elements of src into the view dst on GPU.
+    src must be c-contiguous and have the same shape and dtype as dst.
+    The texture of dst is replaced by a new texture which has the same shape,
+    so other views of the buffer see the result.
+    Returns False if the view cannot be written by this method (elements of the view
+    overlap).
+    """
+    assert src.flags.c_contiguous
+    assert src.shape == dst.shape
+    assert src.dtype == dst.dtype
+    if dst.size == 0:
+        return True
+    normalized = _normalize_view(dst)
+    if normalized is None:
+        return False
+    dst_offset, src_offset, dims = normalized
+    uniforms = {"dst_offset": dst_offset, "src_offset": src_offset}
+    for d, (n, dst_stride, src_stride) in enumerate(dims):
+        uniforms[f"shape_{d}"] = n
+        uniforms[f"dst_stride_{d}"] = dst_stride
+        uniforms[f"src_stride_{d}"] = src_stride
+    buffer = dst.buffer
+    old = ndarray((buffer.size,), dst.dtype, buffer=buffer, owndata=False)
+    new_buffer = WebGLBuffer(buffer.size, buffer.dtype, buffer.texture_shape)
+    out = ndarray((buffer.size,), dst.dtype, buffer=new_buffer)
+    _get_kernel(len(dims))(old, src, out, uniforms=uniforms)
+    # swap textures so that the buffer object shared by views refers to the new texture.
+    # the old texture is released to the pool when new_buffer is deleted.
+    buffer.buffer_id, new_buffer.buffer_id = new_buffer.buffer_id, buffer.buffer_id
+    return True
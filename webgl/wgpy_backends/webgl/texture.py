@@ -139,9 +139,14 @@ def enqueue_default_texture_shape(*texture_shapes: WebGLArrayTextureShape):
     _shape_queue.extend(texture_shapes)
 
 
-def get_default_texture_shape(size: int, dtype: np.dtype) -> WebGLArrayTextureShape:
-    if len(_shape_queue) > 0:
-        return _shape_queue.pop(0)
+def _round_up_pow2(n: int) -> int:
+    r = 1
+    while r < n:
+        r *= 2
+    return r
+
+
+def _texture_format_for_dtype(dtype: np.dtype) -> dict:
     if dtype == np.float32:
         if get_float_texture_bit() == 16:
             f = {
@@ -175,14 +180,19 @@ def get_default_texture_shape(size: int, dtype: np.dtype) -> WebGLArrayTextureSh
         }
     else:
         raise ValueError(f"WebGL: unsupported dtype {dtype}")
+    return f
+
 
+def _texture_layout_for_size(size: int) -> dict:
     # h, w
+    # rounded up to power of two (size class), so that textures can be reused for
+    # slightly different sizes
     mts = get_max_texture_size()
     dim = "2D"
     if size < mts:
         height = 1
         depth = 1
-        width = max(size, 1)  # avoid size 0
+        width = min(_round_up_pow2(max(size, 1)), mts)  # avoid size 0
     else:
         width = mts
         height = int(math.ceil(size / mts))
@@ -193,4 +203,37 @@ def get_default_texture_shape(size: int, dtype: np.dtype) -> WebGLArrayTextureSh
             height = mts
             if depth > 16:  # TODO
                 raise ValueError("Array too large for WebGL texture")
-    return WebGLArrayTextureShape(height=height, width=width, depth=depth, dim=dim, **f)
+            depth = _round_up_pow2(depth)
+        else:
+            height = min(_round_up_pow2(height), mts)
+    return {"height": height, "width": width, "depth": depth, "dim": dim}
+
+
+def get_default_texture_shape(size: int, dtype: np.dtype) -> WebGLArrayTextureShape:
+    if len(_shape_queue) > 0:
+        return _shape_queue.pop(0)
+    return WebGLArrayTextureShape(
+        **_texture_layout_for_size(size), **_texture_format_for_dtype(dtype)
+    )
+
+
+def get_rgba_texture_shape(pixel_count: int, dtype: np.dtype) -> WebGLArrayTextureShape:
+    """
+    Texture shape which has pixel_count RGBA pixels of the format for dtype.
+    Not affected by enqueue_default_texture_shape.
+    """
+    f = _texture_format_for_dtype(dtype)
+    return WebGLArrayTextureShape(
+        **_texture_layout_for_size(pixel_count),
+        internal_format={
+            WebGL2RenderingContext.R16F: WebGL2RenderingContext.RGBA16F,
+            WebGL2RenderingContext.R32F: WebGL2RenderingContext.RGBA32F,
+            WebGL2RenderingContext.R32I: WebGL2RenderingContext.RGBA32I,
+            WebGL2RenderingContext.R8UI: WebGL2RenderingContext.RGBA8UI,
+        }[f["internal_format"]],
+        format={
+            WebGL2RenderingContext.RED: WebGL2RenderingContext.RGBA,
+            WebGL2RenderingContext.RED_INTEGER: WebGL2RenderingContext.RGBA_INTEGER,
+        }[f["format"]],
+        type=f["type"],
+    )
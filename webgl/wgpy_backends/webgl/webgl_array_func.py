@@ -5,6 +5,9 @@ from wgpy_backends.webgl.platform import get_platform
 from wgpy_backends.webgl.ndarray import ndarray
 import wgpy_backends.webgl.common_ufunc as common_ufunc
 import wgpy_backends.webgl.common_reduction as common_reduction
+import wgpy_backends.webgl.fusion as fusion
+from wgpy_backends.webgl.concatenate import concatenate_into
+from wgpy import lazy_evaluation
 
 added_kernels = set()
 elementwise_kernels = {}
@@ -16,6 +19,7 @@ class WebGLArrayFunc:
     def __init__(self) -> None:
         self.ufunc = common_ufunc
         self.reduction = common_reduction
+        self.fusion = fusion
 
     @staticmethod
     def instance() -> "WebGLArrayFunc":
@@ -43,6 +47,7 @@ class WebGLArrayFunc:
                 WebGL2RenderingContext.HALF_FLOAT,
             )
         if out is not None:
+            lazy_evaluation.before_write(out)
             assert out.flags.c_contiguous_full
             assert out.buffer.texture_shape.dim == "2D"
             assert out.buffer.texture_shape.internal_format in (
@@ -260,3 +265,18 @@ out0 += a({','.join(a_keys)}) * b({','.join(b_keys)});
         out = empty(tuple(result_shape), dtype=a.dtype)
         kernel(a, b, out)
         return out
+
+    def scatter_atomic(
+        self,
+        op: str,
+        dst: ndarray,
+        shape: Tuple[int, ...],
+        out_dims: List[Optional[int]],
+        indices: List[Union[ndarray, int, None]],
+        value: Union[ndarray, np.generic],
+    ) -> bool:
+        # WebGL cannot write to arbitrary position, so atomic operation is not available
+        return False
+
+    def concatenate_into(self, arrays: List[ndarray], axis: int, out: ndarray):
+        concatenate_into(arrays, axis, out)
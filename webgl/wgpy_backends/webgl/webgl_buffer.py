@@ -1,6 +1,6 @@
-from collections import defaultdict
-from typing import Optional
+from typing import List, Optional, Tuple
 import numpy as np
+from wgpy.common.buffer_pool import BufferPool
 from wgpy_backends.webgl.texture import (
     WebGL2RenderingContext,
     WebGLArrayTextureShape,
@@ -19,6 +19,7 @@ performance_metrics = {
     "webgl.buffer.write_count": 0,
     "webgl.buffer.write_size": 0,
     "webgl.buffer.write_scalar_count": 0,
+    "webgl.buffer.write_zero_copy_count": 0,
     "webgl.buffer.read_count": 0,
     "webgl.buffer.read_size": 0,
     "webgl.buffer.read_scalar_count": 0,
@@ -36,6 +37,10 @@ texture_type_to_element_itemsize = {
 }
 
 
+async def _resolved(value):
+    return value
+
+
 def get_dtype_js_ctor_type(dtype):
     dtype = np.dtype(dtype)
     return {
@@ -46,19 +51,39 @@ def get_dtype_js_ctor_type(dtype):
     }[dtype]
 
 
-_pool = defaultdict(list)
-
 added_kernels = set()
 
 
-def _pool_put(texture_shape: WebGLArrayTextureShape, buffer_id: int):
-    _pool[texture_shape].append(buffer_id)
+def _texture_byte_length(texture_shape: WebGLArrayTextureShape) -> int:
+    return (
+        texture_shape.element_count
+        * texture_type_to_element_itemsize[texture_shape.type]
+    )
+
+
+def _dispose_buffer(buffer_id: int):
+    byte_length = _texture_byte_lengths.pop(buffer_id)
+    get_platform().disposeBuffer(buffer_id)
+    performance_metrics["webgl.buffer.delete"] += 1
+    performance_metrics["webgl.buffer.buffer_count"] -= 1
+    performance_metrics["webgl.buffer.buffer_size"] -= byte_length
+
+
+# buffer_id -> byte length of the texture
+_texture_byte_lengths = {}
 
 
-def _pool_get(texture_shape: WebGLArrayTextureShape) -> Optional[int]:
-    if len(_pool[texture_shape]) > 0:
-        return _pool[texture_shape].pop()
-    return None
+def _flush_disposal():
+    get_platform().flush()
+
+
+# default texture shape is rounded up to size class,
+# so texture shape is used as the key.
+_pool = BufferPool(_dispose_buffer, _flush_disposal, performance_metrics, "webgl.pool")
+
+
+def get_buffer_pool() -> BufferPool:
+    return _pool
 
 
 class WebGLBuffer:
@@ -81,18 +106,21 @@ class WebGLBuffer:
         self.size = size
         self.dtype = dtype
         self.texture_shape = texture_shape or get_default_texture_shape(size, dtype)
-        pooled_buffer_id = _pool_get(self.texture_shape)
+        pooled_buffer_id = _pool.get(self.texture_shape)
         if pooled_buffer_id is not None:
             self.buffer_id = pooled_buffer_id
         else:
+            _pool.allocate(_texture_byte_length(self.texture_shape))
             self.buffer_id = WebGLBuffer.next_id
             WebGLBuffer.next_id += 1
             get_platform().createBuffer(self.buffer_id, self.texture_shape.to_json())
+            _texture_byte_lengths[self.buffer_id] = _texture_byte_length(
+                self.texture_shape
+            )
             performance_metrics["webgl.buffer.create"] += 1
             performance_metrics["webgl.buffer.buffer_count"] += 1
-            performance_metrics["webgl.buffer.buffer_size"] += (
-                self.texture_shape.element_count
-                * texture_type_to_element_itemsize[self.texture_shape.type]
+            performance_metrics["webgl.buffer.buffer_size"] += _texture_byte_length(
+                self.texture_shape
             )
             performance_metrics["webgl.buffer.buffer_count_max"] = max(
                 performance_metrics["webgl.buffer.buffer_count_max"],
@@ -104,9 +132,11 @@ class WebGLBuffer:
             )
 
     def __del__(self):
-        # TODO: limit pooled size
-        _pool_put(self.texture_shape, self.buffer_id)
-        # get_platform().disposeBuffer(self.buffer_id)
+        _pool.put(
+            self.texture_shape,
+            self.buffer_id,
+            _texture_byte_lengths[self.buffer_id],
+        )
 
     def _get_comm_buf(self, byte_size: int) -> np.ndarray:
         if WebGLBuffer._comm_buf is None or WebGLBuffer._comm_buf.size < byte_size:
@@ -116,15 +146,117 @@ class WebGLBuffer:
             get_platform().setCommBuf(WebGLBuffer._comm_buf)
         return WebGLBuffer._comm_buf
 
-    def set_data(self, array: np.ndarray):
-        if self.texture_shape.type == WebGL2RenderingContext.HALF_FLOAT:
-            array_f16 = array.astype(np.float16).ravel()
-            buf = self._get_comm_buf(
-                np.dtype(np.uint16).itemsize * self.texture_shape.element_count
+    def set_data(self, array: np.ndarray, start: int = 0):
+        """
+        Writes array to elements [start, start + array.size) of the buffer.
+        The range must be aligned to pixels (see is_pixel_aligned).
+        """
+        array = array.ravel()
+        epp = self.texture_shape.elements_per_pixel
+        # the memory of array can be directly read from WASM heap if it has the same
+        # layout as the texture
+        zero_copy = (
+            self.texture_shape.type != WebGL2RenderingContext.HALF_FLOAT
+            and array.dtype == self._read_dtype()
+            and array.flags.c_contiguous
+            and array.size % epp == 0
+        )
+        if start == 0 and array.size == self.size and not zero_copy:
+            self._set_data_rect(array, self.texture_shape.element_count, None)
+            return
+        stop = start + array.size
+        if not self.is_pixel_aligned(start, stop):
+            raise ValueError(
+                f"range [{start}, {stop}) is not aligned to pixels of the texture."
+            )
+        first_pixel = start // epp
+        for rect, rect_first_pixel in self._texture_rects_for_range(start, stop):
+            begin = (rect_first_pixel - first_pixel) * epp
+            element_count = rect["width"] * rect["height"] * rect["depth"] * epp
+            if zero_copy:
+                self._set_data_rect_from_heap(
+                    array[begin : begin + element_count], rect
+                )
+            else:
+                self._set_data_rect(
+                    array[begin : begin + element_count], element_count, rect
+                )
+
+    def _set_data_rect_from_heap(self, array: np.ndarray, rect: dict):
+        # comm buffer must be registered to give JS the view of the heap.
+        self._get_comm_buf(0)
+        get_platform().setDataFromHeap(
+            self.buffer_id, get_dtype_js_ctor_type(array.dtype), array, rect
+        )
+        performance_metrics["webgl.buffer.write_count"] += 1
+        performance_metrics["webgl.buffer.write_zero_copy_count"] += 1
+        performance_metrics["webgl.buffer.write_size"] += array.nbytes
+        if array.size <= 1:
+            performance_metrics["webgl.buffer.write_scalar_count"] += 1
+
+    def is_pixel_aligned(self, start: int, stop: int) -> bool:
+        """
+        Whether elements [start, stop) can be written without changing other elements
+        sharing the same pixel.
+        """
+        epp = self.texture_shape.elements_per_pixel
+        return start % epp == 0 and (stop % epp == 0 or stop == self.size)
+
+    def _texture_rects_for_range(self, start: int, stop: int) -> List[Tuple[dict, int]]:
+        """
+        Splits pixels containing elements [start, stop) into rectangles writable by
+        texSubImage: part of a row, whole rows in a layer, or whole layers.
+        Returns list of the rectangle and the index of its first pixel.
+        """
+        ts = self.texture_shape
+        epp = ts.elements_per_pixel
+        pixel = start // epp
+        stop_pixel = (stop + epp - 1) // epp
+        rects = []
+        while pixel < stop_pixel:
+            remaining = stop_pixel - pixel
+            row = pixel // ts.width
+            x = pixel % ts.width
+            y = row % ts.height
+            layer = row // ts.height
+            if x != 0 or remaining < ts.width:
+                width, height, depth = min(ts.width - x, remaining), 1, 1
+            elif y == 0 and remaining >= ts.width * ts.height:
+                width, height, depth = (
+                    ts.width,
+                    ts.height,
+                    remaining // (ts.width * ts.height),
+                )
+            else:
+                width, height, depth = (
+                    ts.width,
+                    min(remaining // ts.width, ts.height - y),
+                    1,
+                )
+            rects.append(
+                (
+                    {
+                        "x": x,
+                        "y": y,
+                        "width": width,
+                        "height": height,
+                        "layer": layer,
+                        "depth": depth,
+                    },
+                    pixel,
+                )
             )
+            pixel += width * height * depth
+        return rects
+
+    def _set_data_rect(
+        self, array: np.ndarray, element_count: int, rect: Optional[dict]
+    ):
+        # array may be shorter than element_count (remaining elements are undefined)
+        if self.texture_shape.type == WebGL2RenderingContext.HALF_FLOAT:
+            buf = self._get_comm_buf(np.dtype(np.uint16).itemsize * element_count)
             packed = buf.view(np.float16)
-            packed[: array.size] = array_f16
-            size = self.texture_shape.element_count
+            packed[: array.size] = array.astype(np.float16)
             dtype = np.uint16
         else:
             dtype = {
@@ -132,51 +264,186 @@ class WebGLBuffer:
                 WebGL2RenderingContext.INT: np.int32,
                 WebGL2RenderingContext.UNSIGNED_BYTE: np.uint8,
             }[self.texture_shape.type]
-            buf = self._get_comm_buf(
-                np.dtype(dtype).itemsize * self.texture_shape.element_count
-            )
+            buf = self._get_comm_buf(np.dtype(dtype).itemsize * element_count)
             packed = buf.view(dtype)
-            packed[: array.size] = array.ravel()
-            size = self.texture_shape.element_count
-        get_platform().setData(self.buffer_id, get_dtype_js_ctor_type(dtype), size)
+            packed[: array.size] = array
+        get_platform().setData(
+            self.buffer_id, get_dtype_js_ctor_type(dtype), element_count, rect
+        )
         performance_metrics["webgl.buffer.write_count"] += 1
         # physical size
         performance_metrics["webgl.buffer.write_size"] += (
-            size * np.dtype(dtype).itemsize
+            element_count * np.dtype(dtype).itemsize
         )
         # logical size
         if array.size <= 1:
             performance_metrics["webgl.buffer.write_scalar_count"] += 1
 
-    def get_data(self) -> np.ndarray:
+    def get_data(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Reads elements [start, stop) of the buffer.
+        Only the pixels containing the range are transferred from GPU.
+        """
+        if stop is None:
+            stop = self.size
+        if stop <= start:
+            return np.zeros((0,), dtype=self.dtype)
+        rect, first_element = self._texture_rect_for_range(start, stop)
         # TODO Sorting out dtype, whether it is a WebGL internal representation or ndarray dtype.
         copied = self._copy_to_rgba_if_needed()
         if copied is not None:
             return copied._get_data_internal(
-                self.texture_shape.elements_per_pixel == 1, self.dtype
+                self.texture_shape.elements_per_pixel == 1,
+                self.dtype,
+                rect,
+                start - first_element,
+                stop - start,
             )
         else:
-            return self._get_data_internal(False, self.dtype)
+            return self._get_data_internal(
+                False, self.dtype, rect, start - first_element, stop - start
+            )
 
-    def _get_data_internal(self, extract_r_from_rgba: bool, original_dtype: np.dtype):
+    def get_data_async(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Same as get_data, but returns an awaitable which resolves to the data,
+        without blocking the worker.
+        """
+        if stop is None:
+            stop = self.size
+        if stop <= start:
+            return _resolved(np.zeros((0,), dtype=self.dtype))
+        rect, first_element = self._texture_rect_for_range(start, stop)
+        copied = self._copy_to_rgba_if_needed()
+        source = copied if copied is not None else self
+        element_count = (
+            rect["width"]
+            * rect["height"]
+            * rect["depth"]
+            * source.texture_shape.elements_per_pixel
+        )
         performance_metrics["webgl.buffer.read_count"] += 1
+        performance_metrics["webgl.buffer.read_size"] += (
+            element_count * source._read_dtype().itemsize
+        )
+        if stop - start <= 1:
+            performance_metrics["webgl.buffer.read_scalar_count"] += 1
+        received = get_platform().getDataAsync(source.buffer_id, rect)
+        return source._unpack_received(
+            received,
+            copied is not None and self.texture_shape.elements_per_pixel == 1,
+            self.dtype,
+            start - first_element,
+            stop - start,
+        )
+
+    def _read_dtype(self) -> np.dtype:
+        # dtype of the data read from the texture (float16 is read as its bit pattern)
         if self.texture_shape.type == WebGL2RenderingContext.HALF_FLOAT:
-            buf = self._get_comm_buf(
-                np.dtype(np.uint16).itemsize * self.texture_shape.element_count
-            )
+            return np.dtype(np.float16)
+        return np.dtype(
+            {
+                WebGL2RenderingContext.FLOAT: np.float32,
+                WebGL2RenderingContext.INT: np.int32,
+                WebGL2RenderingContext.UNSIGNED_BYTE: np.uint8,
+            }[self.texture_shape.type]
+        )
+
+    async def _unpack_received(
+        self,
+        received,
+        extract_r_from_rgba: bool,
+        original_dtype: np.dtype,
+        skip: int,
+        size: int,
+    ) -> np.ndarray:
+        data = await received
+        view = data.view(self._read_dtype())
+        if extract_r_from_rgba:
+            view = view[::4]
+        view = view[skip : skip + size]
+        if view.dtype == np.float16:
+            view = view.astype(np.float32)
+        return view.copy().astype(original_dtype, copy=False)
+
+    def _texture_rect_for_range(self, start: int, stop: int) -> Tuple[dict, int]:
+        """
+        Computes the smallest rectangle readable by readPixels which contains elements
+        [start, stop). Returns the rectangle and the element index of its first pixel.
+        A range within a row is read as part of the row, otherwise whole rows
+        (or whole layers if the range spans layers) are read.
+        """
+        ts = self.texture_shape
+        epp = ts.elements_per_pixel
+        first_pixel = start // epp
+        last_pixel = (stop - 1) // epp
+        first_row = first_pixel // ts.width
+        last_row = last_pixel // ts.width
+        first_layer = first_row // ts.height
+        last_layer = last_row // ts.height
+        if first_row == last_row:
+            rect = {
+                "x": first_pixel % ts.width,
+                "y": first_row % ts.height,
+                "width": last_pixel - first_pixel + 1,
+                "height": 1,
+                "layer": first_layer,
+                "depth": 1,
+            }
+        elif first_layer == last_layer:
+            rect = {
+                "x": 0,
+                "y": first_row % ts.height,
+                "width": ts.width,
+                "height": last_row - first_row + 1,
+                "layer": first_layer,
+                "depth": 1,
+            }
+            first_pixel = first_row * ts.width
+        else:
+            rect = {
+                "x": 0,
+                "y": 0,
+                "width": ts.width,
+                "height": ts.height,
+                "layer": first_layer,
+                "depth": last_layer - first_layer + 1,
+            }
+            first_pixel = first_layer * ts.height * ts.width
+        return rect, first_pixel * epp
+
+    def _get_data_internal(
+        self,
+        extract_r_from_rgba: bool,
+        original_dtype: np.dtype,
+        rect: dict,
+        skip: int,
+        size: int,
+    ):
+        performance_metrics["webgl.buffer.read_count"] += 1
+        element_count = (
+            rect["width"]
+            * rect["height"]
+            * rect["depth"]
+            * self.texture_shape.elements_per_pixel
+        )
+        if self.texture_shape.type == WebGL2RenderingContext.HALF_FLOAT:
+            buf = self._get_comm_buf(np.dtype(np.uint16).itemsize * element_count)
             get_platform().getData(
                 self.buffer_id,
                 get_dtype_js_ctor_type(np.uint16),
-                self.texture_shape.element_count,
+                element_count,
+                rect,
             )
             performance_metrics["webgl.buffer.read_size"] += (
-                self.texture_shape.element_count * np.dtype(np.uint16).itemsize
+                element_count * np.dtype(np.uint16).itemsize
             )
-            if self.size <= 1:
+            if size <= 1:
                 performance_metrics["webgl.buffer.read_scalar_count"] += 1
-            view = buf.view(np.float16)[: self.size]
+            view = buf.view(np.float16)[:element_count]
             if extract_r_from_rgba:
                 view = view[::4]
+            view = view[skip : skip + size]
 
             return view.astype(np.float32).astype(original_dtype, copy=False)
         else:
@@ -185,22 +452,22 @@ class WebGLBuffer:
                 WebGL2RenderingContext.INT: np.int32,
                 WebGL2RenderingContext.UNSIGNED_BYTE: np.uint8,
             }[self.texture_shape.type]
-            buf = self._get_comm_buf(
-                np.dtype(dtype).itemsize * self.texture_shape.element_count
-            )
+            buf = self._get_comm_buf(np.dtype(dtype).itemsize * element_count)
             get_platform().getData(
                 self.buffer_id,
                 get_dtype_js_ctor_type(dtype),
-                self.texture_shape.element_count,
+                element_count,
+                rect,
             )
             performance_metrics["webgl.buffer.read_size"] += (
-                self.texture_shape.element_count * np.dtype(np.uint16).itemsize
+                element_count * np.dtype(dtype).itemsize
             )
-            if self.size <= 1:
+            if size <= 1:
                 performance_metrics["webgl.buffer.read_scalar_count"] += 1
-            view = buf.view(dtype)[: self.size]
+            view = buf.view(dtype)[:element_count]
             if extract_r_from_rgba:
                 view = view[::4]
+            view = view[skip : skip + size]
 
             return view.copy().astype(original_dtype, copy=False)
 
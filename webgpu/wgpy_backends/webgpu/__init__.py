@@ -1,5 +1,8 @@
 from wgpy_backends.webgpu.webgpu_buffer import performance_metrics
+from wgpy_backends.webgpu.platform import (
+    performance_metrics as platform_performance_metrics,
+)
 
 
 def get_performance_metrics():
-    return performance_metrics.copy()
+    return {**performance_metrics, **platform_performance_metrics}
@@ -19,6 +19,7 @@ class ReductionExpr(NamedTuple):
     reduce_type: Optional[str] = None
     uniforms: str = ""
     preamble: str = ""
+    absorbing: Optional[str] = None
 
 
 def _get_or_create_kernel(expr: ReductionExpr) -> ReductionKernel:
@@ -163,3 +164,47 @@ def min(a: ndarray, axis=None, dtype=None, out=None, keepdims=False):
         )
 
     return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def any(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="bool y",
+        map_expr="bool(x)",
+        reduce_expr="a || b",
+        post_map_expr="y = a",
+        identity="false",
+        name="any",
+        absorbing="true",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def all(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="bool y",
+        map_expr="bool(x)",
+        reduce_expr="a && b",
+        post_map_expr="y = a",
+        identity="true",
+        name="all",
+        absorbing="false",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
+
+
+def count_nonzero(a: ndarray, axis=None, out=None, keepdims=False):
+    expr = ReductionExpr(
+        in_params="T x",
+        out_params="i32 y",
+        map_expr="i32(bool(x))",
+        reduce_expr="a + b",
+        post_map_expr="y = a",
+        identity="i32(0)",
+        name="count_nonzero",
+    )
+
+    return _get_or_create_kernel(expr)(a, out, axis=axis, keepdims=keepdims)
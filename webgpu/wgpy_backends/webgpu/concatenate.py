@@ -0,0 +1,60 @@
+from typing import List
+import numpy as np
+from wgpy import lazy_evaluation
+from wgpy_backends.webgpu.ndarray import ndarray
+from wgpy_backends.webgpu.platform import get_platform
+
+# Inputs whose slab in the output consists of more contiguous ranges than this
+# are written by a kernel instead of buffer copies.
+_MAX_COPY_RANGES = 16
+
+
+def _slab(out: ndarray, axis: int, start: int, stop: int) -> ndarray:
+    return out[(slice(None),) * axis + (slice(start, stop),)]
+
+
+def _copy_to_slab(a: ndarray, out: ndarray, axis: int, start: int) -> bool:
+    """
+    Copies a into its slab of out by buffer-to-buffer copies, without a kernel.
+    Returns False if a cannot be copied as is (casting or strided).
+    """
+    if a.dtype != out.dtype or not a.flags.c_contiguous or not out.flags.c_contiguous:
+        return False
+    n_ranges = int(np.prod(out.shape[:axis]))
+    if n_ranges > _MAX_COPY_RANGES:
+        return False
+    inner = int(np.prod(out.shape[axis + 1 :]))
+    range_size = a.shape[axis] * inner
+    out_row = out.shape[axis] * inner
+    a_begin = a.offset // a.itemsize
+    out_begin = out.offset // out.itemsize + start * inner
+    # offsets in the storage, whose element size may differ from the logical dtype
+    itemsize = out.buffer.texture_shape.itemsize
+    platform = get_platform()
+    for i in range(n_ranges):
+        platform.copyBuffer(
+            a.buffer.buffer_id,
+            (a_begin + i * range_size) * itemsize,
+            out.buffer.buffer_id,
+            (out_begin + i * out_row) * itemsize,
+            range_size * itemsize,
+        )
+    return True
+
+
+def concatenate_into(arrays: List[ndarray], axis: int, out: ndarray):
+    """
+    Writes the arrays into consecutive slabs of out along axis.
+    Contiguous inputs of the same dtype are copied by copyBufferToBuffer;
+    others are written by a strided copy kernel.
+    """
+    # inputs sharing the buffer of out are copied before any slab is written
+    arrays = [a.copy() if a.size > 0 and a.buffer is out.buffer else a for a in arrays]
+    # copies above may be pending in lazy evaluation; they are evaluated here
+    lazy_evaluation.before_write(out)
+    start = 0
+    for a in arrays:
+        stop = start + a.shape[axis]
+        if a.size > 0 and not _copy_to_slab(a, out, axis, start):
+            _slab(out, axis, start, stop)._assign(a)
+        start = stop
@@ -1,9 +1,9 @@
+import struct
 from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 from wgpy_backends.webgpu.webgpu_buffer import (
-    WebGPUMetaBuffer,
     WebGPUMetaBufferItem,
-    create_meta_buffer_from_structure,
+    get_meta_struct_for_items,
 )
 from wgpy.construct import asarray
 from wgpy_backends.webgpu.texture import WebGPUArrayTextureShape
@@ -11,8 +11,12 @@ from wgpy_backends.webgpu.ndarray import ndarray
 from wgpy_backends.webgpu.shader_util import header
 from wgpy_backends.webgpu.kernel_common import (
     GenericResolveResult,
+    ScalarArg,
+    is_host_scalar,
     make_input_uniform,
     make_output_uniform,
+    make_scalar_args,
+    make_scalar_input_uniform,
     InParam,
     OutParam,
     parse_in_params,
@@ -21,6 +25,7 @@ from wgpy_backends.webgpu.kernel_common import (
     resolve_generic_type,
 )
 from wgpy_backends.webgpu.platform import get_platform
+from wgpy import lazy_evaluation
 
 _WORKGROUP_SIZE_X = 64
 _N_WORKGROUPS_X = 64
@@ -37,6 +42,13 @@ def get_input_key(
     return (name, ndim, elementwise, dtype, texture_shape.logical_dtype)
 
 
+def get_scalar_input_key(name, dtype):
+    """
+    Obtain the key that is the branching factor for kernel generation
+    """
+    return (name, 0, "scalar", dtype)
+
+
 def make_output_key(name, ndim, dtype, texture_shape: WebGPUArrayTextureShape):
     """
     Obtain the key that is the branching factor for kernel generation
@@ -110,6 +122,15 @@ var<storage,read> _{name}_storage: array<{texture_shape.storage_dtype}>;
     return meta_defs, func_def, loop_head, variable_binding_source
 
 
+def make_scalar_input_def(param: InParam, scalar: ScalarArg):
+    # scalar value is given as meta buffer item, no storage binding is needed
+    name = param.name
+    meta_defs = [WebGPUMetaBufferItem(f"_{name}_scalar", scalar.meta_type)]
+    native_type = param.native_type_or_generic
+    loop_head = f"var {name}: {native_type} = {native_type}(cmeta._{name}_scalar);\n"
+    return meta_defs, loop_head
+
+
 def make_output_def(
     param: OutParam,
     ndim,
@@ -120,8 +141,10 @@ def make_output_def(
     name = param.name
     meta_defs = []  # type: List[WebGPUMetaBufferItem]
 
+    meta_defs.append(WebGPUMetaBufferItem(f"_{name}_offset", "i32"))
     for d in range(ndim):
         meta_defs.append(WebGPUMetaBufferItem(f"_{name}_shape_{d}", "i32"))
+        meta_defs.append(WebGPUMetaBufferItem(f"_{name}_stride_{d}", "i32"))
     meta_defs.append(WebGPUMetaBufferItem(f"_ind_size", "i32"))  # cupy's _ind.size()
 
     main_head = ""
@@ -141,8 +164,11 @@ _{name}_t1 = _{name}_t2;
         loop_head += f"""if (_{name}_0 >= cmeta._{name}_shape_{0}) {{ break; }}\n"""
     else:
         loop_head += """if (i > 0) {{ break; }}"""
+    storage_index = f"cmeta._{name}_offset" + "".join(
+        f" + cmeta._{name}_stride_{d} * _{name}_{d}" for d in range(ndim)
+    )
     loop_tail += f"""
-        _{name}_storage[i] = {texture_shape.storage_dtype}({name});
+        _{name}_storage[{storage_index}] = {texture_shape.storage_dtype}({name});
         """
     variable_binding_source = f"""
 @group(0) @binding({binding_index})
@@ -161,6 +187,7 @@ var<storage,read_write> _{name}_storage: array<{texture_shape.storage_dtype}>;
 class ElementwiseKernel:
     _next_idx = 1
     _meta_defs_for_kernel_key: Dict[str, List[WebGPUMetaBufferItem]]
+    _meta_struct_for_kernel_key: Dict[str, struct.Struct]
 
     def __init__(
         self,
@@ -199,6 +226,7 @@ class ElementwiseKernel:
         ElementwiseKernel._next_idx += 1
         self.kernel_keys = {}
         self._meta_defs_for_kernel_key = {}
+        self._meta_struct_for_kernel_key = {}
 
     def _generate_kernel_source(
         self,
@@ -214,9 +242,9 @@ class ElementwiseKernel:
         meta_def_all = []  # type: List[WebGPUMetaBufferItem]
         variable_binding_source = """
 @group(0) @binding(0)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 """
-        binding_types = ["read-only-storage"]  # type: List[str]
+        binding_types = ["uniform"]  # type: List[str]
         next_binding_index = 1
         meta_defs, loop_head, loop_tail, main_head, main_tail, binding_source_part = (
             make_output_def(
@@ -236,6 +264,11 @@ var<storage,read> cmeta: CMeta;
         main_tail_all += main_tail
         variable_binding_source += binding_source_part
         for k, ary in zip(self.parsed_in_params, in_array_impls):
+            if isinstance(ary, ScalarArg):
+                meta_defs, loop_head = make_scalar_input_def(k, ary)
+                meta_def_all.extend(meta_defs)
+                loop_head_all += loop_head
+                continue
             meta_defs, func_def, loop_head, binding_source_part = make_input_def(
                 k,
                 self.parsed_out_param.name,
@@ -285,10 +318,21 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
 
         assert len(arrays) == self.nin or len(arrays) == self.nin + self.nout
 
-        in_arrays = [asarray(array) for array in arrays[: self.nin]]
+        in_arrays = []
+        for pip, array in zip(self.parsed_in_params, arrays[: self.nin]):
+            if not (pip.raw or pip.rawnd) and is_host_scalar(array):
+                # passed via meta buffer, without uploading
+                in_arrays.append(array)
+            else:
+                in_arrays.append(asarray(array))
+        in_arrays = make_scalar_args(in_arrays, self.parsed_in_params)
         out_array = None
         if len(arrays) == self.nin + self.nout:
             out_array = arrays[self.nin]  # maybe None
+        if out_array is not None:
+            # pending lazy results which read the output are evaluated before it is
+            # written
+            lazy_evaluation.before_write(out_array)
 
         # broadcasting
         target_shapes = []
@@ -306,7 +350,7 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
         in_array_impls = []  # type: List[ndarray]
         for i, array in enumerate(in_arrays):
             pip = self.parsed_in_params[i]
-            if pip.raw or pip.rawnd:
+            if pip.raw or pip.rawnd or isinstance(array, ScalarArg):
                 in_array_impls.append(array)
             else:
                 in_array_impls.append(array.broadcast_to(result_shape))
@@ -323,21 +367,30 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
         else:
             assert out_array.shape == result_shape
             assert out_array.dtype == generic_resolve_result.out_dtype
-            if not out_array.flags.c_contiguous_full:
-                raise NotImplementedError
+            from wgpy_backends.webgpu.strided_write import elements_overlap
+
+            if elements_overlap(out_array):
+                # threads would write the same element in undefined order
+                raise NotImplementedError(
+                    "Output view whose elements overlap is not supported."
+                )
         out_array_impl = out_array
 
         # even if same instance, different source code is generated for dtype, ndim etc.
         # assigning unique key among same application.
         kernel_key = (
             tuple(
-                get_input_key(
-                    k.name,
-                    self.parsed_out_param.name,
-                    ary.ndim,
-                    True,
-                    ary.dtype,
-                    ary.buffer.texture_shape,
+                (
+                    get_scalar_input_key(k.name, ary.dtype)
+                    if isinstance(ary, ScalarArg)
+                    else get_input_key(
+                        k.name,
+                        self.parsed_out_param.name,
+                        ary.ndim,
+                        True,
+                        ary.dtype,
+                        ary.buffer.texture_shape,
+                    )
                 )
                 for k, ary in zip(self.parsed_in_params, in_array_impls)
             ),
@@ -362,9 +415,15 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
             )
             added_kernels.add(kernel_name)
             self._meta_defs_for_kernel_key[kernel_name] = meta_defs
+            self._meta_struct_for_kernel_key[kernel_name] = get_meta_struct_for_items(
+                meta_defs
+            )
         all_uniforms = []
         for k, array in zip(self.parsed_in_params, in_array_impls):
-            all_uniforms.extend(make_input_uniform(k, array))
+            if isinstance(array, ScalarArg):
+                all_uniforms.extend(make_scalar_input_uniform(k, array))
+            else:
+                all_uniforms.extend(make_input_uniform(k, array))
         all_uniforms.extend(
             make_output_uniform(self.parsed_out_param, out_array_impl, False)
         )
@@ -381,16 +440,16 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
         else:
             assert len(self.meta_items) == 0
 
-        meta_buffer = self._make_meta_buffer(
-            self._meta_defs_for_kernel_key[kernel_name], all_uniforms
-        )
+        meta = self._pack_meta(kernel_name, all_uniforms)
 
-        tensors = [meta_buffer.buffer_id, out_array_impl.buffer.buffer_id]
+        tensors = [out_array_impl.buffer.buffer_id]
         for array in in_array_impls:
-            tensors.append(array.buffer.buffer_id)
+            if not isinstance(array, ScalarArg):
+                tensors.append(array.buffer.buffer_id)
         get_platform().runKernel(
             {
                 "name": kernel_name,
+                "meta": meta,
                 "tensors": tensors,
                 "workGroups": {"x": 64, "y": 1, "z": 1},
             }
@@ -401,17 +460,13 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
             return (out_array,)
         return out_array
 
-    def _make_meta_buffer(
-        self, meta_defs: List[WebGPUMetaBufferItem], uniforms: List[dict]
-    ) -> WebGPUMetaBuffer:
+    def _pack_meta(self, kernel_name: str, uniforms: List[dict]) -> bytes:
         # uniform: {'type': 'i32', 'name': f'_ind_size', 'value': 123}
         values = []
-        numpy_dtypes = []
         uniform_dict = {uniform["name"]: uniform for uniform in uniforms}
-        for meta_def in meta_defs:
+        for meta_def in self._meta_defs_for_kernel_key[kernel_name]:
             if meta_def.name in uniform_dict:
                 values.append(uniform_dict[meta_def.name]["value"])
-                numpy_dtypes.append(meta_def.numpy_dtype_str)
             else:
                 raise KeyError(f"uniform {meta_def.name} is not found")
-        return create_meta_buffer_from_structure(tuple(values), ",".join(numpy_dtypes))
+        return self._meta_struct_for_kernel_key[kernel_name].pack(*values)
@@ -0,0 +1,31 @@
+# WGSL syntax used by wgpy.fusion to generate the operation of fused ElementwiseKernel
+
+from typing import Optional
+import numpy as np
+from wgpy_backends.webgpu.elementwise_kernel import ElementwiseKernel
+from wgpy_backends.webgpu.kernel_common import default_scalar_dtype
+from wgpy_backends.webgpu.shader_util import native_scalar_type_for_dtype
+
+
+def declare_variable(name: str, dtype: np.dtype, init: Optional[str] = None) -> str:
+    native_type = native_scalar_type_for_dtype[dtype]
+    if init is None:
+        return f"var {name}: {native_type};\n"
+    return f"var {name}: {native_type} = {init};\n"
+
+
+def cast(expr: str, dtype: np.dtype) -> str:
+    return f"{native_scalar_type_for_dtype[dtype]}({expr})"
+
+
+def select(cond: str, true_expr: str, false_expr: str) -> str:
+    return f"select({false_expr}, {true_expr}, {cond})"
+
+
+__all__ = [
+    "ElementwiseKernel",
+    "default_scalar_dtype",
+    "declare_variable",
+    "cast",
+    "select",
+]
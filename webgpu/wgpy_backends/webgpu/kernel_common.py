@@ -1,7 +1,7 @@
 # shared routines for elementwise_kernel and reduction_kernel
 
 import re
-from typing import List, NamedTuple, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple, Union
 import numpy as np
 from wgpy_backends.webgpu.webgpu_buffer import WebGPUMetaBufferItem
 from wgpy_backends.webgpu.ndarray import ndarray
@@ -68,6 +68,99 @@ def parse_uniforms(uniforms: str) -> List[WebGPUMetaBufferItem]:
     return params
 
 
+class ScalarArg:
+    """
+    Host scalar given to a non-raw input parameter.
+    The value is passed in the meta buffer instead of uploading a 1-element buffer.
+    """
+
+    ndim = 0
+    shape = ()
+
+    def __init__(self, value, dtype: np.dtype) -> None:
+        self.value = value
+        self.dtype = dtype
+
+    @property
+    def native_type(self) -> str:
+        return native_scalar_type_for_dtype[self.dtype]
+
+    @property
+    def meta_type(self) -> str:
+        # bool cannot be placed in the meta buffer
+        return "u32" if self.native_type == "bool" else self.native_type
+
+
+def is_host_scalar(x) -> bool:
+    """
+    Python / NumPy scalar or 0-d numpy.ndarray
+    """
+    if isinstance(x, np.ndarray):
+        if x.ndim != 0:
+            return False
+        x = x[()]
+    if isinstance(x, (complex, np.complexfloating)):
+        raise TypeError("complex scalar is not supported")
+    return isinstance(x, (bool, int, float, np.bool_, np.number))
+
+
+def check_scalar_bounds(x, dtype: np.dtype) -> None:
+    """
+    Raises OverflowError if integer scalar x is out of the range of integer dtype,
+    as NumPy does for Python int, instead of wrapping around.
+    """
+    value = np.asarray(x).item()
+    if isinstance(value, bool) or not isinstance(value, int):
+        return
+    if dtype.kind not in "iu":
+        return
+    info = np.iinfo(dtype)
+    if not info.min <= value <= info.max:
+        raise OverflowError(f"Python integer {value} out of bounds for {dtype}")
+
+
+def default_scalar_dtype(x) -> np.dtype:
+    """
+    dtype used when the type of a scalar is not determined by the kernel parameter
+    """
+    dtype = np.asarray(x).dtype
+    if dtype.kind == "b":
+        return np.dtype(np.bool_)
+    if dtype.kind == "f":
+        return np.dtype(np.float32)
+    if dtype == np.dtype(np.uint8):
+        return dtype
+    return np.dtype(np.int32)
+
+
+def make_scalar_args(
+    in_arrays: List[Union[ndarray, object]], parsed_in_params: List[InParam]
+) -> List[Union[ndarray, ScalarArg]]:
+    """
+    Replaces host scalars in in_arrays with ScalarArg.
+    Generic type of scalar follows the array which has the same generic type.
+    """
+    generic_dtypes = {}
+    for k, array in zip(parsed_in_params, in_arrays):
+        if k.generic and isinstance(array, ndarray):
+            generic_dtypes.setdefault(k.native_type_or_generic, array.dtype)
+    results = []
+    for k, array in zip(parsed_in_params, in_arrays):
+        if isinstance(array, ndarray):
+            results.append(array)
+            continue
+        if k.generic:
+            dtype = generic_dtypes.setdefault(
+                k.native_type_or_generic, default_scalar_dtype(array)
+            )
+        else:
+            dtype = native_scalar_type_to_default_dtype[k.native_type_or_generic]
+        check_scalar_bounds(array, dtype)
+        value = np.asarray(array).item()
+        results.append(ScalarArg(dtype.type(value).item(), dtype))
+    return results
+
+
 class GenericResolveResult(NamedTuple):
     define_statements: str
     out_dtype: np.dtype
@@ -84,7 +177,10 @@ def resolve_generic_type(
     # Assign if output type is undefined
     generic_assignments = {}
     for k, array_impl in zip(parsed_in_params, in_array_impls):
-        array_native_type = array_impl.buffer.texture_shape.logical_dtype
+        if isinstance(array_impl, ScalarArg):
+            array_native_type = array_impl.native_type
+        else:
+            array_native_type = array_impl.buffer.texture_shape.logical_dtype
         array_dtype = array_impl.dtype
         if k.generic:
             already_assigned_type = generic_assignments.get(k.native_type_or_generic)
@@ -170,6 +266,15 @@ def make_input_uniform(param: InParam, webgl_array: ndarray):
     return uniforms
 
 
+def make_scalar_input_uniform(param: InParam, scalar: ScalarArg):
+    value = scalar.value
+    if scalar.meta_type == "f32":
+        value = float(value)
+    else:
+        value = int(value)
+    return [{"type": scalar.meta_type, "name": f"_{param.name}_scalar", "value": value}]
+
+
 def make_input_reduction_uniform(input_shape: Tuple[int, ...]):
     uniforms = []
     uniforms.append(
@@ -179,17 +284,29 @@ def make_input_reduction_uniform(input_shape: Tuple[int, ...]):
 
 
 def make_output_uniform(param: OutParam, webgl_array: ndarray, reduction: bool):
-    if not webgl_array.flags.c_contiguous_full:
-        raise NotImplementedError(
-            "In-place update of array view is not yet implemented."
-        )
+    # output may be a view; elements are written at offset and strides like inputs are
+    # read
     name = param.name
     uniforms = []
 
+    uniforms.append(
+        {
+            "type": "i32",
+            "name": f"_{name}_offset",
+            "value": webgl_array.offset // webgl_array.itemsize,
+        }
+    )
     for d in range(webgl_array.ndim):
         uniforms.append(
             {"type": "i32", "name": f"_{name}_shape_{d}", "value": webgl_array.shape[d]}
         )
+        uniforms.append(
+            {
+                "type": "i32",
+                "name": f"_{name}_stride_{d}",
+                "value": webgl_array.strides[d] // webgl_array.itemsize,
+            }
+        )
     if reduction:
         # cupy's _out_ind.size()
         uniforms.append(
@@ -1,6 +1,6 @@
 import math
 from typing import List, Optional, Tuple, Union
-from wgpy_backends.webgpu.webgpu_buffer import create_meta_buffer_from_structure
+from wgpy_backends.webgpu.webgpu_buffer import pack_meta
 from wgpy_backends.webgpu.platform import get_platform
 from wgpy_backends.webgpu.ndarray import ndarray
 
@@ -42,7 +42,7 @@ alpha: f32,
 }
 
 @group(0) @binding(3)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 
 @compute @workgroup_size(8,8,1)
 fn main(
@@ -73,12 +73,12 @@ array_c[x + y * N] = sum * cmeta.alpha;
                     "read-only-storage",
                     "read-only-storage",
                     "storage",
-                    "read-only-storage",
+                    "uniform",
                 ],
             },
         )
         added_kernels.add(kernel_name)
-    meta = create_meta_buffer_from_structure(
+    meta = pack_meta(
         (
             m,
             n,
@@ -101,11 +101,11 @@ array_c[x + y * N] = sum * cmeta.alpha;
     get_platform().runKernel(
         {
             "name": kernel_name,
+            "meta": meta,
             "tensors": [
                 lhs.buffer.buffer_id,
                 rhs.buffer.buffer_id,
                 out.buffer.buffer_id,
-                meta.buffer_id,
             ],
             "workGroups": {
                 "x": int(math.ceil(n / 8)),
@@ -159,7 +159,7 @@ K: u32,
 }
 
 @group(0) @binding(3)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 
 @compute @workgroup_size(8,8,1)
 fn main(
@@ -248,12 +248,12 @@ array_c[x * 2u + 1u + (y * 4u + 3u) * ND4] = sum13;
                     "read-only-storage",
                     "read-only-storage",
                     "storage",
-                    "read-only-storage",
+                    "uniform",
                 ],
             },
         )
         added_kernels.add(kernel_name)
-    meta = create_meta_buffer_from_structure((m, n, k), "u4,u4,u4")
+    meta = pack_meta((m, n, k), "u4,u4,u4")
     if out is None:
         out = ndarray((m, n), lhs.dtype)
     else:
@@ -262,11 +262,11 @@ array_c[x * 2u + 1u + (y * 4u + 3u) * ND4] = sum13;
     get_platform().runKernel(
         {
             "name": kernel_name,
+            "meta": meta,
             "tensors": [
                 lhs.buffer.buffer_id,
                 rhs.buffer.buffer_id,
                 out.buffer.buffer_id,
-                meta.buffer_id,
             ],
             "workGroups": {"x": int(n // 64), "y": int(m // 32), "z": 1},
         }
@@ -345,7 +345,7 @@ cst2: u32,
 }
 
 @group(0) @binding(3)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 
 """
                 f"@compute @workgroup_size(1,{8 if hw_is_mul_32 else 1},{8 if oc_is_mul_32 else 1})"
@@ -380,14 +380,14 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
                     "read-only-storage",
                     "read-only-storage",
                     "storage",
-                    "read-only-storage",
+                    "uniform",
                 ],
             },
         )
         added_kernels.add(kernel_name)
 
     out = ndarray((n, h, w, oc), a.dtype)
-    meta = create_meta_buffer_from_structure(
+    meta = pack_meta(
         (
             ckhkw,
             ckhkw * hw,
@@ -405,11 +405,11 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
     get_platform().runKernel(
         {
             "name": kernel_name,
+            "meta": meta,
             "tensors": [
                 a.buffer.buffer_id,
                 b.buffer.buffer_id,
                 out.buffer.buffer_id,
-                meta.buffer_id,
             ],
             "workGroups": {
                 "x": int(n),
@@ -482,7 +482,7 @@ cst2: u32,
 }
 
 @group(0) @binding(3)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 
 """
                 f"@compute @workgroup_size({8 if ckhkw_is_mul_32 else 1},1,{8 if hw_is_mul_32 else 1})"
@@ -517,14 +517,14 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
                     "read-only-storage",
                     "read-only-storage",
                     "storage",
-                    "read-only-storage",
+                    "uniform",
                 ],
             },
         )
         added_kernels.add(kernel_name)
 
     out = ndarray((c, kh, kw, n, h, w), a.dtype)
-    meta = create_meta_buffer_from_structure(
+    meta = pack_meta(
         (
             oc,
             ckhkw,
@@ -542,11 +542,11 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
     get_platform().runKernel(
         {
             "name": kernel_name,
+            "meta": meta,
             "tensors": [
                 a.buffer.buffer_id,
                 b.buffer.buffer_id,
                 out.buffer.buffer_id,
-                meta.buffer_id,
             ],
             "workGroups": {
                 "x": int(ckhkw // 32 if ckhkw_is_mul_32 else ckhkw // 4),
@@ -620,7 +620,7 @@ cst1: u32,
 }
 
 @group(0) @binding(3)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 
 """
                 f"@compute @workgroup_size({8 if oc_is_mul_32 else 1},{8 if ckhkw_is_mul_32 else 1},1)"
@@ -657,14 +657,14 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
                     "read-only-storage",
                     "read-only-storage",
                     "storage",
-                    "read-only-storage",
+                    "uniform",
                 ],
             },
         )
         added_kernels.add(kernel_name)
 
     out = ndarray((oc, c, kh, kw), a.dtype)
-    meta = create_meta_buffer_from_structure(
+    meta = pack_meta(
         (
             n,
             hw,
@@ -683,11 +683,11 @@ for (var r: u32 = 0; r < 4; r = r + 1u) {
     get_platform().runKernel(
         {
             "name": kernel_name,
+            "meta": meta,
             "tensors": [
                 a.buffer.buffer_id,
                 b.buffer.buffer_id,
                 out.buffer.buffer_id,
-                meta.buffer_id,
             ],
             "workGroups": {
                 "x": int(oc // 32 if oc_is_mul_32 else oc // 4),
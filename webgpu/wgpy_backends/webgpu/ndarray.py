@@ -53,6 +53,7 @@ class ndarray(NDArrayBase):
         base: Optional["ndarray"] = None,
         buffer: Optional[WebGPUBuffer] = None,
         owndata: Optional[bool] = None,
+        lazy=None,
     ) -> None:
         super().__init__()
         assert isinstance(shape, tuple)
@@ -77,9 +78,16 @@ class ndarray(NDArrayBase):
         if owndata is None:
             # when owndata flag is not given, assume self owns the buffer if buffer is newly created
             owndata = buffer is None
-        if buffer is None:
-            buffer = WebGPUBuffer(self.size, self.dtype)
-        self.buffer = buffer
+        if lazy is not None:
+            # pending result of lazy evaluation mode. the buffer is allocated when it is
+            # evaluated.
+            self._lazy = lazy
+            buffer_size = self.size
+        else:
+            if buffer is None:
+                buffer = WebGPUBuffer(self.size, self.dtype)
+            self.buffer = buffer
+            buffer_size = buffer.size
         # TODO avoid circular referencing
         from wgpy_backends.webgpu.webgpu_array_func import WebGPUArrayFunc
 
@@ -90,7 +98,7 @@ class ndarray(NDArrayBase):
             c_contiguous=c_contiguous,
             c_contiguous_full=c_contiguous
             and self.offset == 0
-            and self.size == self.buffer.size,
+            and self.size == buffer_size,
             f_contiguous=self._check_f_contiguous(),
         )
 
@@ -99,6 +107,17 @@ class ndarray(NDArrayBase):
     def astype(self, dtype, *args, copy=True, **kwargs):
         if copy is False and dtype == self.dtype:
             return self
+        from wgpy import lazy_evaluation
+
+        if lazy_evaluation.is_enabled():
+            return lazy_evaluation.defer_astype(self, np.dtype(dtype))
+        from wgpy.construct import empty
+
+        out = empty(self.shape, dtype=dtype)
+        return ndarray._get_astype_kernel()(self, out)
+
+    @staticmethod
+    def _get_astype_kernel():
         if ndarray._astype_kernel is None:
             from wgpy_backends.webgpu.elementwise_kernel import ElementwiseKernel
 
@@ -108,10 +127,33 @@ class ndarray(NDArrayBase):
                 operation="out0 = V(in0)",
                 name="astype",
             )
-        from wgpy.construct import empty
+        return ndarray._astype_kernel
 
-        out = empty(self.shape, dtype=dtype)
-        return ndarray._astype_kernel(self, out)
+    def _assign(self, value):
+        """
+        Copies GPU array or host scalar into this array (view) on GPU, with broadcasting
+        and casting.
+        """
+        if isinstance(value, ndarray):
+            if np.broadcast_shapes(value.shape, self.shape) != self.shape:
+                raise ValueError(
+                    f"could not broadcast input array from shape {value.shape}"
+                    f" into shape {self.shape}"
+                )
+        from wgpy import lazy_evaluation
+
+        lazy_evaluation.before_write(self)
+        if self.size == 0:
+            return
+        if isinstance(value, ndarray):
+            if value.buffer is self.buffer:
+                # the same buffer cannot be bound as both input and output
+                value = value.copy()
+        else:
+            # cast on host, so that the value is not truncated by the default scalar
+            # type
+            value = self.dtype.type(value)
+        ndarray._get_astype_kernel()(value, self)
 
     def copy(self):
         return +self  # __pos__
@@ -138,26 +180,62 @@ class ndarray(NDArrayBase):
         self.set_data(value)
 
     def set_data(self, data: np.ndarray):
-        if self._is_full_view():
+        from wgpy import lazy_evaluation
+
+        lazy_evaluation.before_write(self)
+        if self.flags.c_contiguous_full:
+            self.buffer.set_data(self._pack_for_write(data))
+        elif self._is_full_view():
             back = np.empty((self.size,), dtype=self.dtype)
             view = np.lib.stride_tricks.as_strided(back, self.shape, self.strides)
             view[...] = data
             self.buffer.set_data(back)
         else:
-            # partial overwrite
-            back = self.buffer.get_data().astype(self.dtype)
-            view = np.lib.stride_tricks.as_strided(
-                back[self.offset // data.dtype.itemsize :], self.shape, self.strides
-            )
-            view[...] = data
-            self.buffer.set_data(back)
+            # partial overwrite without reading back the buffer
+            packed = self._pack_for_write(data)
+            if self.flags.c_contiguous:
+                # contiguous range of the buffer
+                self.buffer.set_data(packed, self.offset // self.itemsize)
+            else:
+                # upload packed values and scatter them into the view
+                from wgpy_backends.webgpu.strided_write import write_strided
+
+                src = ndarray(self.shape, self.dtype)
+                src.set_data(packed)
+                if not write_strided(self, src):
+                    # elements of the view overlap
+                    back = self.buffer.get_data().astype(self.dtype)
+                    view = np.lib.stride_tricks.as_strided(
+                        back[self.offset // self.itemsize :], self.shape, self.strides
+                    )
+                    view[...] = data
+                    self.buffer.set_data(back)
 
     def get_data(self) -> np.ndarray:
-        # TODO Efficiency Improvement. Improve the mechanism to load the entire texture into the CPU, even if it is only one element view.
-        data = self.buffer.get_data().astype(self.dtype, copy=False)
-        # If strides is negative, element before data[self.offset//data.dtype.itemsize:][0] may be referred.
+        # Only the range of the buffer referred by this view is read.
+        start, stop = self._element_extent()
+        data = self.buffer.get_data(start, stop).astype(self.dtype, copy=False)
+        # If strides is negative, element before
+        # data[self.offset//data.dtype.itemsize - start:][0] may be referred.
         view = np.lib.stride_tricks.as_strided(
-            data[self.offset // data.dtype.itemsize :], self.shape, self.strides
+            data[self.offset // data.dtype.itemsize - start :],
+            self.shape,
+            self.strides,
+        )
+        return view.copy()
+
+    def get_data_async(self):
+        start, stop = self._element_extent()
+        # request is sent here; later operations do not affect the result
+        received = self.buffer.get_data_async(start, stop)
+        return self._view_received(received, start)
+
+    async def _view_received(self, received, start: int) -> np.ndarray:
+        data = (await received).astype(self.dtype, copy=False)
+        view = np.lib.stride_tricks.as_strided(
+            data[self.offset // data.dtype.itemsize - start :],
+            self.shape,
+            self.strides,
         )
         return view.copy()
 
@@ -169,28 +247,25 @@ class ndarray(NDArrayBase):
             )
             return self.get_view(shape, self.dtype, strides, offset)
         else:
-            # advanced indexing
-            normalized_advanced_idxs = _normalize_idxs_advanced(idxs)
-            cpu_array = self.get()[normalized_advanced_idxs]
-            gpu_array = ndarray(cpu_array.shape, cpu_array.dtype)
-            gpu_array.set(cpu_array)
-            return gpu_array
+            # advanced indexing, gathered on GPU
+            from wgpy.indexing import getitem_advanced
+
+            return getitem_advanced(self, idxs)
 
     def __setitem__(self, idxs, value) -> None:
         normalized_basic_idxs = _normalize_idxs_basic(idxs)
         if normalized_basic_idxs is not NonUnit:
             view = self[idxs]
-            if isinstance(value, ndarray):
-                value = value.get()
-            view.set(value)
+            if isinstance(value, (ndarray, bool, int, float, np.bool_, np.number)):
+                # device-to-device copy, or fill with scalar
+                view._assign(value)
+            else:
+                view.set(value)
         else:
             # advanced indexing
-            normalized_advanced_idxs = _normalize_idxs_advanced(idxs)
-            cpu_array = self.get()
-            if isinstance(value, ndarray):
-                value = value.get()
-            cpu_array[normalized_advanced_idxs] = value
-            self.set(cpu_array)
+            from wgpy.indexing import setitem_advanced
+
+            setitem_advanced(self, idxs, value)
 
 
 class NonUnit_:
@@ -238,29 +313,3 @@ def _normalize_idxs_basic(idxs):
             return tuple(us)
 
     return NonUnit
-
-
-def _normalize_idxs_advanced(idxs):
-    if idxs is None or idxs is Ellipsis or isinstance(idxs, int):
-        return idxs
-    if isinstance(idxs, slice):
-        return slice(
-            _normalize_unit_basic(idxs.start),
-            _normalize_unit_basic(idxs.stop),
-            _normalize_unit_basic(idxs.step),
-        )
-    if isinstance(idxs, np.ndarray):
-        if idxs.ndim == 0:
-            return int(idxs)
-        else:
-            return idxs
-    if isinstance(idxs, ndarray):
-        if idxs.ndim == 0:
-            return int(idxs)
-        else:
-            return idxs.get()
-    if isinstance(idxs, tuple):
-        return tuple(_normalize_idxs_advanced(i) for i in idxs)
-    if isinstance(idxs, list):
-        return [_normalize_idxs_advanced(i) for i in idxs]
-    return idxs
@@ -1,46 +1,227 @@
 # platform call interface
 import numpy as np
 from js import gpu  # Pyodide-dependent
+from wgpy.common.kernel_registry import KernelRegistry
+
+performance_metrics = {
+    "webgpu.queue.flush_count": 0,
+    "webgpu.queue.dispatch_count": 0,
+    "webgpu.queue.dispatch_per_flush_last": 0,
+    "webgpu.queue.dispatch_per_flush_max": 0,
+}
+
+# Number of queued commands that triggers a flush without an explicit synchronization
+# point.
+_DEFAULT_FLUSH_THRESHOLD = 256
+
+# Uniform values of each dispatch are placed at a multiple of
+# minUniformBufferOffsetAlignment (256 at most on every device) in the uniform buffer.
+_UNIFORM_OFFSET_ALIGNMENT = 256
 
 
 class WebGPUPlatform:
     def __init__(self) -> None:
         self._latest_comm_buf = None
+        # Commands which do not need an immediate response (runKernel, copyBuffer,
+        # disposeBuffer) are recorded here and sent to JS in one call.
+        # They are encoded into one command encoder and submitted at once.
+        self._command_queue = []
+        self._queued_dispatch_count = 0
+        self.flush_threshold = _DEFAULT_FLUSH_THRESHOLD
+        # Uniform values of queued dispatches are packed here, uploaded to one uniform
+        # buffer on flush and bound with dynamic offsets. The space is reused from the
+        # beginning after each flush.
+        self._uniform_ring = np.zeros(
+            (_UNIFORM_OFFSET_ALIGNMENT * _DEFAULT_FLUSH_THRESHOLD,), dtype=np.uint8
+        )
+        self._uniform_ring_used = 0
+        self._kernels = KernelRegistry(performance_metrics, "webgpu.kernel")
+        # kernel name -> indices of tensors bound as writable storage
+        self._written_tensors = {}
+        # versions of writes increase monotonically across buffers
+        self._write_version = 0
+        self._buffer_write_versions = {}  # buffer_id -> version of the last write
+
+    def _enqueue(self, command: dict):
+        self._command_queue.append(command)
+        if len(self._command_queue) >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """
+        Sends queued commands to the GPU.
+        Must be called before any operation whose result depends on the queued commands.
+        """
+        if len(self._command_queue) == 0:
+            return
+        commands = self._command_queue
+        dispatch_count = self._queued_dispatch_count
+        uniform_byte_length = self._uniform_ring_used
+        self._command_queue = []
+        self._queued_dispatch_count = 0
+        self._uniform_ring_used = 0
+        if uniform_byte_length > 0 and self._latest_comm_buf is None:
+            # view of comm buffer is used to read the uniform values from WASM heap
+            self.setCommBuf(self._uniform_ring)
+        address = self._uniform_ring.__array_interface__["data"][0]
+        if not gpu.runCommands(commands, address, uniform_byte_length):
+            # WASM heap may be grown
+            self.setCommBuf(self._latest_comm_buf)
+            if not gpu.runCommands(commands, address, uniform_byte_length):
+                raise ValueError("runCommands failed twice")
+        performance_metrics["webgpu.queue.flush_count"] += 1
+        performance_metrics["webgpu.queue.dispatch_count"] += dispatch_count
+        performance_metrics["webgpu.queue.dispatch_per_flush_last"] = dispatch_count
+        performance_metrics["webgpu.queue.dispatch_per_flush_max"] = max(
+            performance_metrics["webgpu.queue.dispatch_per_flush_max"], dispatch_count
+        )
+
+    def _write_uniform(self, data: bytes) -> dict:
+        # returns the range of the uniform buffer to bind
+        offset = self._uniform_ring_used
+        end = offset + len(data)
+        if end > self._uniform_ring.size:
+            # more uniform values than expected are queued (large meta, or
+            # flush_threshold is raised)
+            ring = np.zeros((max(end, self._uniform_ring.size * 2),), dtype=np.uint8)
+            ring[:offset] = self._uniform_ring[:offset]
+            self._uniform_ring = ring
+        self._uniform_ring[offset:end] = np.frombuffer(data, dtype=np.uint8)
+        self._uniform_ring_used = (
+            (end + _UNIFORM_OFFSET_ALIGNMENT - 1)
+            // _UNIFORM_OFFSET_ALIGNMENT
+            * _UNIFORM_OFFSET_ALIGNMENT
+        )
+        # binding size is rounded up to 16 bytes, which is within the aligned space
+        return {"offset": offset, "size": (len(data) + 15) // 16 * 16}
+
+    def _mark_written(self, buffer_id: int):
+        self._write_version += 1
+        self._buffer_write_versions[buffer_id] = self._write_version
+
+    def getWriteVersion(self, buffer_id: int) -> int:
+        """
+        Returns the version of the last write to the buffer (by kernel or data upload).
+        The version changes whenever the content of the buffer may change.
+        """
+        return self._buffer_write_versions.get(buffer_id, 0)
 
     def getDeviceInfo(self) -> dict:
         return gpu.getDeviceInfo().to_py()
 
     def createBuffer(self, buffer_id: int, byte_length: int):
+        # new buffer id is never referenced by queued commands, so no flush is needed
         return gpu.createBuffer(buffer_id, byte_length)
 
-    def createMetaBuffer(self, buffer_id: int, byte_length: int):
-        return gpu.createMetaBuffer(buffer_id, byte_length)
-
     def disposeBuffer(self, buffer_id: int):
-        return gpu.disposeBuffer(buffer_id)
+        # queued kernels may still use the buffer
+        self._buffer_write_versions.pop(buffer_id, None)
+        self._enqueue({"method": "disposeBuffer", "id": buffer_id})
 
     def setCommBuf(self, buffer: np.ndarray):
         self._latest_comm_buf = buffer
         return gpu.setCommBuf(buffer)
 
-    def setData(self, buffer_id: int, byte_length: int):
-        if not gpu.setData(buffer_id, byte_length):
+    def setData(self, buffer_id: int, byte_length: int, byte_offset: int = 0):
+        # writes byte_length bytes of comm buffer to byte_offset of the buffer
+        # queued kernels may read the buffer before it is overwritten
+        self.flush()
+        self._mark_written(buffer_id)
+        if not gpu.setData(buffer_id, byte_length, byte_offset):
             # WASM buffer may reallocated
             self.setCommBuf(self._latest_comm_buf)
-            if not gpu.setData(buffer_id, byte_length):
+            if not gpu.setData(buffer_id, byte_length, byte_offset):
                 raise ValueError("setData failed twice")
 
-    def getData(self, buffer_id: int, byte_length: int):
-        if not gpu.getData(buffer_id, byte_length):
+    def setDataFromHeap(self, buffer_id: int, array: np.ndarray, byte_offset: int = 0):
+        # writes c-contiguous array to byte_offset of the buffer directly from WASM
+        # heap, without copying to comm buffer
+        # comm buffer must be set, because its view is used to access the heap
+        self.flush()
+        self._mark_written(buffer_id)
+        address = array.__array_interface__["data"][0]
+        if not gpu.setDataFromHeap(buffer_id, address, array.nbytes, byte_offset):
+            # WASM heap may be grown
             self.setCommBuf(self._latest_comm_buf)
-            if not gpu.getData(buffer_id, byte_length):
+            if not gpu.setDataFromHeap(buffer_id, address, array.nbytes, byte_offset):
+                raise ValueError("setDataFromHeap failed twice")
+
+    def getData(self, buffer_id: int, byte_length: int, byte_offset: int = 0):
+        # reads byte_length bytes from byte_offset of the buffer into comm buffer
+        self.flush()
+        if not gpu.getData(buffer_id, byte_length, byte_offset):
+            self.setCommBuf(self._latest_comm_buf)
+            if not gpu.getData(buffer_id, byte_length, byte_offset):
                 raise ValueError("getData failed twice")
 
+    def getDataAsync(self, buffer_id: int, byte_length: int, byte_offset: int = 0):
+        # requests data of the buffer without blocking;
+        # returns awaitable which resolves to np.ndarray of uint8.
+        # the request is sent immediately, so commands issued later do not affect
+        # the result.
+        self.flush()
+        return _receive_data(gpu.getDataAsync(buffer_id, byte_length, byte_offset))
+
     def addKernel(self, name, descriptor):
-        return gpu.addKernel(name, descriptor)
+        # kernels generating the same source (e.g. the same operation in different
+        # ElementwiseKernel instances) share one compiled kernel; compilation is skipped
+        # for the second and later names.
+        if name not in self._written_tensors:
+            # tensors are bound in order of non-uniform bindings
+            binding_types = [
+                t for t in descriptor.get("bindingTypes", []) if t != "uniform"
+            ]
+            self._written_tensors[name] = [
+                i for i, t in enumerate(binding_types) if t == "storage"
+            ]
+        if self._kernels.register(name, descriptor):
+            return gpu.addKernel(name, descriptor)
+
+    def addKernelsAsync(self, descriptors: list):
+        """
+        Starts compiling kernels listed in a manifest without waiting for completion.
+        """
+        for descriptor in descriptors:
+            name = self._kernels.register_precompiled(descriptor)
+            if name is not None:
+                gpu.addKernelAsync(name, descriptor)
+
+    def getKernelManifest(self) -> list:
+        return self._kernels.manifest()
 
     def runKernel(self, descriptor):
-        return gpu.runKernel(descriptor)
+        for i in self._written_tensors.get(descriptor["name"], []):
+            self._mark_written(descriptor["tensors"][i])
+        descriptor = {**descriptor, "name": self._kernels.resolve(descriptor["name"])}
+        if "meta" in descriptor:
+            descriptor["meta"] = self._write_uniform(descriptor["meta"])
+        self._queued_dispatch_count += 1
+        self._enqueue({"method": "runKernel", "descriptor": descriptor})
+
+    def copyBuffer(
+        self,
+        src_buffer_id: int,
+        src_byte_offset: int,
+        dst_buffer_id: int,
+        dst_byte_offset: int,
+        byte_length: int,
+    ):
+        """
+        Copies the range of a buffer into another buffer, in order with the queued
+        kernels.
+        Offsets and length must be multiples of 4, and the buffers must be different.
+        """
+        self._mark_written(dst_buffer_id)
+        self._enqueue(
+            {
+                "method": "copyBuffer",
+                "srcId": src_buffer_id,
+                "srcByteOffset": src_byte_offset,
+                "dstId": dst_buffer_id,
+                "dstByteOffset": dst_byte_offset,
+                "byteLength": byte_length,
+            }
+        )
 
     def createTexture(self, texture_id: int, width: int, height: int, format: str = "rgba8unorm"):
         return gpu.createTexture(texture_id, width, height, format)
@@ -49,12 +230,21 @@ class WebGPUPlatform:
         return gpu.disposeTexture(texture_id)
 
     def copyBufferToTexture(self, buffer_id: int, texture_id: int, width: int, height: int):
+        self.flush()
         return gpu.copyBufferToTexture(buffer_id, texture_id, width, height)
 
     def presentTexture(self, texture_id: int):
+        self.flush()
         return gpu.presentTexture(texture_id)
 
 
+async def _receive_data(promise) -> np.ndarray:
+    data = await promise
+    array = np.empty((data.byteLength,), dtype=np.uint8)
+    data.assign_to(array)
+    return array
+
+
 _instance = None
 
 
@@ -1,12 +1,11 @@
+import struct
 from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 from wgpy_backends.webgpu.webgpu_buffer import (
-    WebGPUMetaBuffer,
     WebGPUMetaBufferItem,
-    create_meta_buffer_from_structure,
+    get_meta_struct_for_items,
 )
 from wgpy.construct import asarray
-from wgpy.common.shape_util import calculate_c_contiguous_strides
 from wgpy_backends.webgpu.texture import WebGPUArrayTextureShape
 from wgpy_backends.webgpu.ndarray import ndarray
 from wgpy_backends.webgpu.shader_util import header
@@ -23,13 +22,60 @@ from wgpy_backends.webgpu.kernel_common import (
     resolve_generic_type,
 )
 from wgpy_backends.webgpu.platform import get_platform
+from wgpy import lazy_evaluation
 
 _WORKGROUP_SIZE_X = 64
 _N_WORKGROUPS_X = 64
+# Upper bound of workgroups dispatched by parallel strategies. Remaining work items are
+# processed by grid-stride loop.
+_MAX_WORKGROUPS = 1024
+# Reductions with fewer outputs than this are split into chunks to occupy the GPU.
+_TARGET_WORKGROUPS = 256
+# Minimum number of reduced elements processed by a workgroup in the "split" strategy.
+_MIN_CHUNK_SIZE = _WORKGROUP_SIZE_X * 16
 
 added_kernels = set()
 
 
+def select_strategy(out_size: int, red_size: int) -> Tuple[str, int]:
+    """
+    Selects how to parallelize the reduction from the number of output elements and
+    reduced elements per output.
+    Returns (strategy, n_chunks).
+
+    "serial": one invocation per output element loops over its reduced elements.
+        Used when the reduced extent is small or outputs alone give enough parallelism.
+    "workgroup": one workgroup per output element. Invocations share the reduced
+        elements and their partial results are combined by tree reduction in workgroup
+        memory.
+    "split": the reduced elements of each output are split into n_chunks chunks, each
+        reduced by a workgroup, and the partial results are combined by a second pass.
+        Used when outputs are too few to occupy the GPU (e.g. full reduction).
+    """
+    if red_size <= _WORKGROUP_SIZE_X or out_size >= _WORKGROUP_SIZE_X * red_size:
+        return "serial", 1
+    n_chunks = min(
+        (red_size + _MIN_CHUNK_SIZE - 1) // _MIN_CHUNK_SIZE,
+        (_TARGET_WORKGROUPS + out_size - 1) // out_size,
+    )
+    if n_chunks <= 1:
+        return "workgroup", 1
+    return "split", n_chunks
+
+
+def _reduce_type_byte_size(reduce_type: str) -> Optional[int]:
+    """
+    Byte size of reduce_type as an element of storage array. None if it cannot be
+    stored (e.g. bool).
+    """
+    if reduce_type in ["f32", "i32", "u32"]:
+        return 4
+    for n, size in [(2, 8), (3, 16), (4, 16)]:
+        if reduce_type in [f"vec{n}<f32>", f"vec{n}<i32>", f"vec{n}<u32>"]:
+            return size
+    return None
+
+
 def get_input_key(
     name, out_name, ndim, elementwise, dtype, texture_shape: WebGPUArrayTextureShape
 ):
@@ -133,11 +179,11 @@ def make_output_def(
     name = param.name
     meta_defs = []  # type: List[WebGPUMetaBufferItem]
 
+    meta_defs.append(WebGPUMetaBufferItem(f"_{name}_offset", "i32"))
     for d in range(ndim):
         meta_defs.append(WebGPUMetaBufferItem(f"_{name}_shape_{d}", "i32"))
-    meta_defs.append(
-        WebGPUMetaBufferItem(f"_out_ind_size", "i32")
-    )  # cupy's _ind.size()
+        meta_defs.append(WebGPUMetaBufferItem(f"_{name}_stride_{d}", "i32"))
+    meta_defs.append(WebGPUMetaBufferItem("_out_ind_size", "i32"))  # cupy's _ind.size()
 
     main_head = ""
     main_tail = ""
@@ -156,8 +202,11 @@ _{name}_t1 = _{name}_t2;
         loop_head += f"""if (_{name}_0 >= cmeta._{name}_shape_{0}) {{ break; }}\n"""
     else:
         loop_head += """if (i > 0) { break; }\n"""
+    storage_index = f"cmeta._{name}_offset" + "".join(
+        f" + cmeta._{name}_stride_{d} * _{name}_{d}" for d in range(ndim)
+    )
     loop_tail += f"""
-        _{name}_storage[i] = {texture_shape.storage_dtype}({name});
+        _{name}_storage[{storage_index}] = {texture_shape.storage_dtype}({name});
         """
     variable_binding_source = f"""
 @group(0) @binding({binding_index})
@@ -184,19 +233,58 @@ def make_reduction_loop(
         reduce_type = out_texture_shape.logical_dtype
     loop_head = f"var a: {reduce_type} = {identity}; var b: {reduce_type};\n"
     # TODO: remove reduction_define
-    # TODO: not embed input_shape[] in the source code (this is inherited by WebGL code)
+    # extents of reduced axes are given by cmeta._red_shape_{i}, so that the kernel
+    # does not depend on the input shape.
     reduction_define = ""
     reduction_loop_open = ""
     reduction_loop_close = ""
-    for i, a in enumerate(axis):
-        reduction_loop_open += f"for (var _redi_{i}: i32 = 0; _redi_{i} < {input_shape[a]}; _redi_{i}++) {{\n"
+    for i in range(len(axis)):
+        reduction_loop_open += (
+            f"for (var _redi_{i}: i32 = 0; _redi_{i} < cmeta._red_shape_{i};"
+            f" _redi_{i}++) {{\n"
+        )
         reduction_loop_close += "}\n"
     return reduction_define, reduction_loop_open, reduction_loop_close, loop_head
 
 
+def make_reduction_index(axis: Tuple[int, ...]) -> str:
+    """
+    Decomposes the flat index of reduced elements _r into _redi_0, _redi_1, ...
+    (the last reduced axis is fastest).
+    """
+    source = "var _red_t: i32 = _r;\n"
+    for i in range(len(axis) - 1, 0, -1):
+        source += f"""var _redi_{i}: i32 = _red_t % cmeta._red_shape_{i};
+_red_t = _red_t / cmeta._red_shape_{i};
+"""
+    if len(axis) > 0:
+        source += "var _redi_0: i32 = _red_t;\n"
+    return source
+
+
+def make_tree_reduction(reduce_expr: str) -> str:
+    """
+    Combines accumulators (a) of invocations in the workgroup. The result is in a of
+    invocation 0.
+    Must be in uniform control flow.
+    """
+    return f"""_red_shared[local_index] = a;
+workgroupBarrier();
+for (var _s: u32 = {_WORKGROUP_SIZE_X // 2}u; _s > 0u; _s = _s >> 1u) {{
+if (local_index < _s) {{
+b = _red_shared[local_index + _s];
+a = ({reduce_expr});
+_red_shared[local_index] = a;
+}}
+workgroupBarrier();
+}}
+"""
+
+
 class ReductionKernel:
     _next_idx = 1
     _meta_defs_for_kernel_key: Dict[str, List[WebGPUMetaBufferItem]]
+    _meta_struct_for_kernel_key: Dict[str, struct.Struct]
 
     def __init__(
         self,
@@ -212,7 +300,12 @@ class ReductionKernel:
         preamble: str = "",
         no_return: bool = False,
         return_tuple: bool = False,
+        absorbing: Optional[str] = None,
     ) -> None:
+        """
+        absorbing: value of the accumulator which no further element changes (e.g. true
+            for logical or). Once it is reached, the remaining elements are skipped.
+        """
         self.parsed_in_params = parse_in_params(in_params)
         self.parsed_out_param = parse_out_params(out_params)
         if isinstance(uniforms, str):
@@ -238,11 +331,13 @@ class ReductionKernel:
         self.preamble = preamble
         self.no_return = no_return
         self.return_tuple = return_tuple
+        self.absorbing = absorbing
 
         self.kernel_name_prefix = f"reduce_{ReductionKernel._next_idx}_{name}_"
         ReductionKernel._next_idx += 1
         self.kernel_keys = {}
         self._meta_defs_for_kernel_key = {}
+        self._meta_struct_for_kernel_key = {}
 
     def _generate_kernel_source(
         self,
@@ -251,6 +346,7 @@ class ReductionKernel:
         generic_resolve_result: GenericResolveResult,
         axis: Tuple[int, ...],
         input_shape: Tuple[int, ...],
+        strategy: str,
     ):
         out_def_all = ""
         func_def_all = ""
@@ -261,13 +357,13 @@ class ReductionKernel:
         inner_head_all = ""
         meta_def_all = []  # type: List[WebGPUMetaBufferItem]
         meta_def_all.append(
-            WebGPUMetaBufferItem(f"_in_ind_size", "i32")
+            WebGPUMetaBufferItem("_in_ind_size", "i32")
         )  # cupy's _in_ind.size()
         variable_binding_source = """
 @group(0) @binding(0)
-var<storage,read> cmeta: CMeta;
+var<uniform> cmeta: CMeta;
 """
-        binding_types = ["read-only-storage"]  # type: List[str]
+        binding_types = ["uniform"]  # type: List[str]
         next_binding_index = 1
         # meta_defs, loop_head, loop_tail, main_head, main_tail, variable_binding_source
         meta_defs, loop_head, loop_tail, main_head, main_tail, binding_source_part = (
@@ -279,14 +375,27 @@ var<storage,read> cmeta: CMeta;
                 binding_index=next_binding_index,
             )
         )
+        reduce_type = self._get_reduce_type(out_array_impl)
+        if strategy == "split":
+            # the first pass writes accumulators to the partial buffer instead of output
+            variable_binding_source += f"""
+@group(0) @binding({next_binding_index})
+var<storage,read_write> _red_partial_storage: array<{reduce_type}>;
+"""
+        else:
+            variable_binding_source += binding_source_part
         next_binding_index += 1
         binding_types.append("storage")
         meta_def_all.extend(meta_defs)
+        for i in range(len(axis)):
+            meta_def_all.append(WebGPUMetaBufferItem(f"_red_shape_{i}", "i32"))
+        if strategy != "serial":
+            for name in ["_red_size", "_red_chunk", "_red_n_chunks"]:
+                meta_def_all.append(WebGPUMetaBufferItem(name, "i32"))
         loop_head_all += loop_head
         loop_tail_all += loop_tail
         main_head_all += main_head
         main_tail_all += main_tail
-        variable_binding_source += binding_source_part
         reduction_define, reduction_loop_open, reduction_loop_close, loop_head = (
             make_reduction_loop(
                 axis,
@@ -318,7 +427,12 @@ var<storage,read> cmeta: CMeta;
 
         meta_def_source = f'struct CMeta {{{"".join([f"{meta.name}:{meta.native_type}," for meta in meta_def_all])}}}'
 
-        source = f"""{header}
+        if strategy == "serial":
+            serial_exit = ""
+            if self.absorbing is not None:
+                # leaves the innermost reduction loop only
+                serial_exit = f"if (a == {self.absorbing}) {{ break; }}"
+            source = f"""{header}
 {self.preamble}
 {reduction_define}
 {generic_resolve_result.define_statements}
@@ -337,15 +451,176 @@ for (var i: i32 = i32(global_id.x);; i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i
 {inner_head_all}
 b = ({self.map_expr});
 a = ({self.reduce_expr});
+{serial_exit}
 {reduction_loop_close}
 {self.post_map_expr};
 {loop_tail_all}
 }}
 {main_tail_all}
 }}
+"""
+            return source, meta_def_all, binding_types
+
+        # work item _w reduces chunk (_w % _red_n_chunks) of output element i
+        # (_w / _red_n_chunks) in a workgroup
+        if strategy == "split":
+            finish = "_red_partial_storage[_w] = a;\n"
+        else:
+            finish = f"{self.post_map_expr};\n{loop_tail_all}"
+        # invocations of the workgroup stop reducing the output element once one of them
+        # reaches the absorbing value. the other accumulators do not change the result,
+        # as the absorbing one is combined with them.
+        done_decl = ""
+        done_reset = ""
+        done_check = ""
+        done_set = ""
+        if self.absorbing is not None:
+            done_decl = "var<workgroup> _red_done: atomic<u32>;"
+            done_reset = """if (local_index == 0u) { atomicStore(&_red_done, 0u); }
+workgroupBarrier();"""
+            done_check = "if (atomicLoad(&_red_done) != 0u) { break; }"
+            done_set = (
+                f"if (a == {self.absorbing}) {{ atomicStore(&_red_done, 1u); break; }}"
+            )
+        source = f"""{header}
+{self.preamble}
+{generic_resolve_result.define_statements}
+{meta_def_source}
+{variable_binding_source}
+{out_def_all}
+{func_def_all}
+var<workgroup> _red_shared: array<{reduce_type}, {_WORKGROUP_SIZE_X}>;
+{done_decl}
+
+@compute @workgroup_size({_WORKGROUP_SIZE_X},1,1)
+fn main(
+  @builtin(workgroup_id) workgroup_id: vec3<u32>,
+  @builtin(num_workgroups) num_workgroups: vec3<u32>,
+  @builtin(local_invocation_index) local_index: u32
+) {{
+{main_head_all}
+for (var _w: i32 = i32(workgroup_id.x);; _w += i32(num_workgroups.x)) {{
+let i: i32 = _w / cmeta._red_n_chunks;
+let _red_chunk_idx: i32 = _w - i * cmeta._red_n_chunks;
+{loop_head_all}
+let _red_begin: i32 = _red_chunk_idx * cmeta._red_chunk;
+let _red_end: i32 = min(_red_begin + cmeta._red_chunk, cmeta._red_size);
+{done_reset}
+for (var _r: i32 = _red_begin + i32(local_index); _r < _red_end;
+    _r += {_WORKGROUP_SIZE_X}i) {{
+{done_check}
+{make_reduction_index(axis)}
+{inner_head_all}
+b = ({self.map_expr});
+a = ({self.reduce_expr});
+{done_set}
+}}
+{make_tree_reduction(self.reduce_expr)}
+if (local_index == 0u) {{
+{finish}
+}}
+}}
+{main_tail_all}
+}}
 """
         return source, meta_def_all, binding_types
 
+    def _generate_combine_source(
+        self,
+        out_array_impl: ndarray,
+        generic_resolve_result: GenericResolveResult,
+    ):
+        # second pass of "split" strategy: combines partial results of chunks for each
+        # output element
+        meta_def_all = []  # type: List[WebGPUMetaBufferItem]
+        meta_def_all.append(WebGPUMetaBufferItem("_in_ind_size", "i32"))
+        meta_defs, loop_head, loop_tail, main_head, main_tail, binding_source_part = (
+            make_output_def(
+                self.parsed_out_param,
+                out_array_impl.ndim,
+                out_array_impl.dtype,
+                out_array_impl.buffer.texture_shape,
+                binding_index=1,
+            )
+        )
+        meta_def_all.extend(meta_defs)
+        meta_def_all.append(WebGPUMetaBufferItem("_red_n_chunks", "i32"))
+        meta_def_all.extend(self.meta_items)
+        _, _, _, reduction_loop_head = make_reduction_loop(
+            (),
+            (),
+            out_array_impl.buffer.texture_shape,
+            self.reduce_type,
+            self.identity,
+        )
+        reduce_type = self._get_reduce_type(out_array_impl)
+
+        meta_fields = "".join(
+            f"{meta.name}:{meta.native_type}," for meta in meta_def_all
+        )
+        meta_def_source = f"struct CMeta {{{meta_fields}}}"
+
+        source = f"""{header}
+{self.preamble}
+{generic_resolve_result.define_statements}
+{meta_def_source}
+@group(0) @binding(0)
+var<uniform> cmeta: CMeta;
+{binding_source_part}
+@group(0) @binding(2)
+var<storage,read> _red_partial_storage: array<{reduce_type}>;
+
+var<workgroup> _red_shared: array<{reduce_type}, {_WORKGROUP_SIZE_X}>;
+
+@compute @workgroup_size({_WORKGROUP_SIZE_X},1,1)
+fn main(
+  @builtin(workgroup_id) workgroup_id: vec3<u32>,
+  @builtin(num_workgroups) num_workgroups: vec3<u32>,
+  @builtin(local_invocation_index) local_index: u32
+) {{
+{main_head}
+for (var i: i32 = i32(workgroup_id.x);; i += i32(num_workgroups.x)) {{
+{loop_head}
+{reduction_loop_head}
+for (var _c: i32 = i32(local_index); _c < cmeta._red_n_chunks;
+    _c += {_WORKGROUP_SIZE_X}i) {{
+b = _red_partial_storage[i * cmeta._red_n_chunks + _c];
+a = ({self.reduce_expr});
+}}
+{make_tree_reduction(self.reduce_expr)}
+if (local_index == 0u) {{
+{self.post_map_expr};
+{loop_tail}
+}}
+}}
+{main_tail}
+}}
+"""
+        return source, meta_def_all, ["uniform", "storage", "read-only-storage"]
+
+    def _get_reduce_type(self, out_array_impl: ndarray) -> str:
+        if self.reduce_type is None:
+            return out_array_impl.buffer.texture_shape.logical_dtype
+        return self.reduce_type
+
+    def _get_kernel_name(self, kernel_key, generate) -> str:
+        kernel_name = self.kernel_keys.get(kernel_key, None)
+
+        if kernel_name is None:
+            kernel_name = self.kernel_name_prefix + str(len(self.kernel_keys))
+            self.kernel_keys[kernel_key] = kernel_name
+        if kernel_name not in added_kernels:
+            source, meta_defs, binding_types = generate()
+            get_platform().addKernel(
+                kernel_name, {"source": source, "bindingTypes": binding_types}
+            )
+            added_kernels.add(kernel_name)
+            self._meta_defs_for_kernel_key[kernel_name] = meta_defs
+            self._meta_struct_for_kernel_key[kernel_name] = get_meta_struct_for_items(
+                meta_defs
+            )
+        return kernel_name
+
     def _normalize_axis(
         self, axis: Optional[Union[int, Tuple[int, ...]]], ndim_input: int
     ) -> List[int]:
@@ -377,6 +652,10 @@ a = ({self.reduce_expr});
         out_array = None
         if len(arrays) == self.nin + self.nout:
             out_array = arrays[self.nin]  # maybe None
+        if out_array is not None:
+            # pending lazy results which read the output are evaluated before it is
+            # written
+            lazy_evaluation.before_write(out_array)
 
         # broadcasting
         target_shapes = []
@@ -406,7 +685,7 @@ a = ({self.reduce_expr});
         result_shape_keepdims = []
         for dim in range(len(input_shape)):
             if dim in n_axis:
-                axis_keys.append((dim, input_shape[dim]))
+                axis_keys.append(dim)
                 result_shape_keepdims.append(1)
             else:
                 result_shape_squeeze.append(input_shape[dim])
@@ -424,15 +703,43 @@ a = ({self.reduce_expr});
         else:
             assert out_array.shape == result_shape
             assert out_array.dtype == generic_resolve_result.out_dtype
-            if not out_array.flags.c_contiguous_full:
-                raise NotImplementedError
+            from wgpy_backends.webgpu.strided_write import elements_overlap
+
+            if elements_overlap(out_array):
+                # threads would write the same element in undefined order
+                raise NotImplementedError(
+                    "Output view whose elements overlap is not supported."
+                )
+        # out may be a view; reduced axes (size 1 if keepdims) are removed from its
+        # strides
+        if keepdims:
+            strides_squeeze = tuple(
+                out_array.strides[dim]
+                for dim in range(len(input_shape))
+                if dim not in n_axis
+            )
+        else:
+            strides_squeeze = out_array.strides
         out_array_impl_squeeze = out_array.get_view(
             result_shape_squeeze,
             out_array.dtype,
-            calculate_c_contiguous_strides(result_shape_squeeze, out_array.itemsize),
+            strides_squeeze,
             out_array.offset,
         )
 
+        out_size = out_array_impl_squeeze.size
+        red_size = 1
+        for a in n_axis:
+            red_size *= input_shape[a]
+        strategy, n_chunks = select_strategy(out_size, red_size)
+        if (
+            strategy == "split"
+            and _reduce_type_byte_size(self._get_reduce_type(out_array_impl_squeeze))
+            is None
+        ):
+            # partial results cannot be stored in a buffer
+            strategy, n_chunks = "workgroup", 1
+
         # even if same instance, different source code is generated for dtype, ndim etc.
         # assigning unique key among same application.
         kernel_key = (
@@ -454,25 +761,19 @@ a = ({self.reduce_expr});
                 out_array_impl_squeeze.buffer.texture_shape,
             ),
             tuple(axis_keys),
+            strategy,
         )
-        kernel_name = self.kernel_keys.get(kernel_key, None)
-
-        if kernel_name is None:
-            kernel_name = self.kernel_name_prefix + str(len(self.kernel_keys))
-            self.kernel_keys[kernel_key] = kernel_name
-        if kernel_name not in added_kernels:
-            source, meta_defs, binding_types = self._generate_kernel_source(
+        kernel_name = self._get_kernel_name(
+            kernel_key,
+            lambda: self._generate_kernel_source(
                 in_array_impls,
                 out_array_impl_squeeze,
                 generic_resolve_result,
                 n_axis,
                 input_shape,
-            )
-            get_platform().addKernel(
-                kernel_name, {"source": source, "bindingTypes": binding_types}
-            )
-            added_kernels.add(kernel_name)
-            self._meta_defs_for_kernel_key[kernel_name] = meta_defs
+                strategy,
+            ),
+        )
         all_uniforms = []
         for k, array in zip(self.parsed_in_params, in_array_impls):
             all_uniforms.extend(make_input_uniform(k, array))
@@ -480,6 +781,21 @@ a = ({self.reduce_expr});
         all_uniforms.extend(
             make_output_uniform(self.parsed_out_param, out_array_impl_squeeze, True)
         )
+        all_uniforms.extend(
+            {"type": "i32", "name": f"_red_shape_{i}", "value": input_shape[a]}
+            for i, a in enumerate(n_axis)
+        )
+        all_uniforms.extend(
+            [
+                {"type": "i32", "name": "_red_size", "value": red_size},
+                {
+                    "type": "i32",
+                    "name": "_red_chunk",
+                    "value": (red_size + n_chunks - 1) // n_chunks,
+                },
+                {"type": "i32", "name": "_red_n_chunks", "value": n_chunks},
+            ]
+        )
         if uniforms is not None:
             for uniform_def in self.meta_items:
                 # TODO: missing uniform check
@@ -493,37 +809,84 @@ a = ({self.reduce_expr});
         else:
             assert len(self.meta_items) == 0
 
-        meta_buffer = self._make_meta_buffer(
-            self._meta_defs_for_kernel_key[kernel_name], all_uniforms
-        )
-
-        tensors = [meta_buffer.buffer_id, out_array_impl_squeeze.buffer.buffer_id]
-        for array in in_array_impls:
-            tensors.append(array.buffer.buffer_id)
-        get_platform().runKernel(
-            {
-                "name": kernel_name,
-                "tensors": tensors,
-                "workGroups": {"x": 64, "y": 1, "z": 1},
-            }
-        )
+        meta = self._pack_meta(kernel_name, all_uniforms)
+
+        in_tensors = [array.buffer.buffer_id for array in in_array_impls]
+        if strategy == "serial":
+            get_platform().runKernel(
+                {
+                    "name": kernel_name,
+                    "meta": meta,
+                    "tensors": [out_array_impl_squeeze.buffer.buffer_id] + in_tensors,
+                    "workGroups": {"x": _N_WORKGROUPS_X, "y": 1, "z": 1},
+                }
+            )
+        elif strategy == "workgroup":
+            get_platform().runKernel(
+                {
+                    "name": kernel_name,
+                    "meta": meta,
+                    "tensors": [out_array_impl_squeeze.buffer.buffer_id] + in_tensors,
+                    "workGroups": {
+                        "x": min(out_size, _MAX_WORKGROUPS),
+                        "y": 1,
+                        "z": 1,
+                    },
+                }
+            )
+        else:
+            partial_byte_size = _reduce_type_byte_size(
+                self._get_reduce_type(out_array_impl_squeeze)
+            )
+            partial = ndarray(
+                (out_size * n_chunks * partial_byte_size // 4,), np.float32
+            )
+            get_platform().runKernel(
+                {
+                    "name": kernel_name,
+                    "meta": meta,
+                    "tensors": [partial.buffer.buffer_id] + in_tensors,
+                    "workGroups": {
+                        "x": min(out_size * n_chunks, _MAX_WORKGROUPS),
+                        "y": 1,
+                        "z": 1,
+                    },
+                }
+            )
+            combine_kernel_name = self._get_kernel_name(
+                (kernel_key[0], kernel_key[1], "combine"),
+                lambda: self._generate_combine_source(
+                    out_array_impl_squeeze, generic_resolve_result
+                ),
+            )
+            get_platform().runKernel(
+                {
+                    "name": combine_kernel_name,
+                    "meta": self._pack_meta(combine_kernel_name, all_uniforms),
+                    "tensors": [
+                        out_array_impl_squeeze.buffer.buffer_id,
+                        partial.buffer.buffer_id,
+                    ],
+                    "workGroups": {
+                        "x": min(out_size, _MAX_WORKGROUPS),
+                        "y": 1,
+                        "z": 1,
+                    },
+                }
+            )
         if self.no_return:
             return None
         if self.return_tuple:
             return (out_array,)
         return out_array
 
-    def _make_meta_buffer(
-        self, meta_defs: List[WebGPUMetaBufferItem], uniforms: List[dict]
-    ) -> WebGPUMetaBuffer:
+    def _pack_meta(self, kernel_name: str, uniforms: List[dict]) -> bytes:
         # uniform: {'type': 'i32', 'name': f'_ind_size', 'value': 123}
         values = []
-        numpy_dtypes = []
         uniform_dict = {uniform["name"]: uniform for uniform in uniforms}
-        for meta_def in meta_defs:
+        for meta_def in self._meta_defs_for_kernel_key[kernel_name]:
             if meta_def.name in uniform_dict:
                 values.append(uniform_dict[meta_def.name]["value"])
-                numpy_dtypes.append(meta_def.numpy_dtype_str)
             else:
                 raise KeyError(f"uniform {meta_def.name} is not found")
-        return create_meta_buffer_from_structure(tuple(values), ",".join(numpy_dtypes))
+        return self._meta_struct_for_kernel_key[kernel_name].pack(*values)
@@ -0,0 +1,245 @@
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from wgpy_backends.webgpu.webgpu_buffer import pack_meta
+from wgpy_backends.webgpu.platform import get_platform
+from wgpy_backends.webgpu.ndarray import ndarray
+from wgpy_backends.webgpu.shader_util import header
+
+_WORKGROUP_SIZE_X = 64
+_N_WORKGROUPS_X = 64
+
+# dtype of the destination: (type in shader, type of atomic storage, format of meta)
+# f32 has no atomic operation; its bits are updated by compare-exchange loop on
+# atomic<u32>.
+_atomic_types = {
+    np.dtype(np.float32): ("f32", "u32", "f4"),
+    np.dtype(np.int32): ("i32", "i32", "i4"),
+}
+
+_atomic_funcs = {"add": "atomicAdd", "max": "atomicMax", "min": "atomicMin"}
+_float_updates = {
+    "add": "bitcast<f32>(old_bits) + v",
+    "max": "max(bitcast<f32>(old_bits), v)",
+    "min": "min(bitcast<f32>(old_bits), v)",
+}
+
+added_kernels = set()
+
+
+def _make_kernel_source(
+    op: str,
+    dtype: np.dtype,
+    ndim: int,
+    out_dims: List[Optional[int]],
+    index_storage_dtypes: List[Optional[str]],
+    value_storage_dtype: Optional[str],
+) -> str:
+    """
+    index_storage_dtypes: for each dim of dst, storage dtype of index array, "" for host
+        int, or None if indexed by the dim of the loop.
+    value_storage_dtype: storage dtype of value array, or None for host scalar.
+    """
+    value_type, atomic_type, _ = _atomic_types[dtype]
+    meta_def_source = "struct CMeta {\nsize: i32,\ndst_offset: i32,\n"
+    for d in range(ndim):
+        meta_def_source += f"shape_{d}: i32,\n"
+    for vd, storage_dtype in enumerate(index_storage_dtypes):
+        meta_def_source += f"dst_stride_{vd}: i32,\n"
+        if storage_dtype is None:
+            continue
+        if storage_dtype == "":
+            meta_def_source += f"k{vd}_scalar: i32,\n"
+        else:
+            meta_def_source += f"k{vd}_offset: i32,\n"
+            for d in range(ndim):
+                meta_def_source += f"k{vd}_stride_{d}: i32,\n"
+        meta_def_source += f"k{vd}_extent: i32,\n"
+    if value_storage_dtype is None:
+        meta_def_source += f"v_scalar: {value_type},\n"
+    else:
+        meta_def_source += "v_offset: i32,\n"
+        for d in range(ndim):
+            meta_def_source += f"v_stride_{d}: i32,\n"
+    meta_def_source += "}\n"
+
+    binding_source = f"""
+@group(0) @binding(0)
+var<uniform> cmeta: CMeta;
+
+@group(0) @binding(1)
+var<storage,read_write> dst: array<atomic<{atomic_type}>>;
+"""
+    binding_index = 2
+    for vd, storage_dtype in enumerate(index_storage_dtypes):
+        if storage_dtype:
+            binding_source += f"""
+@group(0) @binding({binding_index})
+var<storage,read> k{vd}_storage: array<{storage_dtype}>;
+"""
+            binding_index += 1
+    if value_storage_dtype is not None:
+        binding_source += f"""
+@group(0) @binding({binding_index})
+var<storage,read> v_storage: array<{value_storage_dtype}>;
+"""
+
+    loop_source = "var t1: i32 = i;\nvar t2: i32;\n"
+    for d in range(ndim - 1, 0, -1):  # ndim-1, ndim-2, ..., 1
+        loop_source += f"""t2 = t1 / cmeta.shape_{d};
+var o{d}: i32 = t1 - t2 * cmeta.shape_{d};
+t1 = t2;
+"""
+    if ndim > 0:
+        loop_source += "var o0: i32 = t1;\n"
+    loop_source += "var j: i32 = cmeta.dst_offset;\n"
+    for vd, storage_dtype in enumerate(index_storage_dtypes):
+        if storage_dtype is None:
+            loop_source += f"j += cmeta.dst_stride_{vd} * o{out_dims[vd]};\n"
+            continue
+        if storage_dtype == "":
+            loop_source += f"var k{vd}: i32 = cmeta.k{vd}_scalar;\n"
+        else:
+            position = f"cmeta.k{vd}_offset" + "".join(
+                f" + cmeta.k{vd}_stride_{d} * o{d}" for d in range(ndim)
+            )
+            loop_source += f"var k{vd}: i32 = i32(k{vd}_storage[{position}]);\n"
+        # same as gather: negative index counts from the end, and out of range index is
+        # clipped
+        loop_source += f"""if (k{vd} < 0) {{ k{vd} += cmeta.k{vd}_extent; }}
+k{vd} = clamp(k{vd}, 0, cmeta.k{vd}_extent - 1);
+j += cmeta.dst_stride_{vd} * k{vd};
+"""
+    if value_storage_dtype is None:
+        loop_source += f"var v: {value_type} = cmeta.v_scalar;\n"
+    else:
+        position = "cmeta.v_offset" + "".join(
+            f" + cmeta.v_stride_{d} * o{d}" for d in range(ndim)
+        )
+        loop_source += f"var v: {value_type} = {value_type}(v_storage[{position}]);\n"
+    if value_type == "f32":
+        loop_source += f"""var old_bits: u32 = atomicLoad(&dst[j]);
+loop {{
+let new_value: f32 = {_float_updates[op]};
+let result = atomicCompareExchangeWeak(&dst[j], old_bits, bitcast<u32>(new_value));
+if (result.exchanged) {{ break; }}
+old_bits = result.old_value;
+}}
+"""
+    else:
+        loop_source += f"{_atomic_funcs[op]}(&dst[j], v);\n"
+
+    return f"""{header}
+{meta_def_source}
+{binding_source}
+@compute @workgroup_size({_WORKGROUP_SIZE_X},1,1)
+fn main(
+  @builtin(global_invocation_id) global_id: vec3<u32>
+) {{
+for (var i: i32 = i32(global_id.x); i < cmeta.size;
+    i += {_WORKGROUP_SIZE_X * _N_WORKGROUPS_X}i) {{
+{loop_source}
+}}
+}}
+"""
+
+
+def scatter_atomic(
+    op: str,
+    dst: ndarray,
+    shape: Tuple[int, ...],
+    out_dims: List[Optional[int]],
+    indices: List[Union[ndarray, int, None]],
+    value: Union[ndarray, np.generic],
+) -> bool:
+    """
+    Applies op ("add", "max" or "min") to the elements of dst selected by indices, with
+    value, by atomic operations.
+    Duplicate indices are accumulated, in undefined order.
+    For each dim of dst, out_dims and indices give the dim of shape or the index array
+    (broadcast to shape, or host int).
+    value is broadcast to shape, or host scalar.
+    Returns False if the dtype of dst is not supported.
+    """
+    if dst.dtype not in _atomic_types:
+        return False
+    ndim = len(shape)
+    size = int(np.prod(shape))
+    if size == 0:
+        return True
+    meta_values = [size, dst.offset // dst.itemsize]
+    meta_formats = ["i4", "i4"]
+    for d in range(ndim):
+        meta_values.append(shape[d])
+        meta_formats.append("i4")
+    tensors = [dst.buffer.buffer_id]
+    index_storage_dtypes = []  # type: List[Optional[str]]
+    for vd, idx in enumerate(indices):
+        meta_values.append(dst.strides[vd] // dst.itemsize)
+        meta_formats.append("i4")
+        if idx is None:
+            index_storage_dtypes.append(None)
+            continue
+        if isinstance(idx, ndarray):
+            # the buffer written by the kernel cannot be bound as read-only at the same
+            # time
+            if idx.buffer is dst.buffer:
+                idx = idx.copy()
+            index_storage_dtypes.append(idx.buffer.texture_shape.storage_dtype)
+            tensors.append(idx.buffer.buffer_id)
+            meta_values.append(idx.offset // idx.itemsize)
+            meta_values.extend(stride // idx.itemsize for stride in idx.strides)
+            meta_formats.extend(["i4"] * (1 + ndim))
+        else:
+            index_storage_dtypes.append("")
+            meta_values.append(idx)
+            meta_formats.append("i4")
+        meta_values.append(dst.shape[vd])
+        meta_formats.append("i4")
+    if isinstance(value, ndarray):
+        if value.buffer is dst.buffer:
+            value = value.copy()
+        value_storage_dtype = value.buffer.texture_shape.storage_dtype
+        tensors.append(value.buffer.buffer_id)
+        meta_values.append(value.offset // value.itemsize)
+        meta_values.extend(stride // value.itemsize for stride in value.strides)
+        meta_formats.extend(["i4"] * (1 + ndim))
+    else:
+        value_storage_dtype = None
+        meta_values.append(value.item())
+        meta_formats.append(_atomic_types[dst.dtype][2])
+
+    index_keys = "_".join(
+        f"o{out_dims[vd]}" if t is None else f"k{t}"
+        for vd, t in enumerate(index_storage_dtypes)
+    )
+    kernel_name = (
+        f"scatter_{op}_{_atomic_types[dst.dtype][0]}_{ndim}_{index_keys}"
+        f"_v{value_storage_dtype or ''}"
+    )
+    if kernel_name not in added_kernels:
+        get_platform().addKernel(
+            kernel_name,
+            {
+                "source": _make_kernel_source(
+                    op,
+                    dst.dtype,
+                    ndim,
+                    out_dims,
+                    index_storage_dtypes,
+                    value_storage_dtype,
+                ),
+                "bindingTypes": ["uniform", "storage"]
+                + ["read-only-storage"] * (len(tensors) - 1),
+            },
+        )
+        added_kernels.add(kernel_name)
+    meta = pack_meta(tuple(meta_values), ",".join(meta_formats))
+    get_platform().runKernel(
+        {
+            "name": kernel_name,
+            "meta": meta,
+            "tensors": tensors,
+            "workGroups": {"x": _N_WORKGROUPS_X, "y": 1, "z": 1},
+        }
+    )
+    return True
@@ -9,6 +9,8 @@ native_scalar_type_for_dtype = {
     np.dtype(np.int32): "i32",
     np.dtype(np.uint8): "u32",
     np.dtype(np.bool_): "bool",
+    np.dtype(np.int64): "i32",  # may overflow
+    np.dtype(np.float64): "f32",  # may overflow
 }
 
 native_scalar_type_to_default_dtype = {
@@ -0,0 +1,110 @@
+from wgpy_backends.webgpu.webgpu_buffer import pack_meta
+from wgpy_backends.webgpu.platform import get_platform
+from wgpy_backends.webgpu.ndarray import ndarray
+from wgpy_backends.webgpu.shader_util import header
+
+_WORKGROUP_SIZE_X = 64
+_N_WORKGROUPS_X = 64
+
+added_kernels = set()
+
+
+def _make_kernel_source(ndim: int, storage_dtype: str) -> str:
+    meta_def_source = "struct CMeta {\nsize: i32,\ndst_offset: i32,\n"
+    for d in range(ndim):
+        meta_def_source += f"shape_{d}: i32,\ndst_stride_{d}: i32,\n"
+    meta_def_source += "}\n"
+    index_source = "var t1: i32 = i;\nvar t2: i32;\nvar j: i32 = cmeta.dst_offset;\n"
+    for d in range(ndim - 1, 0, -1):  # ndim-1, ndim-2, ..., 1
+        index_source += f"""t2 = t1 / cmeta.shape_{d};
+j += (t1 - t2 * cmeta.shape_{d}) * cmeta.dst_stride_{d};
+t1 = t2;
+"""
+    if ndim > 0:
+        index_source += "j += t1 * cmeta.dst_stride_0;\n"
+    n_threads = _WORKGROUP_SIZE_X * _N_WORKGROUPS_X
+    return f"""{header}
+{meta_def_source}
+@group(0) @binding(0)
+var<uniform> cmeta: CMeta;
+
+@group(0) @binding(1)
+var<storage,read_write> dst: array<{storage_dtype}>;
+
+@group(0) @binding(2)
+var<storage,read> src: array<{storage_dtype}>;
+
+@compute @workgroup_size({_WORKGROUP_SIZE_X},1,1)
+fn main(
+  @builtin(global_invocation_id) global_id: vec3<u32>
+) {{
+for (var i: i32 = i32(global_id.x); i < cmeta.size; i += {n_threads}i) {{
+{index_source}
+dst[j] = src[i];
+}}
+}}
+"""
+
+
+def elements_overlap(dst: ndarray) -> bool:
+    """
+    Returns True if elements of the view may share the same element of the buffer
+    (e.g. zero stride of a broadcast view).
+    Each stride, in ascending order, must exceed the extent of the smaller ones.
+    """
+    dims = sorted(
+        (abs(dst.strides[d]) // dst.itemsize, dst.shape[d])
+        for d in range(dst.ndim)
+        if dst.shape[d] > 1
+    )
+    reach = 0
+    for stride, n in dims:
+        if stride <= reach:
+            return True
+        reach += (n - 1) * stride
+    return False
+
+
+def write_strided(dst: ndarray, src: ndarray) -> bool:
+    """
+    Scatters elements of src into the view dst on GPU.
+    src must be c-contiguous and have the same shape and dtype as dst.
+    Elements of the buffer of dst outside the view are not changed.
+    Returns False if the view cannot be written by this method (elements of the view
+    overlap, and threads would write the same element in undefined order).
+    """
+    assert src.flags.c_contiguous
+    assert src.shape == dst.shape
+    assert src.dtype == dst.dtype
+    if dst.size == 0:
+        return True
+    if elements_overlap(dst):
+        return False
+    storage_dtype = dst.buffer.texture_shape.storage_dtype
+    kernel_name = f"strided_write_{dst.ndim}_{storage_dtype}"
+    if kernel_name not in added_kernels:
+        get_platform().addKernel(
+            kernel_name,
+            {
+                "source": _make_kernel_source(dst.ndim, storage_dtype),
+                "bindingTypes": ["uniform", "storage", "read-only-storage"],
+            },
+        )
+        added_kernels.add(kernel_name)
+    meta_values = [dst.size, dst.offset // dst.itemsize]
+    for d in range(dst.ndim):
+        meta_values.append(dst.shape[d])
+        meta_values.append(dst.strides[d] // dst.itemsize)
+    meta = pack_meta(tuple(meta_values), ",".join(["i4"] * len(meta_values)))
+    get_platform().runKernel(
+        {
+            "name": kernel_name,
+            "meta": meta,
+            "tensors": [
+                dst.buffer.buffer_id,
+                src.buffer.buffer_id,
+            ],
+            "workGroups": {"x": _N_WORKGROUPS_X, "y": 1, "z": 1},
+        }
+    )
+    return True
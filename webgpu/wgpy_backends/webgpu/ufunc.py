@@ -1,9 +1,15 @@
 import re
 from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import numpy as np
+from wgpy import lazy_evaluation
 from wgpy.construct import asarray
 from wgpy_backends.webgpu.elementwise_kernel import ElementwiseKernel
 from wgpy_backends.webgpu.ndarray import ndarray
+from wgpy_backends.webgpu.kernel_common import (
+    check_scalar_bounds,
+    default_scalar_dtype,
+    is_host_scalar,
+)
 
 
 class OpWithType(NamedTuple):
@@ -12,6 +18,23 @@ class OpWithType(NamedTuple):
     out_dtype: np.dtype  # support only one output
 
 
+def _can_cast_scalar(value, dtype: np.dtype) -> bool:
+    # value-based casting: scalar does not change the type of arrays
+    value = np.asarray(value).item()
+    if isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        if dtype.kind == "f":
+            return True
+        if dtype.kind in "iu":
+            info = np.iinfo(dtype)
+            return info.min <= value <= info.max
+        return False
+    if isinstance(value, float):
+        return dtype.kind == "f"
+    return False
+
+
 class ufunc:
     name: str
     types: List[str]
@@ -68,8 +91,76 @@ class ufunc:
     def outer(self, A, B, /, **kwargs):
         raise NotImplementedError
 
-    def at(self, a, indices, b=None, /):
-        raise NotImplementedError
+    def at(self, a, indices, b=None, /, *, deterministic=False):
+        """
+        Performs the ufunc in place on the elements of a selected by indices,
+        accumulating for duplicate indices.
+        If deterministic is True, float32 add does not use atomic operations whose order
+        of additions is undefined.
+        """
+        from wgpy.indexing import ufunc_at
+
+        ufunc_at(self, a, indices, b, deterministic)
+
+    def _find_op(
+        self,
+        in_types: List[Union[np.dtype, object]],
+        out_dtype: Optional[np.dtype],
+        dtype: Optional[np.dtype],
+    ) -> Optional[OpWithType]:
+        for op in self.ops:
+            ok = True
+            for in_type, in_dtype in zip(in_types, op.in_dtypes):
+                if isinstance(in_type, np.dtype):
+                    if in_type != in_dtype:
+                        ok = False
+                        break
+                elif not _can_cast_scalar(in_type, in_dtype):
+                    ok = False
+                    break
+            if out_dtype is not None:
+                if out_dtype != op.out_dtype:
+                    ok = False
+            if dtype is not None:
+                if dtype != op.out_dtype:
+                    ok = False
+            if ok:
+                return op
+        return None
+
+    def resolve_types(
+        self,
+        in_types: List[Union[np.dtype, object]],
+        out_dtype: Optional[np.dtype] = None,
+        dtype: Optional[np.dtype] = None,
+    ) -> Tuple[Optional[OpWithType], List[Union[np.dtype, object]]]:
+        """
+        Finds the op that matches the types of the operands.
+        in_types: dtype of each array operand, or the value of each host scalar operand.
+        Returns the op (None if not found) and in_types after casting array operands.
+        No automatic cast is performed, except adhoc cast to float32.
+        """
+        matched_op = self._find_op(in_types, out_dtype, dtype)
+        if matched_op is None:
+            # adhoc cast
+            # TODO: cast rule
+            dtypes = [
+                t if isinstance(t, np.dtype) else default_scalar_dtype(t)
+                for t in in_types
+            ]
+            dst_dtype = np.dtype(np.float32)
+            if dst_dtype in dtypes:
+                in_types = [
+                    dst_dtype if isinstance(t, np.dtype) else t for t in in_types
+                ]
+                matched_op = self._find_op(in_types, out_dtype, dtype)
+            if matched_op is None:
+                if np.dtype(np.float64) in dtypes:
+                    in_types = [
+                        dst_dtype if isinstance(t, np.dtype) else t for t in in_types
+                    ]
+                    matched_op = self._find_op(in_types, out_dtype, dtype)
+        return matched_op, in_types
 
     def __call__(
         self,
@@ -97,7 +188,11 @@ class ufunc:
         if dtype is not None:
             dtype = np.dtype(dtype)
 
-        in_arrays = [asarray(array) for array in args[: self.nin]]
+        # scalars are not uploaded; they are embedded into the kernel call as uniforms
+        in_arrays = [
+            array if is_host_scalar(array) else asarray(array)
+            for array in args[: self.nin]
+        ]
         assert len(in_arrays) == self.nin
         out_array = None
         if len(args) == self.nargs:
@@ -106,63 +201,70 @@ class ufunc:
             assert out_array is None
             out_array = out
 
-        # Find op that matches the type
-        # No automatic cast is performed
-        matched_op = None
-
-        def find_matched_op():
-            for op in self.ops:
-                ok = True
-                for in_array, in_dtype in zip(in_arrays, op.in_dtypes):
-                    if in_array.dtype != in_dtype:
-                        ok = False
-                        break
-                if out_array is not None:
-                    if out_array.dtype != op.out_dtype:
-                        ok = False
-                if dtype is not None:
-                    if dtype != op.out_dtype:
-                        ok = False
-                if ok:
-                    return op
-            return None
-
-        matched_op = find_matched_op()
+        in_types = [
+            array.dtype if isinstance(array, ndarray) else array for array in in_arrays
+        ]
+        matched_op, in_types = self.resolve_types(
+            in_types, out_array.dtype if out_array is not None else None, dtype
+        )
+        in_arrays = [
+            (
+                array.astype(in_type)
+                if isinstance(array, ndarray) and array.dtype != in_type
+                else array
+            )
+            for array, in_type in zip(in_arrays, in_types)
+        ]
         if matched_op is None:
-            # adhoc cast
-            # TODO: cast rule
-            in_types = [array.dtype for array in in_arrays]
-            dst_dtype = np.dtype(np.float32)
-            if dst_dtype in in_types:
-                in_arrays = [
-                    array.astype(dst_dtype) if array.dtype != dst_dtype else array
-                    for array in in_arrays
-                ]
-                matched_op = find_matched_op()
-            if matched_op is None:
-                if np.dtype(np.float64) in in_types:
-                    in_arrays = [
-                        array.astype(dst_dtype) if array.dtype != dst_dtype else array
-                        for array in in_arrays
-                    ]
-                    matched_op = find_matched_op()
+            # integer scalar which does not fit in the integer type of the operation
+            int_dtypes = [
+                t for t in in_types if isinstance(t, np.dtype) and t.kind in "iu"
+            ]
+            for t in in_types:
+                if not isinstance(t, np.dtype):
+                    for int_dtype in int_dtypes or [default_scalar_dtype(t)]:
+                        check_scalar_bounds(t, int_dtype)
 
-        assert (
-            matched_op is not None
-        ), f"ufunc: type assignment failed for input types={[ary.dtype for ary in in_arrays]}"
+        assert matched_op is not None, (
+            "ufunc: type assignment failed for input types="
+            f"{[getattr(ary, 'dtype', type(ary)) for ary in in_arrays]}"
+        )
+        # scalar is typed as the operand type of the matched op
+        in_arrays = [
+            (
+                array
+                if isinstance(array, ndarray)
+                else in_dtype.type(np.asarray(array).item())
+            )
+            for array, in_dtype in zip(in_arrays, matched_op.in_dtypes)
+        ]
+
+        if out_array is None and lazy_evaluation.is_enabled():
+            # the op is fused with following ops and evaluated when the result is used
+            deferred = lazy_evaluation.defer(
+                matched_op.routine,
+                in_arrays,
+                matched_op.in_dtypes,
+                matched_op.out_dtype,
+            )
+            if deferred is not None:
+                return deferred
 
         if out_array is None:
             # broadcasting
-            target_shapes = [array.shape for array in in_arrays]
+            target_shapes = [np.shape(array) for array in in_arrays]
             result_shape = np.broadcast_shapes(*target_shapes)
             out_array = ndarray(result_shape, matched_op.out_dtype)
         else:
             assert isinstance(out_array, ndarray)
+            lazy_evaluation.before_write(out_array)
 
         # Cannot assign the same texture as both input and output or as multiple inputs in WebGL
         # In such cases, copy the input side
         bound_buffers = {id(out_array.buffer)}
         for i in range(len(in_arrays)):
+            if not isinstance(in_arrays[i], ndarray):
+                continue
             if id(in_arrays[i].buffer) in bound_buffers:
                 in_arrays[i] = in_arrays[i].copy()
             bound_buffers.add(id(in_arrays[i].buffer))
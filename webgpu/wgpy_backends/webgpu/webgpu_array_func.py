@@ -1,8 +1,13 @@
 from typing import List, Optional, Tuple, Union
+import numpy as np
 from wgpy_backends.webgpu import common_reduction
 from wgpy_backends.webgpu import common_ufunc
+from wgpy_backends.webgpu import fusion
 from wgpy_backends.webgpu.ndarray import ndarray
 from wgpy_backends.webgpu.matmul import matmul_impl, tensordot_impl
+from wgpy_backends.webgpu.scatter import scatter_atomic
+from wgpy_backends.webgpu.concatenate import concatenate_into
+from wgpy import lazy_evaluation
 
 
 class WebGPUArrayFunc:
@@ -11,7 +16,7 @@ class WebGPUArrayFunc:
     def __init__(self) -> None:
         self.ufunc = common_ufunc
         self.reduction = common_reduction
-        pass
+        self.fusion = fusion
 
     @staticmethod
     def instance() -> "WebGPUArrayFunc":
@@ -22,6 +27,8 @@ class WebGPUArrayFunc:
     def matmul(
         self, lhs: ndarray, rhs: ndarray, out: Optional[ndarray] = None
     ) -> ndarray:
+        if out is not None:
+            lazy_evaluation.before_write(out)
         return matmul_impl(lhs, rhs, out)
 
     def tensordot(
@@ -31,3 +38,17 @@ class WebGPUArrayFunc:
         axes: Union[int, Tuple[int, int], Tuple[List[int], List[int]]] = 2,
     ) -> ndarray:
         return tensordot_impl(a, b, axes)
+
+    def scatter_atomic(
+        self,
+        op: str,
+        dst: ndarray,
+        shape: Tuple[int, ...],
+        out_dims: List[Optional[int]],
+        indices: List[Union[ndarray, int, None]],
+        value: Union[ndarray, np.generic],
+    ) -> bool:
+        return scatter_atomic(op, dst, shape, out_dims, indices, value)
+
+    def concatenate_into(self, arrays: List[ndarray], axis: int, out: ndarray):
+        concatenate_into(arrays, axis, out)
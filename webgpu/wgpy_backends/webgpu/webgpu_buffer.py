@@ -1,6 +1,7 @@
-from collections import defaultdict
+import struct
 from typing import List, Optional
 import numpy as np
+from wgpy.common.buffer_pool import BufferPool, size_class_for_byte_length
 from wgpy_backends.webgpu.webgpu_data_type import WebGPULogicalDType, WebGPUStorageDType
 from wgpy_backends.webgpu.texture import (
     WebGPUArrayTextureShape,
@@ -15,6 +16,7 @@ performance_metrics = {
     "webgpu.buffer.write_count": 0,
     "webgpu.buffer.write_size": 0,
     "webgpu.buffer.write_scalar_count": 0,
+    "webgpu.buffer.write_zero_copy_count": 0,
     "webgpu.buffer.read_count": 0,
     "webgpu.buffer.read_size": 0,
     "webgpu.buffer.read_scalar_count": 0,
@@ -38,19 +40,30 @@ class GPUBufferUsage:
     QUERY_RESOLVE = 0x0200
 
 
-_pool = defaultdict(list)
-
 added_kernels = set()
 
 
-def _pool_put(texture_shape: WebGPUArrayTextureShape, buffer_id: int):
-    _pool[texture_shape].append(buffer_id)
+def _dispose_buffer(buffer_id: int):
+    byte_length = _physical_byte_lengths.pop(buffer_id)
+    get_platform().disposeBuffer(buffer_id)
+    performance_metrics["webgpu.buffer.delete"] += 1
+    performance_metrics["webgpu.buffer.buffer_count"] -= 1
+    performance_metrics["webgpu.buffer.buffer_size"] -= byte_length
+
+
+# buffer_id -> byte length of the GPU buffer (size class)
+_physical_byte_lengths = {}
+
+
+def _flush_disposal():
+    get_platform().flush()
+
 
+_pool = BufferPool(_dispose_buffer, _flush_disposal, performance_metrics, "webgpu.pool")
 
-def _pool_get(texture_shape: WebGPUArrayTextureShape) -> Optional[int]:
-    if len(_pool[texture_shape]) > 0:
-        return _pool[texture_shape].pop()
-    return None
+
+def get_buffer_pool() -> BufferPool:
+    return _pool
 
 
 def _get_comm_buf(byte_size: int) -> np.ndarray:
@@ -72,6 +85,7 @@ class WebGPUBuffer(WebGPUBufferBase):
         np.dtype
     )  # ndarray logical type (may be different from physical representation in WebGPU)
     texture_shape: WebGPUArrayTextureShape
+    physical_byte_length: int  # byte length of GPU buffer, rounded up to size class
 
     _comm_buf: Optional[np.ndarray] = None
     next_id = 1
@@ -85,18 +99,22 @@ class WebGPUBuffer(WebGPUBufferBase):
         self.size = size
         self.dtype = dtype
         self.texture_shape = texture_shape or get_default_texture_shape(size, dtype)
-        pooled_buffer_id = _pool_get(self.texture_shape)
+        self.physical_byte_length = size_class_for_byte_length(
+            self.texture_shape.byte_length
+        )
+        pooled_buffer_id = _pool.get(self.physical_byte_length)
         if pooled_buffer_id is not None:
             self.buffer_id = pooled_buffer_id
         else:
+            byte_length = self.physical_byte_length
+            _pool.allocate(byte_length)
             self.buffer_id = WebGPUBuffer.next_id
             WebGPUBuffer.next_id += 1
-            get_platform().createBuffer(self.buffer_id, self.texture_shape.byte_length)
+            get_platform().createBuffer(self.buffer_id, byte_length)
+            _physical_byte_lengths[self.buffer_id] = byte_length
             performance_metrics["webgpu.buffer.create"] += 1
             performance_metrics["webgpu.buffer.buffer_count"] += 1
-            performance_metrics[
-                "webgpu.buffer.buffer_size"
-            ] += self.texture_shape.byte_length
+            performance_metrics["webgpu.buffer.buffer_size"] += byte_length
             performance_metrics["webgpu.buffer.buffer_count_max"] = max(
                 performance_metrics["webgpu.buffer.buffer_count_max"],
                 performance_metrics["webgpu.buffer.buffer_count"],
@@ -107,82 +125,98 @@ class WebGPUBuffer(WebGPUBufferBase):
             )
 
     def __del__(self):
-        # TODO: limit pooled size
-        _pool_put(self.texture_shape, self.buffer_id)
-        # get_platform().disposeBuffer(self.buffer_id)
+        _pool.put(self.physical_byte_length, self.buffer_id, self.physical_byte_length)
 
-    def set_data(self, array: np.ndarray):
-        if self.size == 0:
+    def set_data(self, array: np.ndarray, start: int = 0):
+        """
+        Writes array to elements [start, start + array.size) of the buffer.
+        """
+        if self.size == 0 or array.size == 0:
             return
-        buf = _get_comm_buf(self.texture_shape.byte_length)
-        packed = buf.view(self.texture_shape.storage_dtype_numpy)
-        packed[: array.size] = array.ravel()
-        get_platform().setData(self.buffer_id, self.texture_shape.byte_length)
+        byte_length = array.size * self.texture_shape.itemsize
+        if (
+            array.dtype == self.texture_shape.storage_dtype_numpy
+            and array.flags.c_contiguous
+        ):
+            # the memory of array is directly read from WASM heap.
+            # comm buffer must be registered to give JS the view of the heap.
+            _get_comm_buf(0)
+            get_platform().setDataFromHeap(
+                self.buffer_id, array, start * self.texture_shape.itemsize
+            )
+            performance_metrics["webgpu.buffer.write_zero_copy_count"] += 1
+        else:
+            buf = _get_comm_buf(byte_length)
+            packed = buf.view(self.texture_shape.storage_dtype_numpy)
+            packed[: array.size] = array.ravel()
+            get_platform().setData(
+                self.buffer_id, byte_length, start * self.texture_shape.itemsize
+            )
         performance_metrics["webgpu.buffer.write_count"] += 1
         # physical size
-        performance_metrics[
-            "webgpu.buffer.write_size"
-        ] += self.texture_shape.byte_length
+        performance_metrics["webgpu.buffer.write_size"] += byte_length
         # logical size
         if array.size <= 1:
             performance_metrics["webgpu.buffer.write_scalar_count"] += 1
 
-    def get_data(self) -> np.ndarray:
-        return self._get_data_internal(self.dtype)
-
-    def _get_data_internal(self, original_dtype: np.dtype):
-        if self.size == 0:
+    def get_data(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Reads elements [start, stop) of the buffer.
+        Only the range is transferred from GPU.
+        """
+        return self._get_data_internal(self.dtype, start, stop)
+
+    def _get_data_internal(
+        self, original_dtype: np.dtype, start: int = 0, stop: Optional[int] = None
+    ):
+        if stop is None:
+            stop = self.size
+        size = stop - start
+        if size <= 0:
             return np.zeros((0,), dtype=original_dtype)
+        itemsize = self.texture_shape.itemsize
+        byte_length = size * itemsize
         performance_metrics["webgpu.buffer.read_count"] += 1
-        buf = _get_comm_buf(self.texture_shape.byte_length)
-        get_platform().getData(self.buffer_id, self.texture_shape.byte_length)
-        performance_metrics["webgpu.buffer.read_size"] += self.texture_shape.byte_length
-        if self.size <= 1:
+        buf = _get_comm_buf(byte_length)
+        get_platform().getData(self.buffer_id, byte_length, start * itemsize)
+        performance_metrics["webgpu.buffer.read_size"] += byte_length
+        if size <= 1:
             performance_metrics["webgpu.buffer.read_scalar_count"] += 1
-        view = buf.view(self.texture_shape.storage_dtype_numpy)[: self.size]
+        view = buf.view(self.texture_shape.storage_dtype_numpy)[:size]
 
         return view.copy().astype(original_dtype, copy=False)
 
+    def get_data_async(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Same as get_data, but returns an awaitable which resolves to the data,
+        without blocking until the GPU finishes.
+        """
+        if stop is None:
+            stop = self.size
+        size = stop - start
+        if size <= 0:
+            return _resolved(np.zeros((0,), dtype=self.dtype))
+        itemsize = self.texture_shape.itemsize
+        byte_length = size * itemsize
+        performance_metrics["webgpu.buffer.read_count"] += 1
+        performance_metrics["webgpu.buffer.read_size"] += byte_length
+        if size <= 1:
+            performance_metrics["webgpu.buffer.read_scalar_count"] += 1
+        received = get_platform().getDataAsync(
+            self.buffer_id, byte_length, start * itemsize
+        )
+        return _unpack_received(
+            received, self.texture_shape.storage_dtype_numpy, self.dtype
+        )
 
-_meta_pool = defaultdict(list)
-
-
-class WebGPUMetaBuffer(WebGPUBufferBase):
-    _data: bytes
-
-    def __init__(self, data: bytes, pooled_buffer_id: Optional[int]) -> None:
-        super().__init__()
-
-        self._data = data
-        if pooled_buffer_id is not None:
-            self.buffer_id = pooled_buffer_id
-        else:
-            self.buffer_id = WebGPUBuffer.next_id
-            WebGPUBuffer.next_id += 1
-
-            buf = _get_comm_buf(len(data))
-            packed = buf.view(np.uint8)
-            packed[: len(data)] = np.frombuffer(data, dtype=np.uint8)
-            get_platform().createMetaBuffer(self.buffer_id, len(data))
 
-            performance_metrics["webgpu.buffer.create"] += 1
-            performance_metrics["webgpu.buffer.buffer_count"] += 1
-            performance_metrics["webgpu.buffer.buffer_size"] += len(data)
-            performance_metrics["webgpu.buffer.buffer_count_max"] = max(
-                performance_metrics["webgpu.buffer.buffer_count_max"],
-                performance_metrics["webgpu.buffer.buffer_count"],
-            )
-            performance_metrics["webgpu.buffer.buffer_size_max"] = max(
-                performance_metrics["webgpu.buffer.buffer_size_max"],
-                performance_metrics["webgpu.buffer.buffer_size"],
-            )
+async def _resolved(value):
+    return value
 
-    @property
-    def data(self):
-        return self._data
 
-    def __del__(self):
-        _meta_pool[self._data].append(self.buffer_id)
+async def _unpack_received(received, storage_dtype: np.dtype, original_dtype: np.dtype):
+    data = await received
+    return data.view(storage_dtype).astype(original_dtype, copy=False)
 
 
 class WebGPUMetaBufferItem:
@@ -203,33 +237,35 @@ class WebGPUMetaBufferItem:
         return f"WebGPUMetaBufferItem('{self.name}', '{self.native_type}', '{self.numpy_dtype_str}')"
 
 
-def create_meta_buffer(data: bytes) -> WebGPUMetaBuffer:
-    pooled = _meta_pool[data]
-    pooled_buffer_id = None
-    if len(pooled) > 0:
-        pooled_buffer_id = pooled.pop()
-    new_buf = WebGPUMetaBuffer(data, pooled_buffer_id=pooled_buffer_id)
-    return new_buf
+_META_STRUCT_FORMATS = {"f4": "f", "i4": "i", "u4": "I"}
+
+_meta_structs = {}  # format -> struct.Struct
 
 
-def create_meta_buffer_from_structure(data_tuple: tuple, dtype) -> WebGPUMetaBuffer:
+def get_meta_struct(dtype: str) -> struct.Struct:
     """
-    example: data_tuple = (2, 1.5), dtype = "i4,f4"
+    Returns the packer of uniform values, compiled once per layout.
+    example: dtype = "i4,f4"
     """
-    structured_array = np.array([data_tuple], dtype=dtype)
-    data = structured_array.tobytes()
-    return create_meta_buffer(data)
+    meta_struct = _meta_structs.get(dtype)
+    if meta_struct is None:
+        meta_struct = struct.Struct(
+            "<" + "".join(_META_STRUCT_FORMATS[t] for t in dtype.split(","))
+        )
+        _meta_structs[dtype] = meta_struct
+    return meta_struct
+
 
+def get_meta_struct_for_items(
+    item_definitions: List[WebGPUMetaBufferItem],
+) -> struct.Struct:
+    return get_meta_struct(",".join(item.numpy_dtype_str for item in item_definitions))
 
-def create_meta_buffer_from_dict(
-    data_dict: dict, item_definitions: List[WebGPUMetaBufferItem]
-) -> WebGPUMetaBuffer:
+
+def pack_meta(data_tuple: tuple, dtype: str) -> bytes:
     """
-    example: data_dict = {"a": 2, "b": 1.5}, item_definitions = [WebGPUMetaBufferItem("a", "i32"), WebGPUMetaBufferItem("b", "f32")]
+    Packs uniform values of a dispatch, which are passed as "meta" of the kernel run
+    descriptor.
+    example: data_tuple = (2, 1.5), dtype = "i4,f4"
     """
-    dtype = np.dtype([(item.name, item.numpy_dtype_str) for item in item_definitions])
-    structured_array = np.array(
-        [tuple(data_dict[item.name] for item in item_definitions)], dtype=dtype
-    )
-    data = structured_array.tobytes()
-    return create_meta_buffer(data)
+    return get_meta_struct(dtype).pack(*data_tuple)
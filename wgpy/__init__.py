@@ -6,8 +6,18 @@ from wgpy.construct import *
 from wgpy.unary import *
 from wgpy.binary import *
 from wgpy.manipulation import *
+from wgpy.indexing import *
 from wgpy.reduction import *
+from wgpy.fusion import Fusion
+from wgpy.memoization import Memoized
+from wgpy.memoization import DEFAULT_MAXSIZE as _DEFAULT_MEMO_MAXSIZE
+from wgpy.memoization import clear_memo as _clear_memo
+from wgpy.lazy_evaluation import LazyScope as _LazyScope
+from wgpy.lazy_evaluation import set_global_mode as _lazy_set_global_mode
 from wgpy_backends.runtime import get_backend_name as _runtime_get_backend_name
+from wgpy_backends.runtime import synchronize as _runtime_synchronize
+from wgpy_backends.runtime import get_kernel_manifest as _runtime_get_kernel_manifest
+from wgpy_backends.runtime import warmup as _runtime_warmup
 
 __version__ = "1.0.0"
 
@@ -22,34 +32,105 @@ def isscalar(x):
         return np.isscalar(x)
 
 
+# https://docs.cupy.dev/en/stable/reference/generated/cupy.memoize.html
 # decorator
-def memoize(for_each_device=False):
-    def func(f):
-        def wrapper(*args, **kwargs):
-            # TODO: memoize based on args, kwargs
-            return f(*args, **kwargs)
+def memoize(for_each_device=False, maxsize=_DEFAULT_MEMO_MAXSIZE):
+    """
+    Caches the results of the function by its arguments.
+    Arguments must be hashable or ndarray; ndarray is keyed by its buffer, and writing
+    to it invalidates the entry.
+    At most maxsize results are kept, least recently used ones are discarded first.
+    If for_each_device is True, results are cached separately for each device.
+    Statistics are available by cache_info() of the decorated function.
+    """
 
-        return wrapper
+    def func(f):
+        return Memoized(f, for_each_device, maxsize)
 
     return func
 
 
+def clear_memo():
+    """
+    Clears the caches of all functions decorated by memoize().
+    """
+    _clear_memo()
+
+
 # https://docs.cupy.dev/en/stable/reference/generated/cupy.fuse.html#cupy.fuse
 # decorator
-def fuse():
-    # TODO: do kernel fusion
-    def func(f):
-        def wrapper(*args, **kwargs):
-            return f(*args, **kwargs)
+def fuse(*args, **kwargs):
+    """
+    Fuses the ufuncs (operators and elementwise functions) in the function into one
+    kernel. The function is traced for each combination of argument types, and the
+    fused kernel is cached.
+    Can be used as @fuse, @fuse() or @fuse(kernel_name="name").
+    """
 
-        return wrapper
+    def func(f):
+        return Fusion(f, kwargs.get("kernel_name") or f.__name__)
 
+    if len(args) == 1 and callable(args[0]):
+        return func(args[0])
     return func
 
 
+def lazy() -> _LazyScope:
+    """
+    Returns a context manager which enables lazy evaluation mode in the block.
+    In lazy evaluation mode, ufuncs (operators and elementwise functions) and astype are
+    not run immediately; they are recorded and fused into one kernel when the result is
+    used (read, passed to other functions such as matmul or reductions, or left at the
+    end of the block).
+    Temporaries which are no longer referenced are not computed.
+
+    with wgpy.lazy():
+        y = x * 2 + 1  # one kernel
+    """
+    return _LazyScope()
+
+
+def set_lazy_mode(enabled: bool):
+    """
+    Enables or disables lazy evaluation mode globally (see lazy()).
+    Pending arrays are evaluated when it is disabled.
+    """
+    _lazy_set_global_mode(enabled)
+
+
 def get_backend_name() -> str:
     """
     Returns the name of the backend currently in use.
     Possible values are 'webgpu' and 'webgl'.
     """
     return _runtime_get_backend_name()
+
+
+def synchronize():
+    """
+    Sends all queued GPU commands.
+    Commands are batched and sent on data readback or when the queue is full;
+    call this to send them explicitly (e.g. at the end of each frame of an animation
+    loop).
+    """
+    _runtime_synchronize()
+
+
+def get_kernel_manifest() -> dict:
+    """
+    Returns the manifest of kernels compiled so far.
+    The manifest consists of JSON-serializable values; save it (e.g. json.dumps to
+    localStorage or a file) and pass it to warmup() at the next startup.
+    """
+    return _runtime_get_kernel_manifest()
+
+
+def warmup(manifest: dict):
+    """
+    Starts compiling kernels in the manifest from get_kernel_manifest() in the
+    background, so that the first dispatch of these kernels does not wait for shader
+    compilation.
+    Kernels generated later with the same source use the precompiled ones.
+    A manifest saved with a different backend is ignored.
+    """
+    _runtime_warmup(manifest)
@@ -1,6 +1,7 @@
 from typing import List, Optional, Tuple, Union
 import numpy as np
 from wgpy.construct import asarray, asnumpy
+from wgpy.common.ndarray_base import NDArrayBase
 from wgpy_backends.runtime.ndarray import ndarray
 
 
@@ -46,34 +47,32 @@ def tensordot(
     return a.array_func.tensordot(a, b, axes=axes)
 
 
+def _array_func(*args):
+    # scalars are passed to ufunc as is (not uploaded to GPU)
+    for x in args:
+        if isinstance(x, NDArrayBase):
+            return x.array_func
+    return asarray(args[0]).array_func
+
+
 def divide(x: ndarray, y: ndarray, out=None, **kwargs) -> ndarray:
-    x = asarray(x)
-    y = asarray(y)
-    return x.array_func.ufunc.truediv(x, y, out=out, **kwargs)
+    return _array_func(x, y).ufunc.truediv(x, y, out=out, **kwargs)
 
 
 def maximum(x: ndarray, y: ndarray, out=None, **kwargs) -> ndarray:
-    x = asarray(x)
-    y = asarray(y)
-    return x.array_func.ufunc.maximum(x, y, out=out, **kwargs)
+    return _array_func(x, y).ufunc.maximum(x, y, out=out, **kwargs)
 
 
 def fmax(x: ndarray, y: ndarray, out=None, **kwargs) -> ndarray:
-    x = asarray(x)
-    y = asarray(y)
-    return x.array_func.ufunc.fmax(x, y, out=out, **kwargs)
+    return _array_func(x, y).ufunc.fmax(x, y, out=out, **kwargs)
 
 
 def minimum(x: ndarray, y: ndarray, out=None, **kwargs) -> ndarray:
-    x = asarray(x)
-    y = asarray(y)
-    return x.array_func.ufunc.minimum(x, y, out=out, **kwargs)
+    return _array_func(x, y).ufunc.minimum(x, y, out=out, **kwargs)
 
 
 def fmin(x: ndarray, y: ndarray, out=None, **kwargs) -> ndarray:
-    x = asarray(x)
-    y = asarray(y)
-    return x.array_func.ufunc.fmin(x, y, out=out, **kwargs)
+    return _array_func(x, y).ufunc.fmin(x, y, out=out, **kwargs)
 
 
 def clip(
@@ -83,10 +82,7 @@ def clip(
         return minimum(a, a_max, out=out, **kwargs)
     if a_max is None:
         return maximum(a, a_min, out=out, **kwargs)
-    a = asarray(a)
-    a_min = asarray(a_min)
-    a_max = asarray(a_max)
-    return a.array_func.ufunc.clip(a, a_min, a_max, out=out, **kwargs)
+    return _array_func(a, a_min, a_max).ufunc.clip(a, a_min, a_max, out=out, **kwargs)
 
 
 __all__ = [
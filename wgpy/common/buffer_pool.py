@@ -0,0 +1,174 @@
+from collections import OrderedDict, defaultdict
+from typing import Callable, Hashable, Optional
+
+# Size of pooled (released but not disposed) buffers in bytes. 256MB
+DEFAULT_POOL_LIMIT = 256 * 1024 * 1024
+
+_MIN_SIZE_CLASS = 256
+
+
+class OutOfMemoryError(MemoryError):
+    pass
+
+
+def size_class_for_byte_length(byte_length: int) -> int:
+    """
+    Rounds up the byte length to power of two,
+    so that buffers of slightly different sizes can be reused.
+    """
+    size = _MIN_SIZE_CLASS
+    while size < byte_length:
+        size *= 2
+    return size
+
+
+class BufferPool:
+    """
+    Pool of GPU buffers released by arrays.
+
+    Buffers are grouped by key (size class). Total bytes of pooled buffers is bounded
+    by pool_limit; when exceeded, least recently released buffers are disposed.
+    Total bytes of all buffers (used and pooled) can be bounded by limit;
+    pooled buffers are disposed before allocating a new buffer that exceeds it.
+    dispose may only queue the disposal; flush sends it before the memory is needed.
+    """
+
+    def __init__(
+        self,
+        dispose: Callable[[int], None],
+        flush: Callable[[], None],
+        performance_metrics: dict,
+        metrics_prefix: str,
+        pool_limit: int = DEFAULT_POOL_LIMIT,
+    ) -> None:
+        self._dispose = dispose
+        self._flush = flush
+        self._performance_metrics = performance_metrics
+        self._metrics_prefix = metrics_prefix
+        self._pool_limit = pool_limit
+        self._limit = 0  # 0: unlimited
+        self._buffers = defaultdict(list)  # key -> [buffer_id]
+        self._lru = OrderedDict()  # buffer_id -> (key, byte_length), oldest first
+        self._pooled_bytes = 0
+        self._total_bytes = 0
+        for name in ["hit", "miss", "evict", "pooled_count", "pooled_size"]:
+            performance_metrics[f"{metrics_prefix}.{name}"] = 0
+
+    @property
+    def pool_limit(self) -> int:
+        return self._pool_limit
+
+    def set_pool_limit(self, pool_limit: int):
+        self._pool_limit = pool_limit
+        if self._evict_pooled(pool_limit) > 0:
+            self._flush()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int):
+        """
+        Sets the upper bound of total bytes of buffers. 0 means unlimited.
+        """
+        self._limit = limit
+        if limit > 0 and self._evict_total(limit) > 0:
+            self._flush()
+
+    @property
+    def pooled_bytes(self) -> int:
+        return self._pooled_bytes
+
+    @property
+    def pooled_count(self) -> int:
+        return len(self._lru)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    @property
+    def used_bytes(self) -> int:
+        return self._total_bytes - self._pooled_bytes
+
+    def get(self, key: Hashable) -> Optional[int]:
+        buffer_ids = self._buffers.get(key)
+        if not buffer_ids:
+            self._performance_metrics[f"{self._metrics_prefix}.miss"] += 1
+            return None
+        buffer_id = buffer_ids.pop()
+        _, byte_length = self._lru.pop(buffer_id)
+        self._pooled_bytes -= byte_length
+        self._update_size_metrics()
+        self._performance_metrics[f"{self._metrics_prefix}.hit"] += 1
+        return buffer_id
+
+    def put(self, key: Hashable, buffer_id: int, byte_length: int):
+        self._buffers[key].append(buffer_id)
+        self._lru[buffer_id] = (key, byte_length)
+        self._pooled_bytes += byte_length
+        self._evict_pooled(self._pool_limit)
+        self._update_size_metrics()
+
+    def allocate(self, byte_length: int):
+        """
+        Must be called before creating a new buffer.
+        Raises OutOfMemoryError if the limit cannot be kept
+        even after disposing all pooled buffers.
+        """
+        if self._limit > 0:
+            if self._evict_total(self._limit - byte_length) > 0:
+                # memory of the disposed buffers is released before creating the new one
+                self._flush()
+            if self._total_bytes + byte_length > self._limit:
+                raise OutOfMemoryError(
+                    f"Out of memory allocating {byte_length} bytes "
+                    f"(allocated so far: {self._total_bytes} bytes, "
+                    f"limit set to: {self._limit} bytes)."
+                )
+        self._total_bytes += byte_length
+
+    def free_all(self):
+        """
+        Disposes all pooled buffers.
+        """
+        if self._evict_pooled(0) > 0:
+            self._flush()
+
+    def _evict_pooled(self, pooled_limit: int) -> int:
+        """
+        Returns the number of disposed buffers.
+        """
+        count = 0
+        while self._pooled_bytes > pooled_limit and len(self._lru) > 0:
+            self._evict_one()
+            count += 1
+        self._update_size_metrics()
+        return count
+
+    def _evict_total(self, total_limit: int) -> int:
+        """
+        Returns the number of disposed buffers.
+        """
+        count = 0
+        while self._total_bytes > total_limit and len(self._lru) > 0:
+            self._evict_one()
+            count += 1
+        self._update_size_metrics()
+        return count
+
+    def _evict_one(self):
+        buffer_id, (key, byte_length) = self._lru.popitem(last=False)
+        self._buffers[key].remove(buffer_id)
+        self._pooled_bytes -= byte_length
+        self._total_bytes -= byte_length
+        self._performance_metrics[f"{self._metrics_prefix}.evict"] += 1
+        self._dispose(buffer_id)
+
+    def _update_size_metrics(self):
+        self._performance_metrics[f"{self._metrics_prefix}.pooled_count"] = len(
+            self._lru
+        )
+        self._performance_metrics[f"{self._metrics_prefix}.pooled_size"] = (
+            self._pooled_bytes
+        )
@@ -0,0 +1,84 @@
+import hashlib
+from typing import List, Optional
+
+
+def kernel_source_hash(descriptor: dict) -> str:
+    """
+    Hash of the generated kernel, which determines the compiled pipeline (or program).
+    """
+    h = hashlib.sha1(descriptor["source"].encode("utf-8"))
+    for binding_type in descriptor.get("bindingTypes", []):
+        h.update(b"\0")
+        h.update(binding_type.encode("utf-8"))
+    return h.hexdigest()
+
+
+class KernelRegistry:
+    """
+    Deduplicates kernels by hash of the generated source.
+
+    Kernels registered with different names but the same source are mapped to the name
+    registered first, so that the source is compiled only once.
+    """
+
+    def __init__(self, performance_metrics: dict, metrics_prefix: str) -> None:
+        self._performance_metrics = performance_metrics
+        self._metrics_prefix = metrics_prefix
+        self._name_for_hash = {}  # source hash -> name registered first
+        self._canonical_names = {}  # name -> name of the compiled kernel
+        self._manifest = []  # type: List[dict]
+        for name in ["compile_count", "dedup_count", "precompile_count"]:
+            performance_metrics[f"{metrics_prefix}.{name}"] = 0
+
+    def register(self, name: str, descriptor: dict) -> bool:
+        """
+        Registers the kernel. Returns True if the kernel has to be compiled.
+        """
+        if name in self._canonical_names:
+            return False
+        source_hash = kernel_source_hash(descriptor)
+        canonical_name = self._name_for_hash.get(source_hash)
+        if canonical_name is not None:
+            self._canonical_names[name] = canonical_name
+            self._performance_metrics[f"{self._metrics_prefix}.dedup_count"] += 1
+            return False
+        self._add(name, source_hash, descriptor)
+        self._performance_metrics[f"{self._metrics_prefix}.compile_count"] += 1
+        return True
+
+    def register_precompiled(self, descriptor: dict) -> Optional[str]:
+        """
+        Registers the kernel from a manifest, before any kernel generates the source.
+        Returns the name to compile it with, or None if the same source is already
+        registered.
+        The name is derived from the hash, so it does not collide with names of kernels
+        generated later; they are mapped to it by the hash of their source.
+        """
+        source_hash = kernel_source_hash(descriptor)
+        if source_hash in self._name_for_hash:
+            return None
+        name = f"precompiled_{source_hash}"
+        self._add(name, source_hash, descriptor)
+        self._performance_metrics[f"{self._metrics_prefix}.precompile_count"] += 1
+        return name
+
+    def _add(self, name: str, source_hash: str, descriptor: dict):
+        self._name_for_hash[source_hash] = name
+        self._canonical_names[name] = name
+        entry = {"name": name, "source": descriptor["source"]}
+        if "bindingTypes" in descriptor:
+            entry["bindingTypes"] = list(descriptor["bindingTypes"])
+        self._manifest.append(entry)
+
+    def manifest(self) -> List[dict]:
+        """
+        Returns the list of compiled kernels, which can be passed to
+        register_precompiled in another session.
+        """
+        return [dict(entry) for entry in self._manifest]
+
+    def resolve(self, name: str) -> str:
+        """
+        Returns the name of the compiled kernel to run instead of name.
+        """
+        return self._canonical_names.get(name, name)
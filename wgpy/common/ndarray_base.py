@@ -23,6 +23,19 @@ class NDArrayBase:
     itemsize: int
     offset: int  # byte offset from buffer head
     nbytes: int
+    # pending expression in lazy evaluation mode; the buffer is allocated when it is
+    # evaluated
+    _lazy = None
+
+    @property
+    def buffer(self):
+        if self._lazy is not None:
+            self._lazy.materialize(self)
+        return self._buffer
+
+    @buffer.setter
+    def buffer(self, buffer):
+        self._buffer = buffer
 
     def _binary_lhs(self, other, func, rhs):
         if _use_rhs(self, other):
@@ -164,6 +177,15 @@ class NDArrayBase:
     def to_cpu(self) -> np.ndarray:
         return self.get()
 
+    def get_async(self, stream=None):
+        """
+        Returns an awaitable which resolves to np.ndarray, without blocking the worker
+        until the GPU finishes.
+        example: data = await x.get_async()
+        """
+        # ignore stream
+        return self.get_data_async()
+
     def _is_full_view(self) -> bool:
         if self.offset != 0:
             return False
@@ -171,6 +193,39 @@ class NDArrayBase:
             return False
         return True
 
+    def _pack_for_write(self, data) -> np.ndarray:
+        """
+        Returns c-contiguous np.ndarray of self.shape and self.dtype containing data.
+        data is returned as is if it already satisfies the condition, so that it can be
+        uploaded without copy.
+        """
+        if (
+            isinstance(data, np.ndarray)
+            and data.shape == self.shape
+            and data.dtype == self.dtype
+            and data.flags.c_contiguous
+        ):
+            return data
+        packed = np.empty(self.shape, dtype=self.dtype)
+        packed[...] = data
+        return packed
+
+    def _element_extent(self) -> Tuple[int, int]:
+        """
+        Returns range [start, stop) of element index in the buffer which this view
+        refers to.
+        """
+        start = self.offset // self.itemsize
+        if self.size == 0:
+            return start, start
+        stop = start + 1
+        for dim, stride in zip(self.shape, self.strides):
+            if stride < 0:
+                start += (dim - 1) * stride // self.itemsize
+            else:
+                stop += (dim - 1) * stride // self.itemsize
+        return start, stop
+
     def get_view(
         self: A,
         shape: Tuple[int, ...],
@@ -233,6 +288,25 @@ class NDArrayBase:
 
         return var(self, *args, **kwargs)
 
+    def any(self, axis=None, out=None, keepdims=False):
+        from wgpy.reduction import any
+
+        return any(self, axis=axis, out=out, keepdims=keepdims)
+
+    def all(self, axis=None, out=None, keepdims=False):
+        from wgpy.reduction import all
+
+        return all(self, axis=axis, out=out, keepdims=keepdims)
+
+    def nonzero(self):
+        from wgpy.indexing import nonzero
+
+        return nonzero(self)
+
+    def fill(self, value):
+        # filled on GPU by a kernel
+        self._assign(value)
+
     def squeeze(self, axis: Optional[Union[int, Tuple[int]]] = None):
         from wgpy.manipulation import squeeze
 
@@ -288,4 +362,6 @@ class NDArrayBase:
         )
 
     def scatter_add(self, slices: object, value: object):
-        self[slices] = self[slices] + value
+        from wgpy.indexing import scatter_add
+
+        scatter_add(self, slices, value)
@@ -1,4 +1,5 @@
 from typing import List, Tuple, Union
+import numpy as np
 
 
 def calculate_c_contiguous_strides(
@@ -27,3 +28,9 @@ def axis_to_tuple(axis: Union[int, Tuple[int]], sort=False) -> Tuple[int]:
     if sort:
         axis = tuple(sorted(axis))
     return axis
+
+
+def normalize_axis(axis: int, ndim: int) -> int:
+    if axis < -ndim or axis >= ndim:
+        raise np.AxisError(axis, ndim)
+    return axis + ndim if axis < 0 else axis
@@ -1,5 +1,7 @@
 import sys
+from typing import Optional, Tuple
 import numpy as np
+from wgpy.common.ndarray_base import NDArrayBase
 from wgpy_backends.runtime.ndarray import ndarray
 
 
@@ -7,34 +9,147 @@ def array(x):
     return asarray(np.array(x))
 
 
-def zeros(*args, **kwargs):
-    return asarray(np.zeros(*args, **kwargs))
+# kernels which compute the elements from the index, without input arrays
+_kernels = {}
 
 
-def ones(*args, **kwargs):
-    return asarray(np.ones(*args, **kwargs))
+def _get_kernel(array_func, in_params: str, operation: str, name: str):
+    kernel = _kernels.get((in_params, operation))
+    if kernel is None:
+        kernel = array_func.fusion.ElementwiseKernel(
+            in_params=in_params,
+            out_params="Y y",
+            operation=operation,
+            name=name,
+        )
+        _kernels[(in_params, operation)] = kernel
+    return kernel
 
 
-def ones_like(x):
-    # TODO GPU native
-    assert isinstance(x, ndarray)
-    return asarray(np.ones(x.shape, x.dtype))
+def _to_shape(shape) -> Tuple[int, ...]:
+    if isinstance(shape, (int, np.integer)):
+        return (int(shape),)
+    return tuple(int(s) for s in shape)
 
 
-def zeros_like(x):
-    # TODO GPU native
-    assert isinstance(x, ndarray)
-    return asarray(np.zeros(x.shape, x.dtype))
+def empty(shape, dtype=float):
+    # the backend decides the storage of the dtype (WebGL holds 64-bit types in 32-bit)
+    ary = ndarray(_to_shape(shape), dtype=np.dtype(dtype))
+    return ary
 
 
-def empty(shape, dtype):
-    ary = ndarray(shape, dtype=np.dtype(dtype))
+def full(shape, fill_value, dtype=None):
+    """
+    Filled on GPU by a kernel; no data is transferred.
+    """
+    if dtype is None:
+        if isinstance(fill_value, ndarray):
+            dtype = fill_value.dtype
+        else:
+            dtype = np.asarray(fill_value).dtype
+    ary = empty(shape, dtype)
+    ary.fill(fill_value)
     return ary
 
 
-def eye(*args, **kwargs):
-    # TODO GPU native
-    return asarray(np.eye(*args, **kwargs))
+def zeros(shape, dtype=float):
+    return full(shape, 0, dtype)
+
+
+def ones(shape, dtype=float):
+    return full(shape, 1, dtype)
+
+
+def empty_like(x, dtype=None, shape=None):
+    return empty(
+        x.shape if shape is None else shape, x.dtype if dtype is None else dtype
+    )
+
+
+def full_like(x, fill_value, dtype=None, shape=None):
+    return full(
+        x.shape if shape is None else shape,
+        fill_value,
+        x.dtype if dtype is None else dtype,
+    )
+
+
+def ones_like(x, dtype=None, shape=None):
+    return full_like(x, 1, dtype, shape)
+
+
+def zeros_like(x, dtype=None, shape=None):
+    return full_like(x, 0, dtype, shape)
+
+
+def eye(N: int, M: Optional[int] = None, k: int = 0, dtype=float):
+    ary = empty((N, N if M is None else M), dtype)
+    if ary.size > 0:
+        fusion = ary.array_func.fusion
+        kernel = _get_kernel(
+            ary.array_func,
+            "N k",
+            f"y = Y({fusion.select('(_y_1 - _y_0) == k', '1', '0')})",
+            "eye",
+        )
+        kernel(np.int32(k), ary)
+    return ary
+
+
+def arange(start, stop=None, step=1, dtype=None):
+    if stop is None:
+        start, stop = 0, start
+    if step == 0:
+        raise ZeroDivisionError("step must not be zero")
+    if dtype is None:
+        dtype = np.result_type(*[np.asarray(v).dtype for v in (start, stop, step)])
+    size = max(int(np.ceil((stop - start) / step)), 0)
+    ary = empty((size,), dtype)
+    if size > 0:
+        # computed in float32, or in int32 for integer dtypes
+        scalar_type = np.float32 if ary.dtype.kind == "f" else np.int32
+        kernel = _get_kernel(
+            ary.array_func,
+            "F start, F step",
+            "y = Y(start + step * F(_y_0))",
+            "arange",
+        )
+        kernel(scalar_type(start), scalar_type(step), ary)
+    return ary
+
+
+def linspace(start, stop, num: int = 50, endpoint=True, retstep=False, dtype=None):
+    if num < 0:
+        raise ValueError(f"Number of samples, {num}, must be non-negative.")
+    if dtype is None:
+        dtype = np.result_type(
+            np.asarray(start).dtype, np.asarray(stop).dtype, np.float64
+        )
+    div = num - 1 if endpoint else num
+    step = (stop - start) / div if div > 0 else np.nan
+    ary = empty((num,), dtype)
+    if num > 0:
+        # the last element is exactly stop when endpoint is True
+        last = num - 1 if endpoint and num > 1 else -1
+        value = ary.array_func.fusion.select(
+            "_y_0 == last", "stop", "start + step * F(_y_0)"
+        )
+        kernel = _get_kernel(
+            ary.array_func,
+            "F start, F step, F stop, N last",
+            f"y = Y({value})",
+            "linspace",
+        )
+        kernel(
+            np.float32(start),
+            np.float32(0.0 if div <= 0 else step),
+            np.float32(stop),
+            np.int32(last),
+            ary,
+        )
+    if retstep:
+        return ary, step
+    return ary
 
 
 def asarray(x) -> ndarray:
@@ -57,6 +172,21 @@ def asnumpy(x):
         return np.asarray(x)
 
 
+def asnumpy_async(x):
+    """
+    Returns an awaitable which resolves to np.ndarray,
+    without blocking the worker until the GPU finishes.
+    example: data = await wgpy.asnumpy_async(x)
+    """
+    if isinstance(x, ndarray):
+        return x.get_async()
+    return _resolved(asnumpy(x))
+
+
+async def _resolved(value):
+    return value
+
+
 def to_cpu(x):
     return asnumpy(x)
 
@@ -67,7 +197,7 @@ def to_gpu(x):
 
 def get_array_module(*args):
     for x in args:
-        if isinstance(x, ndarray):
+        if isinstance(x, NDArrayBase):
             current_module = sys.modules["wgpy"]  # cupy may be needed in some case?
             return current_module
     else:
@@ -79,11 +209,17 @@ __all__ = [
     "empty",
     "zeros",
     "ones",
+    "full",
     "eye",
+    "arange",
+    "linspace",
+    "empty_like",
+    "full_like",
     "ones_like",
     "zeros_like",
     "asarray",
     "asnumpy",
+    "asnumpy_async",
     "to_cpu",
     "to_gpu",
     "get_array_module",
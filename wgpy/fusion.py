@@ -0,0 +1,368 @@
+import functools
+import re
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from wgpy.common.ndarray_base import NDArrayBase
+from wgpy_backends.runtime.ndarray import ndarray
+
+# generic type of each input of the fused kernel. output uses "Z".
+_INPUT_GENERIC_TYPES = "ABCDEFGHIJKLMNOPQRSTUVWXY"
+
+
+def _is_host_scalar(x) -> bool:
+    if isinstance(x, np.ndarray):
+        if x.ndim != 0:
+            return False
+        x = x[()]
+    if isinstance(x, (complex, np.complexfloating)):
+        raise TypeError("complex scalar is not supported")
+    return isinstance(x, (bool, int, float, np.bool_, np.number))
+
+
+class _FusionInput(NamedTuple):
+    name: str
+    dtype: np.dtype
+    # index of the argument of the fused function, None for constant
+    arg_index: Optional[int]
+    value: object  # value of constant
+
+
+class _FusionOp(NamedTuple):
+    name: str  # variable name of the result
+    routine: str
+    operands: List[str]  # expressions of operands, already cast to in_dtypes
+    in_dtypes: List[np.dtype]
+    out_dtype: np.dtype
+
+
+class _FusionVariable(NDArrayBase):
+    """
+    Symbolic array given to the function traced by fuse().
+    Ufuncs applied to it are recorded in the history instead of being run.
+    """
+
+    def __init__(
+        self, history: "_FusionHistory", name: str, dtype: np.dtype, weak=None
+    ) -> None:
+        self.history = history
+        self.name = name
+        self.dtype = dtype
+        # value of host scalar argument, None for arrays.
+        # like a scalar given to ufunc, it does not determine the type of the op.
+        self.weak = weak
+        self.array_func = history
+
+
+class _FusionUfuncs:
+    def __init__(self, history: "_FusionHistory") -> None:
+        self._history = history
+
+    def __getattr__(self, name: str):
+        ufunc = getattr(self._history.array_func.ufunc, name)
+        return lambda *args, **kwargs: self._history.call_ufunc(ufunc, args, kwargs)
+
+
+class _FusionHistory:
+    """
+    Records ufunc calls on _FusionVariable.
+    Acts as array_func of _FusionVariable; other than ufunc (e.g. reduction, matmul)
+    is not supported.
+    """
+
+    def __init__(self, array_func) -> None:
+        self.array_func = array_func  # of the backend
+        self.ufunc = _FusionUfuncs(self)
+        self.inputs = []  # type: List[_FusionInput]
+        self.ops = []  # type: List[_FusionOp]
+
+    def __getattr__(self, name: str):
+        raise NotImplementedError(f"fuse: {name} is not supported in fused function")
+
+    def add_input(
+        self,
+        dtype: np.dtype,
+        arg_index: Optional[int],
+        value=None,
+        weak=None,
+    ) -> _FusionVariable:
+        if len(self.inputs) >= len(_INPUT_GENERIC_TYPES):
+            raise NotImplementedError("fuse: too many inputs in fused function")
+        name = f"x{len(self.inputs)}"
+        self.inputs.append(_FusionInput(name, dtype, arg_index, value))
+        return _FusionVariable(self, name, dtype, weak)
+
+    def call_ufunc(self, ufunc, args, kwargs) -> _FusionVariable:
+        if kwargs.pop("out", None) is not None or len(args) != ufunc.nin:
+            raise NotImplementedError(
+                f"fuse: out argument of {ufunc.name} is not supported in fused function"
+            )
+        dtype = kwargs.pop("dtype", None)
+        if len(kwargs) > 0:
+            raise NotImplementedError(
+                f"fuse: arguments {list(kwargs)} of {ufunc.name} are not supported "
+                "in fused function"
+            )
+        in_types = []
+        for arg in args:
+            if isinstance(arg, _FusionVariable):
+                if arg.history is not self:
+                    raise ValueError("fuse: variable of another fused function is used")
+                # weak scalar is resolved by its value, as ufunc does for host scalars
+                in_types.append(arg.weak if arg.weak is not None else arg.dtype)
+            elif _is_host_scalar(arg):
+                in_types.append(arg)
+            else:
+                raise TypeError(
+                    f"fuse: {type(arg)} cannot be used in fused function; "
+                    "pass arrays as arguments"
+                )
+        matched_op, _ = ufunc.resolve_types(
+            in_types, None, np.dtype(dtype) if dtype is not None else None
+        )
+        if matched_op is None:
+            raise TypeError(
+                f"fuse: type assignment of {ufunc.name} failed for "
+                f"input types={in_types}"
+            )
+        operands = []
+        for arg, in_dtype in zip(args, matched_op.in_dtypes):
+            if isinstance(arg, _FusionVariable):
+                operand = arg.name
+                if arg.dtype != in_dtype:
+                    operand = self.array_func.fusion.cast(operand, in_dtype)
+            else:
+                # constant is given to the kernel as scalar input,
+                # typed as the operand of the op
+                operand = self.add_input(
+                    in_dtype, None, in_dtype.type(np.asarray(arg).item())
+                ).name
+            operands.append(operand)
+        name = f"v{len(self.ops)}"
+        self.ops.append(
+            _FusionOp(
+                name,
+                matched_op.routine,
+                operands,
+                matched_op.in_dtypes,
+                matched_op.out_dtype,
+            )
+        )
+        return _FusionVariable(self, name, matched_op.out_dtype)
+
+    def make_operation(self, output: _FusionVariable) -> str:
+        """
+        Generates the operation of ElementwiseKernel which computes output.
+        """
+        return make_fused_operation(self.array_func.fusion, self.ops, output.name)
+
+
+def _referenced_names(expression: str) -> List[str]:
+    return re.findall(r"\b[vx]\d+\b", expression)
+
+
+def _ops_computing(ops: List[_FusionOp], output_name: str) -> List[_FusionOp]:
+    """
+    Ops which output_name depends on, in the original order.
+    """
+    needed = {output_name}
+    used = []
+    for op in reversed(ops):
+        if op.name in needed:
+            used.append(op)
+            for operand in op.operands:
+                needed.update(_referenced_names(operand))
+    return used[::-1]
+
+
+def make_fused_operation(fusion, ops: List[_FusionOp], output_name: str) -> str:
+    """
+    Generates the operation of ElementwiseKernel which runs ops in order and writes
+    output_name to y. Ops which output_name does not depend on are omitted.
+    Each op runs in its own block, so the routine of ufunc can use in0, in1, ...
+    and out0 as is.
+    """
+    operation = ""
+    for op in _ops_computing(ops, output_name):
+        operation += fusion.declare_variable(op.name, op.out_dtype)
+        operation += "{\n"
+        for i, (operand, in_dtype) in enumerate(zip(op.operands, op.in_dtypes)):
+            operation += fusion.declare_variable(f"in{i}", in_dtype, operand)
+        operation += fusion.declare_variable("out0", op.out_dtype)
+        operation += f"{op.routine};\n"
+        operation += f"{op.name} = out0;\n"
+        operation += "}\n"
+    operation += f"y = {output_name}"
+    return operation
+
+
+def _scalar_signature(x) -> tuple:
+    """
+    Properties of a host scalar which determine the ops chosen for it by ufuncs.
+    Value-based casting of an int depends on the integer types which can hold it.
+    """
+    value = np.asarray(x).item()
+    if isinstance(value, bool):
+        return (bool,)
+    if isinstance(value, int):
+        return (
+            int,
+            tuple(
+                char
+                for char in np.typecodes["AllInteger"]
+                if np.iinfo(char).min <= value <= np.iinfo(char).max
+            ),
+        )
+    return (float,)
+
+
+class _FusedKernel:
+    def __init__(
+        self,
+        inputs: List[_FusionInput],
+        kernels: List[Tuple[object, List[int], np.dtype]],
+        return_tuple: bool,
+    ) -> None:
+        self.inputs = inputs
+        # [(ElementwiseKernel, indices of inputs used by the kernel, out_dtype)]
+        self.kernels = kernels
+        self.return_tuple = return_tuple
+
+    def __call__(self, args) -> Union[ndarray, Tuple[ndarray, ...]]:
+        in_arrays = []
+        bound_buffers = set()
+        for fusion_input in self.inputs:
+            if fusion_input.arg_index is None:
+                in_arrays.append(fusion_input.value)
+                continue
+            arg = args[fusion_input.arg_index]
+            if isinstance(arg, ndarray):
+                # Cannot assign the same texture as multiple inputs in WebGL
+                if id(arg.buffer) in bound_buffers:
+                    arg = arg.copy()
+                bound_buffers.add(id(arg.buffer))
+            in_arrays.append(arg)
+        # all array arguments determine the shape, even if an output does not use them
+        result_shape = np.broadcast_shapes(
+            *[array.shape for array in in_arrays if isinstance(array, ndarray)]
+        )
+        outs = []
+        for kernel, input_indices, out_dtype in self.kernels:
+            out = ndarray(result_shape, out_dtype)
+            kernel(*[in_arrays[i] for i in input_indices], out)
+            outs.append(out)
+        if self.return_tuple:
+            return tuple(outs)
+        return outs[0]
+
+
+class Fusion:
+    """
+    Function decorated by fuse().
+    The function is traced with symbolic arrays for each signature (dtypes of array
+    arguments and types of scalar arguments), and the ufuncs in it are fused into
+    one ElementwiseKernel per return value.
+    The kernel of each return value runs only the ufuncs which the value depends on.
+    """
+
+    def __init__(self, func: Callable, name: str) -> None:
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = re.sub("[^a-zA-Z0-9_]", "_", name)
+        self._fused_kernels = {}  # signature -> _FusedKernel
+
+    def __call__(self, *args, **kwargs):
+        # keyword arguments follow the positional ones, in the order of their names
+        keywords = tuple(sorted(kwargs))
+        values = args + tuple(kwargs[k] for k in keywords)
+        array_func = None
+        for value in values:
+            if isinstance(value, ndarray):
+                array_func = value.array_func
+                break
+        if array_func is None:
+            # no GPU array (e.g. called with numpy arrays)
+            return self.func(*args, **kwargs)
+        signature = [keywords]
+        for i, value in enumerate(values):
+            if isinstance(value, ndarray):
+                signature.append(("array", value.dtype))
+            elif _is_host_scalar(value):
+                signature.append(
+                    (
+                        "scalar",
+                        array_func.fusion.default_scalar_dtype(value),
+                        _scalar_signature(value),
+                    )
+                )
+            else:
+                try:
+                    hash(value)
+                except TypeError:
+                    key = keywords[i - len(args)] if i >= len(args) else i
+                    raise TypeError(
+                        f"fuse: argument {key} of type {type(value).__name__} is not "
+                        "hashable; arguments other than arrays and scalars must be "
+                        "hashable, as they select the fused kernel"
+                    ) from None
+                signature.append(("object", value))
+        signature = tuple(signature)
+        fused_kernel = self._fused_kernels.get(signature)
+        if fused_kernel is None:
+            fused_kernel = self._trace(array_func, values, keywords)
+            self._fused_kernels[signature] = fused_kernel
+        return fused_kernel(values)
+
+    def _trace(self, array_func, values, keywords) -> _FusedKernel:
+        history = _FusionHistory(array_func)
+        trace_values = []
+        for i, value in enumerate(values):
+            if isinstance(value, ndarray):
+                trace_values.append(history.add_input(value.dtype, i))
+            elif _is_host_scalar(value):
+                # the signature has the scalar properties used by type resolution,
+                # so the value of this call represents the other calls
+                trace_values.append(
+                    history.add_input(
+                        array_func.fusion.default_scalar_dtype(value),
+                        i,
+                        weak=np.asarray(value).item(),
+                    )
+                )
+            else:
+                trace_values.append(value)
+        n_positional = len(values) - len(keywords)
+        result = self.func(
+            *trace_values[:n_positional],
+            **dict(zip(keywords, trace_values[n_positional:])),
+        )
+        return_tuple = isinstance(result, tuple)
+        outputs = result if return_tuple else (result,)
+        kernels = []
+        for output in outputs:
+            if not isinstance(output, _FusionVariable):
+                raise NotImplementedError(
+                    "fuse: fused function must return arrays computed from the "
+                    f"arguments, not {type(output)}"
+                )
+            # inputs which the output depends on
+            used_names = {output.name}
+            for op in _ops_computing(history.ops, output.name):
+                for operand in op.operands:
+                    used_names.update(_referenced_names(operand))
+            input_indices = [
+                i
+                for i, fusion_input in enumerate(history.inputs)
+                if fusion_input.name in used_names
+            ]
+            in_params = ",".join(
+                f"{_INPUT_GENERIC_TYPES[i]} {history.inputs[i].name}"
+                for i in input_indices
+            )
+            kernel = array_func.fusion.ElementwiseKernel(
+                in_params=in_params,
+                out_params="Z y",
+                operation=history.make_operation(output),
+                name=f"fused_{self.name}",
+            )
+            kernels.append((kernel, input_indices, output.dtype))
+        return _FusedKernel(history.inputs, kernels, return_tuple)
@@ -0,0 +1,722 @@
+from typing import List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from wgpy import lazy_evaluation
+from wgpy.common.shape_util import calculate_c_contiguous_strides, normalize_axis
+from wgpy.construct import asarray
+from wgpy_backends.runtime.ndarray import ndarray
+
+# generic type of each index array given to the gather kernel.
+# "X" is used for the source array and "N" for the extents of the indexed dims.
+_INDEX_GENERIC_TYPES = "ABCDEFGHIJKLMOPQRSTUVW"
+
+_kernels = {}  # (in_params, out_params, operation) -> ElementwiseKernel
+
+
+class _AdvancedIndex(NamedTuple):
+    # array selected by basic indices (slices and newaxis); each of its dims is indexed
+    # by either a dim of the result or an index array
+    view: ndarray
+    # shape of the result
+    shape: Tuple[int, ...]
+    # for each dim of view: dim of the result, or None if indexed by an index array
+    out_dims: List[Optional[int]]
+    # for each dim of view: index array broadcast to shape, host int (already
+    # normalized), or None
+    indices: List[Union[ndarray, int, None]]
+
+
+def _check_index_dtype(dtype: np.dtype):
+    if dtype.kind not in "iu":
+        raise IndexError("arrays used as indices must be of integer (or boolean) type")
+
+
+def _upload_host_index(idx: np.ndarray, extent: int, axis: int) -> Union[ndarray, int]:
+    # index on host is bounds-checked like numpy, and normalized before upload
+    _check_index_dtype(idx.dtype)
+    out_of_bounds = (idx < -extent) | (idx >= extent)
+    if np.any(out_of_bounds):
+        raise IndexError(
+            f"index {idx[out_of_bounds].flat[0]} is out of bounds for axis {axis}"
+            f" with size {extent}"
+        )
+    idx = np.where(idx < 0, idx + extent, idx).astype(np.int32)
+    if idx.ndim == 0:
+        # passed to the kernel as scalar, without uploading
+        return int(idx)
+    return asarray(idx)
+
+
+def _broadcast_index(
+    idx: Union[ndarray, int], shape: Tuple[int, ...], dims: List[int]
+) -> Union[ndarray, int]:
+    """
+    Makes a view of index array whose dims are placed at dims of shape, other dims are
+    broadcast.
+    """
+    if not isinstance(idx, ndarray):
+        return idx
+    idx = idx.broadcast_to(tuple(shape[d] for d in dims))
+    strides = [0] * len(shape)
+    for d, stride in zip(dims, idx.strides):
+        strides[d] = stride
+    return idx.get_view(shape, idx.dtype, tuple(strides), idx.offset)
+
+
+def _is_mask(idx) -> bool:
+    return isinstance(idx, (np.ndarray, ndarray)) and idx.dtype == np.bool_
+
+
+def _check_mask_shape(a: ndarray, mask, axis: int):
+    """
+    Boolean mask must have the shape of the axes of a which it indexes.
+    """
+    for d in range(mask.ndim):
+        if axis + d >= a.ndim:
+            raise IndexError(
+                f"too many indices for array: array is {a.ndim}-dimensional"
+            )
+        if mask.shape[d] != a.shape[axis + d]:
+            raise IndexError(
+                f"boolean index did not match indexed array along axis {axis + d}; "
+                f"size of axis is {a.shape[axis + d]} "
+                f"but size of corresponding boolean axis is {mask.shape[d]}"
+            )
+
+
+def _expand_index(a: ndarray, idxs) -> list:
+    if not isinstance(idxs, tuple):
+        idxs = (idxs,)
+    converted = []
+    n_axes = []  # number of axes of a consumed by each index
+    for idx in idxs:
+        if isinstance(idx, list):
+            # empty list is an integer index, not float
+            idx = np.asarray(idx) if len(idx) > 0 else np.zeros((0,), dtype=np.int32)
+        converted.append(idx)
+        if _is_mask(idx):
+            n_axes.append(idx.ndim)
+        elif idx is None or idx is Ellipsis:
+            n_axes.append(0)
+        else:
+            n_axes.append(1)
+    n_ellipsis_axes = max(a.ndim - sum(n_axes), 0)
+    axis = 0
+    items = []
+    for idx, n in zip(converted, n_axes):
+        if isinstance(idx, (bool, np.bool_)) or (_is_mask(idx) and idx.ndim == 0):
+            raise NotImplementedError("0-dimensional boolean index is not supported")
+        if _is_mask(idx):
+            _check_mask_shape(a, idx, axis)
+        axis += n_ellipsis_axes if idx is Ellipsis else n
+        if isinstance(idx, ndarray) and idx.dtype == np.bool_:
+            # compacted on GPU; only the number of selected elements is read back
+            items.extend(nonzero(idx))
+        elif isinstance(idx, np.ndarray) and idx.dtype == np.bool_:
+            items.extend(np.nonzero(idx))
+        elif isinstance(idx, (int, np.integer)):
+            # combined with index arrays, integer is an index array of shape ()
+            items.append(np.asarray(idx))
+        elif (
+            idx is None
+            or idx is Ellipsis
+            or isinstance(idx, (slice, np.ndarray, ndarray))
+        ):
+            items.append(idx)
+        else:
+            raise IndexError(
+                "only integers, slices (`:`), ellipsis (`...`), numpy.newaxis (`None`)"
+                " and integer or boolean arrays are valid indices"
+            )
+    return items
+
+
+def _parse_index(a: ndarray, idxs) -> _AdvancedIndex:
+    """
+    Parses index which contains index arrays, following the rule of numpy's advanced
+    indexing.
+    """
+    items = _expand_index(a, idxs)
+    n_ellipsis = sum(1 for idx in items if idx is Ellipsis)
+    if n_ellipsis > 1:
+        raise IndexError("an index can only have a single ellipsis ('...')")
+    n_consumed = sum(1 for idx in items if idx is not None and idx is not Ellipsis)
+    if n_consumed > a.ndim:
+        raise IndexError(
+            f"too many indices for array: array is {a.ndim}-dimensional,"
+            f" but {n_consumed} were indexed"
+        )
+    if n_ellipsis == 1:
+        pos = items.index(Ellipsis)
+        items[pos : pos + 1] = [slice(None)] * (a.ndim - n_consumed)
+    else:
+        items.extend([slice(None)] * (a.ndim - n_consumed))
+
+    # slices and newaxis are applied as view; index arrays select dims of the view
+    basic_idxs = []
+    advanced = []  # (dim of view, axis of a, index)
+    axis = 0
+    for idx in items:
+        if idx is None:
+            basic_idxs.append(None)
+            continue
+        if not isinstance(idx, slice):
+            advanced.append((len(basic_idxs), axis, idx))
+            idx = slice(None)
+        basic_idxs.append(idx)
+        axis += 1
+    view = a[tuple(basic_idxs)]
+
+    index_values = []
+    for view_dim, axis, idx in advanced:
+        if isinstance(idx, ndarray):
+            _check_index_dtype(idx.dtype)
+            index_values.append(idx)
+        else:
+            index_values.append(_upload_host_index(idx, view.shape[view_dim], axis))
+    broadcast_shape = np.broadcast_shapes(
+        *[np.shape(idx) if isinstance(idx, int) else idx.shape for idx in index_values]
+    )
+
+    advanced_dims = [view_dim for view_dim, _, _ in advanced]
+    rest_dims = [d for d in range(view.ndim) if d not in advanced_dims]
+    if len(advanced_dims) > 0 and advanced_dims == list(
+        range(advanced_dims[0], advanced_dims[-1] + 1)
+    ):
+        # adjacent index arrays: dims of the broadcast index replace them
+        first = advanced_dims[0]
+    else:
+        # dims of the broadcast index come first
+        first = 0
+    shape = []  # type: List[int]
+    out_dims = [None] * view.ndim  # type: List[Optional[int]]
+    for d in rest_dims:
+        if len(shape) == first:
+            shape.extend(broadcast_shape)
+        out_dims[d] = len(shape)
+        shape.append(view.shape[d])
+    if len(shape) == first:
+        shape.extend(broadcast_shape)
+    shape = tuple(shape)
+
+    broadcast_dims = list(range(first, first + len(broadcast_shape)))
+    indices = [None] * view.ndim  # type: List[Union[ndarray, int, None]]
+    for view_dim, idx in zip(advanced_dims, index_values):
+        indices[view_dim] = _broadcast_index(idx, shape, broadcast_dims)
+    return _AdvancedIndex(view, shape, out_dims, indices)
+
+
+def _get_kernel(fusion, in_params: str, out_params: str, operation: str, name: str):
+    kernel = _kernels.get((in_params, out_params, operation))
+    if kernel is None:
+        kernel = fusion.ElementwiseKernel(
+            in_params=in_params,
+            out_params=out_params,
+            operation=operation,
+            name=name,
+        )
+        _kernels[(in_params, out_params, operation)] = kernel
+    return kernel
+
+
+class _IndexCode(NamedTuple):
+    in_params: List[str]
+    args: List[object]
+    operation: str
+    # expression of the index into each dim of the view
+    src_idxs: List[str]
+
+
+def _make_index_code(index: _AdvancedIndex, bound_buffers: set) -> _IndexCode:
+    """
+    Generates the code which computes the index into each dim of index.view,
+    for the element of the result whose index is _y_0, _y_1, ... (output param must be
+    named y).
+    Index arrays on GPU are not bounds-checked; negative indices count from the end,
+    and indices still out of range are clipped.
+    """
+    view = index.view
+    fusion = view.array_func.fusion
+    int32 = np.dtype(np.int32)
+    in_params = []  # type: List[str]
+    args = []  # type: List[object]
+    operation = ""
+    extents = []  # type: List[int]
+    src_idxs = []  # type: List[str]
+    for d, (out_dim, idx) in enumerate(zip(index.out_dims, index.indices)):
+        if idx is None:
+            # output index of dim d is available as _y_d in the kernel
+            src_idxs.append(f"_y_{out_dim}")
+            continue
+        if view.shape[d] == 0:
+            raise IndexError("cannot do a non-empty take from an empty axes.")
+        n = len(extents)
+        if n >= len(_INDEX_GENERIC_TYPES):
+            raise NotImplementedError("too many index arrays")
+        if isinstance(idx, ndarray):
+            # Cannot assign the same texture as multiple inputs in WebGL
+            if id(idx.buffer) in bound_buffers:
+                idx = idx.copy()
+            bound_buffers.add(id(idx.buffer))
+        in_params.append(f"{_INDEX_GENERIC_TYPES[n]} k{n}")
+        args.append(idx)
+        extents.append(view.shape[d])
+        operation += fusion.declare_variable(
+            f"j{n}", int32, fusion.cast(f"k{n}", int32)
+        )
+        operation += f"if (j{n} < 0) {{ j{n} += n{n}; }}\n"
+        operation += f"j{n} = clamp(j{n}, 0, n{n} - 1);\n"
+        src_idxs.append(f"j{n}")
+    in_params.extend(f"N n{n}" for n in range(len(extents)))
+    args.extend(extents)
+    return _IndexCode(in_params, args, operation, src_idxs)
+
+
+def _gather(index: _AdvancedIndex, out: Optional[ndarray] = None) -> ndarray:
+    """
+    Reads the elements selected by index into a new array (or out) in one kernel.
+    """
+    view = index.view
+    if out is None:
+        out = ndarray(index.shape, view.dtype)
+    else:
+        if out.shape != index.shape or out.dtype != view.dtype:
+            raise ValueError(
+                f"output array must have shape {index.shape} and dtype {view.dtype}"
+            )
+        from wgpy import lazy_evaluation
+
+        lazy_evaluation.before_write(out)
+    if out.size == 0:
+        return out
+    code = _make_index_code(index, {id(view.buffer)})
+    kernel = _get_kernel(
+        view.array_func.fusion,
+        ",".join(["rawnd X x"] + code.in_params),
+        "X y",
+        f"{code.operation}y = x({','.join(code.src_idxs)})",
+        "gather",
+    )
+    kernel(view, *code.args, out)
+    return out
+
+
+def _sort_by_key(keys: ndarray) -> ndarray:
+    """
+    Returns the permutation which sorts the flattened keys in ascending order by bitonic
+    sort. Ties are ordered by position, so the result is deterministic.
+    The permutation is padded to a power of two; the padding follows the keys.size valid
+    entries.
+    """
+    fusion = keys.array_func.fusion
+    int32 = np.dtype(np.int32)
+    bool_ = np.dtype(np.bool_)
+    m = keys.size
+    size = 1
+    while size < m:
+        size *= 2
+    operation = (
+        fusion.declare_variable("a", int32, "_y_0")
+        + fusion.declare_variable("b", int32, "a ^ j")
+        + fusion.declare_variable("pa", int32, fusion.cast("p(a)", int32))
+        + fusion.declare_variable("pb", int32, fusion.cast("p(b)", int32))
+        + fusion.declare_variable(
+            "ka", int32, fusion.cast("keys(min(pa, m - 1))", int32)
+        )
+        + fusion.declare_variable(
+            "kb", int32, fusion.cast("keys(min(pb, m - 1))", int32)
+        )
+        # whether the entry at b comes before the entry at a
+        + fusion.declare_variable("b_first", bool_, "pb < pa")
+        + "if ((pa < m) && (pb < m)) {\n"
+        + "b_first = (kb < ka) || ((kb == ka) && (pb < pa));\n"
+        + "}\n"
+        + "else if (pa < m) { b_first = false; }\n"
+        + "else if (pb < m) { b_first = true; }\n"
+        + fusion.declare_variable("keep_min", bool_, "((a & k) == 0) == (a < b)")
+        + f"y = pa + (pb - pa) * {fusion.cast('keep_min == b_first', int32)}"
+    )
+    kernel = _get_kernel(
+        fusion, "raw I p, raw K keys, N m, N j, N k", "I y", operation, "bitonic_sort"
+    )
+    perm = asarray(np.arange(size, dtype=np.int32))
+    k = 2
+    while k <= size:
+        j = k // 2
+        while j > 0:
+            # all inputs are raw or scalar, so the output determines the shape
+            perm = kernel(perm, keys, m, j, k, ndarray((size,), int32))
+            j //= 2
+        k *= 2
+    return perm
+
+
+def _scatter_sorted(op, index: _AdvancedIndex, value):
+    """
+    Applies the routine of op to the elements selected by index, in the order of the
+    index like numpy.
+    The selected positions are sorted, and each element of the destination reduces its
+    run of values.
+    Only gather kernels are used, so it also works on WebGL.
+    """
+    view = index.view
+    fusion = view.array_func.fusion
+    int32 = np.dtype(np.int32)
+    view_strides = calculate_c_contiguous_strides(view.shape, 1)
+    # position of each selected element in view, as c-contiguous index
+    code = _make_index_code(index, {id(view.buffer)})
+    position = " + ".join(
+        f"{src_idx} * c{d}" for d, src_idx in enumerate(code.src_idxs)
+    )
+    key_kernel = _get_kernel(
+        fusion,
+        ",".join(code.in_params + [f"N c{d}" for d in range(view.ndim)]),
+        "N y",
+        f"{code.operation}y = {position or '0'}",
+        "scatter_key",
+    )
+    keys = ndarray(index.shape, int32)
+    key_kernel(*code.args, *view_strides, keys)
+    perm = _sort_by_key(keys)
+
+    in_params = ["X x", "raw I p", "raw I keys"]
+    args = [view, perm, keys]  # type: List[object]
+    if value is None:
+        value_expr = None
+    elif isinstance(value, ndarray):
+        # Cannot assign the same texture as multiple inputs in WebGL
+        if value.buffer is view.buffer:
+            value = value.copy()
+        in_params.append("raw V v")
+        args.append(value)
+        value_expr = "v(r)"
+    else:
+        in_params.append("V v")
+        args.append(value)
+        value_expr = "v"
+    in_params.append("N m")
+    args.append(keys.size)
+    in_params.extend(f"N c{d}" for d in range(view.ndim))
+    args.extend(view_strides)
+    position = " + ".join(f"_y_{d} * c{d}" for d in range(view.ndim))
+    operation = fusion.declare_variable("e", int32, position or "0")
+    # first entry of the run of e
+    operation += fusion.declare_variable("lo", int32, "0")
+    operation += fusion.declare_variable("hi", int32, "m")
+    operation += "while (lo < hi) {\n"
+    operation += fusion.declare_variable("mid", int32, "(lo + hi) / 2")
+    operation += "if (keys(p(mid)) < e) { lo = mid + 1; } else { hi = mid; }\n"
+    operation += "}\n"
+    operation += fusion.declare_variable("acc", view.dtype, "x")
+    operation += "while (lo < m) {\n"
+    operation += fusion.declare_variable("r", int32, fusion.cast("p(lo)", int32))
+    operation += "if (keys(r) != e) { break; }\n"
+    operation += "{\n"
+    operation += fusion.declare_variable("in0", op.in_dtypes[0], "acc")
+    if value_expr is not None:
+        operation += fusion.declare_variable("in1", op.in_dtypes[1], value_expr)
+    operation += fusion.declare_variable("out0", op.out_dtype)
+    operation += f"{op.routine};\n"
+    operation += "acc = out0;\n"
+    operation += "}\n"
+    operation += "lo = lo + 1;\n"
+    operation += "}\n"
+    operation += "y = acc"
+    kernel = _get_kernel(
+        fusion, ",".join(in_params), "X y", operation, "scatter_reduce"
+    )
+    view._assign(kernel(*args))
+
+
+# ufunc name => atomic operation
+_ATOMIC_OPS = {
+    "add": "add",
+    "maximum": "max",
+    "fmax": "max",
+    "minimum": "min",
+    "fmin": "min",
+}
+
+
+def ufunc_at(ufunc, a: ndarray, indices, b=None, deterministic: bool = False):
+    """
+    Implementation of ufunc.at: performs ufunc on the elements of a selected by
+    indices, in place.
+    Unlike a[indices] = ufunc(a[indices], b), the operation is accumulated for duplicate
+    indices.
+    On WebGPU, add, maximum and minimum of float32 and int32 use atomic operations.
+    Otherwise (or for float32 add with deterministic=True, whose result depends on the
+    order of additions), the selected elements are sorted by position and applied in
+    the order of the index, like numpy.
+    """
+    if ufunc.nin != (1 if b is None else 2):
+        raise ValueError(f"{ufunc.name}.at takes {ufunc.nin} operands")
+    if isinstance(b, (list, np.ndarray)) and np.ndim(b) > 0:
+        b = asarray(np.asarray(b))
+    in_types = [a.dtype]
+    if b is not None:
+        in_types.append(b.dtype if isinstance(b, ndarray) else b)
+    op, _ = ufunc.resolve_types(in_types)
+    if op is None or op.in_dtypes[0] != a.dtype or op.out_dtype != a.dtype:
+        raise TypeError(f"{ufunc.name}.at is not supported for dtype {a.dtype}")
+    index = _parse_index(a, indices)
+    if b is not None:
+        if isinstance(b, ndarray):
+            if np.broadcast_shapes(b.shape, index.shape) != index.shape:
+                raise ValueError(
+                    f"could not broadcast value array from shape {b.shape}"
+                    f" into shape {index.shape}"
+                )
+            if b.dtype != op.in_dtypes[1]:
+                b = b.astype(op.in_dtypes[1])
+            b = b.broadcast_to(index.shape)
+        else:
+            b = op.in_dtypes[1].type(np.asarray(b).item())
+    if all(idx is None for idx in index.indices):
+        # no index array, so no duplicate
+        ufunc(index.view, *([] if b is None else [b]), out=index.view)
+        return
+    lazy_evaluation.before_write(a)
+    if int(np.prod(index.shape)) == 0:
+        return
+    atomic_op = _ATOMIC_OPS.get(ufunc.name)
+    if (
+        atomic_op is not None
+        and not (deterministic and atomic_op == "add" and a.dtype.kind == "f")
+        and a.array_func.scatter_atomic(
+            atomic_op,
+            index.view,
+            index.shape,
+            index.out_dims,
+            index.indices,
+            b,
+        )
+    ):
+        return
+    _scatter_sorted(op, index, b)
+
+
+def scatter_add(a: ndarray, slices, value, deterministic: bool = False):
+    """
+    a[slices] += value, accumulating for duplicate indices.
+    """
+    ufunc_at(a.array_func.ufunc.add, a, slices, value, deterministic)
+
+
+def getitem_advanced(a: ndarray, idxs) -> ndarray:
+    """
+    a[idxs] where idxs contains index arrays (integer or boolean).
+    """
+    return _gather(_parse_index(a, idxs))
+
+
+class _AssignOp(NamedTuple):
+    # same fields as the op resolved by ufunc, as used by _scatter_sorted
+    routine: str
+    in_dtypes: List[np.dtype]
+    out_dtype: np.dtype
+
+
+def setitem_advanced(a: ndarray, idxs, value):
+    """
+    a[idxs] = value where idxs contains index arrays (integer or boolean).
+    For duplicate indices, the last value is assigned like numpy.
+    """
+    fusion = a.array_func.fusion
+    if isinstance(value, (list, np.ndarray)):
+        value = asarray(np.asarray(value).astype(a.dtype))
+    if (
+        isinstance(idxs, ndarray)
+        and idxs.dtype == np.bool_
+        and idxs.shape == a.shape
+        and not (isinstance(value, ndarray) and value.ndim > 0)
+    ):
+        # filling by a mask of the same shape is a select, without compaction
+        if isinstance(value, ndarray):
+            if value.dtype != a.dtype:
+                value = value.astype(a.dtype)
+            if value.buffer is a.buffer:
+                value = value.copy()
+        else:
+            value = a.dtype.type(value)
+        mask = idxs.copy() if idxs.buffer is a.buffer else idxs
+        kernel = _get_kernel(
+            fusion,
+            "X x, B m, X v",
+            "X y",
+            f"y = {fusion.select(fusion.cast('m', np.dtype(np.bool_)), 'v', 'x')}",
+            "mask_fill",
+        )
+        a._assign(kernel(a, mask, value))
+        return
+    index = _parse_index(a, idxs)
+    if isinstance(value, ndarray):
+        if np.broadcast_shapes(value.shape, index.shape) != index.shape:
+            raise ValueError(
+                f"could not broadcast input array from shape {value.shape}"
+                f" into shape {index.shape}"
+            )
+        if value.dtype != a.dtype:
+            value = value.astype(a.dtype)
+        value = value.broadcast_to(index.shape)
+    else:
+        value = a.dtype.type(value)
+    if all(idx is None for idx in index.indices):
+        index.view._assign(value)
+        return
+    lazy_evaluation.before_write(a)
+    if int(np.prod(index.shape)) == 0:
+        return
+    _scatter_sorted(_AssignOp("out0 = in1", [a.dtype, a.dtype], a.dtype), index, value)
+
+
+def _scan(flags: ndarray) -> ndarray:
+    """
+    Inclusive prefix sum of 1-dim int32 array, by log2(size) passes of gather kernel
+    (Hillis-Steele scan).
+    """
+    fusion = flags.array_func.fusion
+    int32 = np.dtype(np.int32)
+    kernel = _get_kernel(
+        fusion,
+        "raw A x, N d",
+        "A y",
+        fusion.declare_variable("s", int32, fusion.cast("x(_y_0)", int32))
+        + f"if (_y_0 >= d) {{ s += {fusion.cast('x(_y_0 - d)', int32)}; }}\n"
+        + "y = s",
+        "scan",
+    )
+    n = flags.size
+    d = 1
+    while d < n:
+        # all inputs are raw or scalar, so the output determines the shape
+        flags = kernel(flags, d, ndarray((n,), int32))
+        d *= 2
+    return flags
+
+
+def _compact_indices(a: ndarray) -> ndarray:
+    """
+    Flat (c-order) indices of the nonzero elements of a, computed on GPU by prefix sum.
+    Only the number of nonzero elements is read back.
+    """
+    fusion = a.array_func.fusion
+    int32 = np.dtype(np.int32)
+    bool_ = np.dtype(np.bool_)
+    n = a.size
+    if n == 0:
+        return ndarray((0,), int32)
+    flag_kernel = _get_kernel(
+        fusion,
+        "T x",
+        "I y",
+        f"y = {fusion.cast(fusion.cast('x', bool_), int32)}",
+        "nonzero_flag",
+    )
+    flags = ndarray(a.shape, int32)
+    flag_kernel(a, flags)
+    scan = _scan(flags.ravel())
+    count = int(scan[n - 1])
+    out = ndarray((count,), int32)
+    if count == 0:
+        return out
+    # the q-th nonzero element is the first position whose prefix sum exceeds q
+    operation = (
+        fusion.declare_variable("lo", int32, "0")
+        + fusion.declare_variable("hi", int32, "n - 1")
+        + "while (lo < hi) {\n"
+        + fusion.declare_variable("mid", int32, "(lo + hi) / 2")
+        + f"if ({fusion.cast('s(mid)', int32)} <= _y_0) {{ lo = mid + 1; }}\n"
+        + "else { hi = mid; }\n"
+        + "}\n"
+        + "y = lo"
+    )
+    kernel = _get_kernel(fusion, "raw A s, N n", "A y", operation, "compact")
+    kernel(scan, n, out)
+    return out
+
+
+def nonzero(a: ndarray) -> Tuple[ndarray, ...]:
+    """
+    Indices of the nonzero elements, for each dim. The indices are computed on GPU.
+    """
+    if a.ndim == 0:
+        raise ValueError("Calling nonzero on 0d arrays is not allowed.")
+    flat = _compact_indices(a)
+    if a.ndim == 1:
+        return (flat,)
+    if flat.size == 0:
+        return tuple(ndarray((0,), flat.dtype) for _ in range(a.ndim))
+    kernel = _get_kernel(
+        a.array_func.fusion, "A f, N c, N s", "A y", "y = (f / c) % s", "unravel_index"
+    )
+    strides = calculate_c_contiguous_strides(a.shape, 1)
+    return tuple(kernel(flat, strides[d], a.shape[d]) for d in range(a.ndim))
+
+
+def flatnonzero(a: ndarray) -> ndarray:
+    return _compact_indices(a)
+
+
+def take(a: ndarray, indices, axis: Optional[int] = None, out=None) -> ndarray:
+    if axis is None:
+        a = a.ravel()
+        axis = 0
+    else:
+        axis = normalize_axis(axis, a.ndim)
+    if isinstance(indices, (int, np.integer, list)):
+        indices = np.asarray(indices)
+    if indices.dtype == np.bool_:
+        # not a mask, but 0 and 1
+        indices = indices.astype(np.int32)
+    return _gather(_parse_index(a, (slice(None),) * axis + (indices,)), out)
+
+
+def argsort(a: ndarray, axis: Optional[int] = -1, kind=None) -> ndarray:
+    """
+    Returns the indices (int32) which sort a in ascending order.
+    The sort is stable for any kind: equal elements keep their order.
+    Only integer and bool arrays are supported, sorted along the only axis or
+    flattened (axis=None).
+    """
+    if a.dtype.kind not in "biu":
+        raise NotImplementedError("argsort: only integer and bool arrays are supported")
+    if axis is None or a.ndim == 0:
+        a = a.ravel()
+    elif a.ndim > 1:
+        raise NotImplementedError("argsort: only 1-dim array or axis=None is supported")
+    else:
+        normalize_axis(axis, a.ndim)
+    return _sort_by_key(a)[: a.size]
+
+
+def take_along_axis(a: ndarray, indices, axis: Optional[int]) -> ndarray:
+    if axis is None:
+        a = a.ravel()
+        axis = 0
+    if isinstance(indices, list):
+        indices = np.asarray(indices)
+    if indices.ndim != a.ndim:
+        raise ValueError("`indices` and `arr` must have the same number of dimensions")
+    axis = normalize_axis(axis, a.ndim)
+    shape = np.broadcast_shapes(
+        tuple(1 if d == axis else a.shape[d] for d in range(a.ndim)), indices.shape
+    )
+    # dims of a other than axis are broadcast to shape, and indexed by the dims of the
+    # result
+    view_shape = tuple(a.shape[d] if d == axis else shape[d] for d in range(a.ndim))
+    view_strides = tuple(
+        0 if d != axis and a.shape[d] == 1 else a.strides[d] for d in range(a.ndim)
+    )
+    view = a.get_view(view_shape, a.dtype, view_strides, a.offset)
+    if isinstance(indices, ndarray):
+        _check_index_dtype(indices.dtype)
+    else:
+        indices = _upload_host_index(np.asarray(indices), a.shape[axis], axis)
+    out_dims = list(range(a.ndim))  # type: List[Optional[int]]
+    out_dims[axis] = None
+    idxs = [None] * a.ndim  # type: List[Union[ndarray, int, None]]
+    idxs[axis] = _broadcast_index(indices, shape, list(range(a.ndim)))
+    return _gather(_AdvancedIndex(view, shape, out_dims, idxs))
+
+
+__all__ = ["take", "take_along_axis", "argsort", "nonzero", "flatnonzero"]
@@ -0,0 +1,295 @@
+import weakref
+from typing import List, Optional
+import numpy as np
+from wgpy.fusion import _INPUT_GENERIC_TYPES, _FusionOp, make_fused_operation
+from wgpy_backends.runtime.ndarray import ndarray
+
+# Upper bound of ops fused into one kernel.
+# Operands of larger expressions are evaluated first.
+_MAX_OPS = 128
+# Dead references in the pending list are removed when it grows beyond this length.
+_PRUNE_THRESHOLD = 1024
+
+_global_mode = False
+_scope_depth = 0
+_evaluating = False
+_pending = []  # type: List[weakref.ref]
+_kernels = {}  # (in_params, operation) -> ElementwiseKernel
+
+
+def is_enabled() -> bool:
+    return (_global_mode or _scope_depth > 0) and not _evaluating
+
+
+def set_global_mode(enabled: bool):
+    global _global_mode
+    _global_mode = enabled
+    if not enabled:
+        flush()
+
+
+class LazyScope:
+    """
+    Context manager returned by wgpy.lazy().
+    Arrays still pending at the end of the block are evaluated.
+    """
+
+    def __enter__(self) -> "LazyScope":
+        global _scope_depth
+        _scope_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _scope_depth
+        _scope_depth -= 1
+        if exc_type is None:
+            flush()
+        return False
+
+
+class _KernelBuilder:
+    """
+    Collects the inputs and ops of the expression DAG into a fused ElementwiseKernel.
+    Identical inputs and identical ops on identical operands are merged
+    (common subexpression elimination).
+    """
+
+    def __init__(self) -> None:
+        self.inputs = []  # type: List[object]
+        self.ops = []  # type: List[_FusionOp]
+        # key of input or op -> variable name in the kernel
+        self._input_names = {}
+        self._op_names = {}
+        self._expr_names = {}  # id of LazyExpr -> variable name
+
+    def add_operand(self, operand) -> str:
+        if isinstance(operand, ndarray):
+            if operand._lazy is not None:
+                return self.add_expr(operand._lazy)
+            key = (
+                "array",
+                id(operand.buffer),
+                operand.offset,
+                operand.strides,
+                operand.shape,
+                operand.dtype,
+            )
+        else:
+            key = ("scalar", operand.dtype, operand.item())
+        name = self._input_names.get(key)
+        if name is None:
+            name = f"x{len(self.inputs)}"
+            self._input_names[key] = name
+            self.inputs.append(operand)
+        return name
+
+    def add_expr(self, expr: "LazyExpr") -> str:
+        name = self._expr_names.get(id(expr))
+        if name is not None:
+            return name
+        operand_names = [self.add_operand(operand) for operand in expr.operands]
+        key = (
+            expr.routine,
+            tuple(expr.in_dtypes),
+            expr.out_dtype,
+            tuple(operand_names),
+        )
+        name = self._op_names.get(key)
+        if name is None:
+            name = f"v{len(self.ops)}"
+            self._op_names[key] = name
+            self.ops.append(
+                _FusionOp(
+                    name, expr.routine, operand_names, expr.in_dtypes, expr.out_dtype
+                )
+            )
+        self._expr_names[id(expr)] = name
+        return name
+
+
+class LazyExpr:
+    """
+    Node of the expression DAG: elementwise op whose operands are arrays
+    (which may be pending) or typed scalars.
+    n_ops and n_inputs are upper bounds of the size of the fused kernel;
+    shared subexpressions may be counted twice.
+    """
+
+    def __init__(
+        self,
+        array_func,
+        routine: str,
+        operands: List[object],
+        in_dtypes: List[np.dtype],
+        out_dtype: np.dtype,
+    ) -> None:
+        self.array_func = array_func
+        self.routine = routine
+        self.operands = operands
+        self.in_dtypes = in_dtypes
+        self.out_dtype = out_dtype
+        self.n_ops = 1
+        self.n_inputs = 0
+        for operand in operands:
+            if isinstance(operand, ndarray) and operand._lazy is not None:
+                self.n_ops += operand._lazy.n_ops
+                self.n_inputs += operand._lazy.n_inputs
+            else:
+                self.n_inputs += 1
+
+    def _exceeds_limit(self) -> bool:
+        return self.n_ops > _MAX_OPS or self.n_inputs > len(_INPUT_GENERIC_TYPES)
+
+    def bound_size(self):
+        """
+        Keeps the fused kernel within the limits, by evaluating the operands if needed.
+        """
+        if not self._exceeds_limit():
+            return
+        # the counts may be overestimated; count exactly before giving up fusion
+        builder = _KernelBuilder()
+        builder.add_expr(self)
+        self.n_ops = len(builder.ops)
+        self.n_inputs = len(builder.inputs)
+        if not self._exceeds_limit():
+            return
+        for operand in self.operands:
+            if isinstance(operand, ndarray) and operand._lazy is not None:
+                operand._lazy.materialize(operand)
+        self.n_ops = 1
+        self.n_inputs = len(self.operands)
+
+    def materialize(self, array: ndarray):
+        """
+        Evaluates the expression in one kernel and assigns the buffer to array.
+        """
+        global _evaluating
+        builder = _KernelBuilder()
+        output_name = builder.add_expr(self)
+        fusion = self.array_func.fusion
+        in_params = ",".join(
+            f"{_INPUT_GENERIC_TYPES[i]} x{i}" for i in range(len(builder.inputs))
+        )
+        operation = make_fused_operation(fusion, builder.ops, output_name)
+        kernel = _kernels.get((in_params, operation))
+        if kernel is None:
+            kernel = fusion.ElementwiseKernel(
+                in_params=in_params,
+                out_params="Z y",
+                operation=operation,
+                name="lazy",
+            )
+            _kernels[(in_params, operation)] = kernel
+        evaluating = _evaluating
+        _evaluating = True
+        try:
+            in_arrays = []
+            bound_buffers = set()
+            for operand in builder.inputs:
+                if isinstance(operand, ndarray):
+                    # Cannot assign the same texture as multiple inputs in WebGL
+                    if id(operand.buffer) in bound_buffers:
+                        operand = operand.copy()
+                    bound_buffers.add(id(operand.buffer))
+                in_arrays.append(operand)
+            out = ndarray(array.shape, array.dtype)
+            kernel(*in_arrays, out)
+        finally:
+            _evaluating = evaluating
+        array.buffer = out.buffer
+        array._lazy = None
+
+
+def defer(
+    routine: str,
+    operands: List[object],
+    in_dtypes: List[np.dtype],
+    out_dtype: np.dtype,
+) -> Optional[ndarray]:
+    """
+    Records the elementwise op and returns a pending array of the result.
+    operands must already have the types of in_dtypes (scalars as numpy scalars).
+    Returns None if the op cannot be deferred (no array operand).
+    """
+    global _pending
+    array_func = None
+    for operand in operands:
+        if isinstance(operand, ndarray):
+            array_func = operand.array_func
+            break
+    if array_func is None:
+        return None
+    expr = LazyExpr(array_func, routine, operands, in_dtypes, out_dtype)
+    expr.bound_size()
+    shape = np.broadcast_shapes(*[np.shape(operand) for operand in operands])
+    array = ndarray(shape, out_dtype, lazy=expr)
+    if len(_pending) >= _PRUNE_THRESHOLD:
+        _pending = [ref for ref in _pending if _is_pending(ref())]
+    _pending.append(weakref.ref(array))
+    return array
+
+
+def defer_astype(array: ndarray, dtype: np.dtype) -> ndarray:
+    return defer(
+        f"out0 = {array.array_func.fusion.cast('in0', dtype)}",
+        [array],
+        [array.dtype],
+        dtype,
+    )
+
+
+def _is_pending(array: Optional[ndarray]) -> bool:
+    return array is not None and array._lazy is not None
+
+
+def flush():
+    """
+    Evaluates all pending arrays which are still referenced.
+    Newer arrays are evaluated first: their expressions are released after evaluation,
+    so temporaries referenced only by them are not evaluated.
+    """
+    global _pending
+    pending = _pending
+    _pending = []
+    for ref in reversed(pending):
+        array = ref()
+        if _is_pending(array):
+            array._lazy.materialize(array)
+        array = None
+
+
+def _reads(expr: LazyExpr, array: ndarray) -> bool:
+    # pending array has no buffer (nor views) yet; it is read only as the operand itself
+    buffer = array._buffer if array._lazy is None else None
+    stack = [expr]
+    visited = set()
+    while len(stack) > 0:
+        for operand in stack.pop().operands:
+            if not isinstance(operand, ndarray):
+                continue
+            if operand is array:
+                return True
+            if operand._lazy is None:
+                if buffer is not None and operand._buffer is buffer:
+                    return True
+            elif id(operand._lazy) not in visited:
+                visited.add(id(operand._lazy))
+                stack.append(operand._lazy)
+    return False
+
+
+def before_write(array: ndarray):
+    """
+    Called before array (or a view of its buffer) is overwritten.
+    Pending arrays whose expressions read it are evaluated beforehand.
+    """
+    if _evaluating or len(_pending) == 0:
+        return
+    readers = []
+    for ref in _pending:
+        reader = ref()
+        if _is_pending(reader) and reader is not array and _reads(reader._lazy, array):
+            readers.append(reader)
+    for reader in reversed(readers):
+        if reader._lazy is not None:
+            reader._lazy.materialize(reader)
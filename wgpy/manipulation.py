@@ -1,8 +1,12 @@
 from typing import List, Optional, Tuple, Union
 import numpy as np
 from wgpy_backends.runtime.ndarray import ndarray
-from wgpy.construct import asarray, asnumpy
-from wgpy.common.shape_util import axis_to_tuple, calculate_c_contiguous_strides
+from wgpy.construct import asarray
+from wgpy.common.shape_util import (
+    axis_to_tuple,
+    calculate_c_contiguous_strides,
+    normalize_axis,
+)
 
 
 def reshape(a: ndarray, newshape: Tuple[int, ...]) -> ndarray:
@@ -125,18 +129,143 @@ def broadcast_to(array: ndarray, shape: Union[tuple, int], subok=False) -> ndarr
     return array.broadcast_to(shape, subok)
 
 
+def _to_ndarray(a) -> ndarray:
+    if isinstance(a, ndarray):
+        return a
+    return asarray(np.asarray(a))
+
+
+def _slice_along(a: ndarray, axis: int, start: int, stop: int) -> ndarray:
+    return a[(slice(None),) * axis + (slice(start, stop),)]
+
+
 def concatenate(
     arrays: List[ndarray], axis: int = 0, out=None, dtype=None, casting="same_kind"
 ) -> ndarray:
-    # TODO implement on GPU
+    """
+    Copies each array into its slice of one output array on GPU.
+    """
+    if out is not None and dtype is not None:
+        raise TypeError(
+            "concatenate() only takes `out` or `dtype` as an argument,"
+            " but both were provided."
+        )
+    arrays = [_to_ndarray(a) for a in arrays]
+    if len(arrays) == 0:
+        raise ValueError("need at least one array to concatenate")
+    if axis is None:
+        arrays = [a.ravel() for a in arrays]
+        axis = 0
+    ndim = arrays[0].ndim
+    if ndim == 0:
+        raise ValueError("zero-dimensional arrays cannot be concatenated")
+    axis = normalize_axis(axis, ndim)
+    shape = list(arrays[0].shape)
+    shape[axis] = 0
+    for i, a in enumerate(arrays):
+        if a.ndim != ndim:
+            raise ValueError(
+                "all the input arrays must have same number of dimensions, but the"
+                f" array at index 0 has {ndim} dimension(s) and the array at index {i}"
+                f" has {a.ndim} dimension(s)"
+            )
+        for d in range(ndim):
+            if d != axis and a.shape[d] != shape[d]:
+                raise ValueError(
+                    "all the input array dimensions except for the concatenation axis"
+                    f" must match exactly, but along dimension {d}, the array at index"
+                    f" 0 has size {shape[d]} and the array at index {i} has size"
+                    f" {a.shape[d]}"
+                )
+        shape[axis] += a.shape[axis]
+    shape = tuple(shape)
+
     if out is not None:
-        raise ValueError("out is not supported")
-    if dtype is not None:
-        raise ValueError("dtype is not supported")
-    if casting != "same_kind":
-        raise ValueError("casting is not supported")
-    np_arrays = [asnumpy(a) for a in arrays]
-    return asarray(np.concatenate(np_arrays, axis=axis))
+        if out.shape != shape:
+            raise ValueError("Output array is the wrong shape")
+        dtype = out.dtype
+    elif dtype is None:
+        dtype = np.result_type(*[a.dtype for a in arrays])
+    else:
+        dtype = np.dtype(dtype)
+    for a in arrays:
+        if not np.can_cast(a.dtype, dtype, casting=casting):
+            raise TypeError(
+                f"Cannot cast array data from dtype('{a.dtype}') to dtype('{dtype}')"
+                f" according to the rule '{casting}'"
+            )
+    if out is None:
+        out = ndarray(shape, dtype)
+
+    # each input is copied (with casting) into its slab of out by the backend
+    out.array_func.concatenate_into(arrays, axis, out)
+    return out
+
+
+def stack(
+    arrays: List[ndarray], axis: int = 0, out=None, dtype=None, casting="same_kind"
+) -> ndarray:
+    arrays = [_to_ndarray(a) for a in arrays]
+    if len(arrays) == 0:
+        raise ValueError("need at least one array to stack")
+    shape = arrays[0].shape
+    if any(a.shape != shape for a in arrays):
+        raise ValueError("all input arrays must have the same shape")
+    axis = normalize_axis(axis, len(shape) + 1)
+    return concatenate(
+        [expand_dims(a, axis) for a in arrays],
+        axis=axis,
+        out=out,
+        dtype=dtype,
+        casting=casting,
+    )
+
+
+def hstack(tup: List[ndarray], dtype=None, casting="same_kind") -> ndarray:
+    arrays = [_to_ndarray(a) for a in tup]
+    arrays = [reshape(a, (1,)) if a.ndim == 0 else a for a in arrays]
+    axis = 0 if len(arrays) > 0 and arrays[0].ndim == 1 else 1
+    return concatenate(arrays, axis=axis, dtype=dtype, casting=casting)
+
+
+def vstack(tup: List[ndarray], dtype=None, casting="same_kind") -> ndarray:
+    arrays = [_to_ndarray(a) for a in tup]
+    arrays = [reshape(a, (1, a.size)) if a.ndim < 2 else a for a in arrays]
+    return concatenate(arrays, axis=0, dtype=dtype, casting=casting)
+
+
+def array_split(
+    ary: ndarray, indices_or_sections: Union[int, List[int]], axis: int = 0
+) -> List[ndarray]:
+    """
+    Splits the array into views; no data is copied.
+    """
+    axis = normalize_axis(axis, ary.ndim)
+    size = ary.shape[axis]
+    if isinstance(indices_or_sections, (int, np.integer)):
+        sections = int(indices_or_sections)
+        if sections <= 0:
+            raise ValueError("number sections must be larger than 0.")
+        each, extras = divmod(size, sections)
+        bounds = [0]
+        for i in range(sections):
+            bounds.append(bounds[-1] + each + (1 if i < extras else 0))
+    else:
+        bounds = [0] + [int(i) for i in indices_or_sections] + [size]
+    return [
+        _slice_along(ary, axis, start, stop)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def split(
+    ary: ndarray, indices_or_sections: Union[int, List[int]], axis: int = 0
+) -> List[ndarray]:
+    if isinstance(indices_or_sections, (int, np.integer)):
+        sections = int(indices_or_sections)
+        if sections > 0 and ary.shape[normalize_axis(axis, ary.ndim)] % sections != 0:
+            raise ValueError("array split does not result in an equal division")
+    return array_split(ary, indices_or_sections, axis)
 
 
 __all__ = [
@@ -148,4 +277,9 @@ __all__ = [
     "ravel",
     "squeeze",
     "concatenate",
+    "stack",
+    "hstack",
+    "vstack",
+    "split",
+    "array_split",
 ]
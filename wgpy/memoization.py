@@ -0,0 +1,100 @@
+import functools
+import weakref
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple
+from wgpy_backends.runtime import get_write_version
+from wgpy_backends.runtime.device import Device
+from wgpy_backends.runtime.ndarray import ndarray
+
+# Number of results cached per memoized function.
+DEFAULT_MAXSIZE = 256
+
+_memoized_functions = weakref.WeakSet()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def _make_key(arg, buffers: List[object]):
+    if isinstance(arg, ndarray):
+        # the content of the array is identified by the buffer and its write version
+        buffer = arg.buffer
+        buffers.append(buffer)
+        return (
+            ndarray,
+            buffer.buffer_id,
+            get_write_version(buffer.buffer_id),
+            arg.offset,
+            arg.shape,
+            arg.strides,
+            arg.dtype,
+        )
+    if isinstance(arg, (tuple, list)):
+        return (type(arg), tuple(_make_key(item, buffers) for item in arg))
+    # distinguish values which compare equal but have different types (e.g. 1 and 1.0)
+    return (type(arg), arg)
+
+
+class Memoized:
+    """
+    Function decorated by memoize().
+    Results are cached in LRU order, keyed by the arguments, which must be hashable or
+    ndarray. ndarray arguments are keyed by the buffer and its write version, so
+    writing to the array invalidates the entry.
+    """
+
+    def __init__(self, func: Callable, for_each_device: bool, maxsize: int) -> None:
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.for_each_device = for_each_device
+        self.maxsize = maxsize
+        self._cache = OrderedDict()  # key -> (result, [weakref of buffers in key])
+        self.hits = 0
+        self.misses = 0
+        _memoized_functions.add(self)
+
+    def __get__(self, instance, owner):
+        # decorated method
+        if instance is None:
+            return self
+        return functools.partial(self, instance)
+
+    def __call__(self, *args, **kwargs):
+        buffers = []
+        key = (
+            tuple(_make_key(arg, buffers) for arg in args),
+            tuple((k, _make_key(v, buffers)) for k, v in sorted(kwargs.items())),
+        )
+        if self.for_each_device:
+            key = (Device().id,) + key
+        entry = self._cache.get(key)
+        # buffer id is reused after the buffer is released; the entry is valid only if
+        # the buffers are alive
+        if entry is not None and all(ref() is not None for ref in entry[1]):
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        result = self.func(*args, **kwargs)
+        self._cache[key] = (result, [weakref.ref(buffer) for buffer in buffers])
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def cache_clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def clear_memo():
+    for memoized in list(_memoized_functions):
+        memoized.cache_clear()
@@ -1,11 +1,326 @@
-from wgpy.construct import asarray
-from wgpy_backends.runtime.ndarray import ndarray
+import os
+from typing import List, Optional, Tuple
 import numpy as np
+from wgpy.construct import empty
+from wgpy.indexing import argsort, take
+from wgpy_backends.runtime.ndarray import ndarray
+
+# Philox4x32-10 (Salmon et al., "Parallel random numbers: as easy as 1, 2, 3")
+_PHILOX_M = (0xD2511F53, 0xCD9E8D57)
+_PHILOX_W = (0x9E3779B9, 0xBB67AE85)
+_PHILOX_ROUNDS = 10
+
+# uint8 is held as 32-bit unsigned integer in shaders (u32 in WGSL, uint in GLSL)
+_U32 = np.dtype(np.uint8)
+_INT32 = np.dtype(np.int32)
+_FLOAT32 = np.dtype(np.float32)
+
+_kernels = {}  # distribution -> ElementwiseKernel
+
+
+def _mulhi(a: str, b: str, out: str) -> str:
+    """
+    Statements which assign the upper 32 bits of the product of u32 a and b to out.
+    There is no 64-bit integer in WGSL and GLSL ES 3.0, so the product is computed
+    by 16-bit halves.
+    """
+    return (
+        f"_a_lo = {a} & 0xFFFFu;\n"
+        f"_a_hi = {a} >> 16u;\n"
+        f"_b_lo = {b} & 0xFFFFu;\n"
+        f"_b_hi = {b} >> 16u;\n"
+        "_cross = ((_a_lo * _b_lo) >> 16u) + ((_a_hi * _b_lo) & 0xFFFFu)"
+        " + _a_lo * _b_hi;\n"
+        f"{out} = _a_hi * _b_hi + ((_a_hi * _b_lo) >> 16u) + (_cross >> 16u);\n"
+    )
+
+
+def _philox(fusion) -> str:
+    """
+    Code which computes the random block (c0, c1, c2, c3) of element _y_0.
+    The key is (k_lo, k_hi) and the counter is the 64-bit (c_lo, c_hi) plus _y_0.
+    """
+    source = ""
+    temporaries = ["_a_lo", "_a_hi", "_b_lo", "_b_hi", "_cross"]
+    for name in temporaries + ["hi0", "lo0", "hi1", "lo1"]:
+        source += fusion.declare_variable(name, _U32)
+    source += fusion.declare_variable("k0", _U32, fusion.cast("k_lo", _U32))
+    source += fusion.declare_variable("k1", _U32, fusion.cast("k_hi", _U32))
+    c_lo = fusion.cast("c_lo", _U32)
+    element = fusion.cast("_y_0", _U32)
+    source += fusion.declare_variable("c0", _U32, f"{c_lo} + {element}")
+    # carry to the upper word of the counter
+    carry = fusion.select(f"c0 < {c_lo}", "1u", "0u")
+    c_hi = fusion.cast("c_hi", _U32)
+    source += fusion.declare_variable("c1", _U32, f"{c_hi} + {carry}")
+    source += fusion.declare_variable("c2", _U32, "0u")
+    source += fusion.declare_variable("c3", _U32, "0u")
+    for r in range(_PHILOX_ROUNDS):
+        source += _mulhi(f"{_PHILOX_M[0]:#x}u", "c0", "hi0")
+        source += f"lo0 = {_PHILOX_M[0]:#x}u * c0;\n"
+        source += _mulhi(f"{_PHILOX_M[1]:#x}u", "c2", "hi1")
+        source += f"lo1 = {_PHILOX_M[1]:#x}u * c2;\n"
+        source += "c0 = hi1 ^ c1 ^ k0;\nc1 = lo1;\nc2 = hi0 ^ c3 ^ k1;\nc3 = lo0;\n"
+        if r < _PHILOX_ROUNDS - 1:
+            source += f"k0 = k0 + {_PHILOX_W[0]:#x}u;\n"
+            source += f"k1 = k1 + {_PHILOX_W[1]:#x}u;\n"
+    return source
+
+
+def _uniform_expr(fusion, word: str) -> str:
+    # 24 random bits, in [0, 1)
+    return f"({fusion.cast(f'{word} >> 8u', _FLOAT32)} * (1.0 / 16777216.0))"
+
+
+def _get_kernel(fusion, distribution: str):
+    """
+    Kernel which generates the random numbers of distribution for the elements of
+    the 1-dim output.
+    """
+    kernel = _kernels.get(distribution)
+    if kernel is not None:
+        return kernel
+    in_params = ["N k_lo", "N k_hi", "N c_lo", "N c_hi"]
+    operation = _philox(fusion)
+    if distribution == "uniform":
+        in_params += ["F low", "F high"]
+        operation += f"y = Y(low + (high - low) * {_uniform_expr(fusion, 'c0')})"
+    elif distribution == "normal":
+        # Box-Muller transform; u1 is in (0, 1]
+        in_params += ["F loc", "F scale"]
+        operation += fusion.declare_variable(
+            "u1", _FLOAT32, f"{_uniform_expr(fusion, 'c0')} + (1.0 / 16777216.0)"
+        )
+        operation += fusion.declare_variable(
+            "u2", _FLOAT32, _uniform_expr(fusion, "c1")
+        )
+        operation += "y = Y(loc + scale * sqrt(-2.0 * log(u1)) * cos(6.2831853 * u2))"
+    elif distribution == "integers":
+        # low + floor(c0 * span / 2^32);
+        # span is up to 2^32 - 1, given as i32 of the same bits
+        in_params += ["N low", "N span"]
+        operation += fusion.declare_variable("v", _U32)
+        operation += _mulhi("c0", fusion.cast("span", _U32), "v")
+        operation += f"y = Y(low + {fusion.cast('v', _INT32)})"
+    elif distribution == "bits":
+        # non-negative int32
+        operation += f"y = Y({fusion.cast('c0 >> 1u', _INT32)})"
+    else:
+        raise ValueError(f"unknown distribution {distribution}")
+    kernel = fusion.ElementwiseKernel(
+        in_params=",".join(in_params),
+        out_params="Y y",
+        operation=operation,
+        name=f"random_{distribution}",
+    )
+    _kernels[distribution] = kernel
+    return kernel
+
+
+def _as_int32(value: int) -> np.int32:
+    # 32-bit unsigned value passed to the kernel by the bits of int32
+    return np.array(value & 0xFFFFFFFF, dtype=np.uint32).view(np.int32)[()]
+
+
+def _size_to_shape(size) -> Tuple[int, ...]:
+    if size is None:
+        return ()
+    if isinstance(size, (int, np.integer)):
+        return (int(size),)
+    return tuple(int(s) for s in size)
+
+
+class RandomState:
+    """
+    Random number generator which generates the numbers on GPU, by the counter-based
+    generator Philox4x32-10.
+    Element i of each request is generated from the counter (number of elements
+    generated so far + i), so the result is reproducible for a seed regardless of
+    the device.
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.seed(seed)
+
+    def seed(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        seed = int(seed) & 0xFFFFFFFFFFFFFFFF
+        self._key = (seed & 0xFFFFFFFF, seed >> 32)
+        self._counter = 0
+
+    def _generate(
+        self, distribution: str, params: List[object], shape, dtype
+    ) -> ndarray:
+        shape = _size_to_shape(shape)
+        size = int(np.prod(shape))
+        out = empty((size,), dtype)
+        if size > 0:
+            counter = self._counter
+            self._counter = (counter + size) & 0xFFFFFFFFFFFFFFFF
+            kernel = _get_kernel(out.array_func.fusion, distribution)
+            kernel(
+                _as_int32(self._key[0]),
+                _as_int32(self._key[1]),
+                _as_int32(counter),
+                _as_int32(counter >> 32),
+                *params,
+                out,
+            )
+        return out.reshape(shape)
+
+    def random_sample(self, size=None, dtype=np.float32) -> ndarray:
+        return self.uniform(0.0, 1.0, size, dtype)
+
+    random = random_sample
+
+    def rand(self, *size, dtype=np.float32) -> ndarray:
+        return self.random_sample(size, dtype)
+
+    def uniform(self, low=0.0, high=1.0, size=None, dtype=np.float32) -> ndarray:
+        return self._generate(
+            "uniform", [np.float32(low), np.float32(high)], size, dtype
+        )
+
+    def normal(self, loc=0.0, scale=1.0, size=None, dtype=np.float32) -> ndarray:
+        return self._generate(
+            "normal", [np.float32(loc), np.float32(scale)], size, dtype
+        )
+
+    def standard_normal(self, size=None, dtype=np.float32) -> ndarray:
+        return self.normal(0.0, 1.0, size, dtype)
+
+    def randn(self, *size, dtype=np.float32) -> ndarray:
+        return self.normal(0.0, 1.0, size, dtype)
+
+    def randint(self, low, high=None, size=None, dtype=np.int32) -> ndarray:
+        """
+        Integers in [low, high).
+        """
+        if high is None:
+            low, high = 0, low
+        low = int(low)
+        high = int(high)
+        if low >= high:
+            raise ValueError("low >= high")
+        if low < -(2**31) or high > 2**31:
+            raise ValueError("low and high must be in the range of int32")
+        return self._generate(
+            "integers", [np.int32(low), _as_int32(high - low)], size, dtype
+        )
+
+    def _permutation_indices(self, n: int) -> ndarray:
+        # sorted by random keys; ties are ordered by position
+        keys = self._generate("bits", [], (n,), np.int32)
+        return argsort(keys)
+
+    def permutation(self, x) -> ndarray:
+        if isinstance(x, (int, np.integer)):
+            return self._permutation_indices(int(x))
+        if not isinstance(x, ndarray):
+            raise TypeError("x must be int or ndarray")
+        if x.ndim == 0:
+            raise TypeError("x must be an integer or at least 1-dimensional")
+        return take(x, self._permutation_indices(x.shape[0]), axis=0)
+
+    def shuffle(self, x: ndarray):
+        """
+        Shuffles the array along the first axis, in place.
+        """
+        if x.ndim == 0:
+            raise TypeError("An array of 0 dimension cannot be shuffled")
+        x._assign(self.permutation(x))
+
+
+class Generator:
+    """
+    numpy.random.Generator-like interface of RandomState.
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self._state = RandomState(seed)
+
+    def random(self, size=None, dtype=np.float32) -> ndarray:
+        return self._state.random_sample(size, dtype)
+
+    def uniform(self, low=0.0, high=1.0, size=None) -> ndarray:
+        return self._state.uniform(low, high, size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None) -> ndarray:
+        return self._state.normal(loc, scale, size)
+
+    def standard_normal(self, size=None, dtype=np.float32) -> ndarray:
+        return self._state.standard_normal(size, dtype)
+
+    def integers(
+        self, low, high=None, size=None, dtype=np.int32, endpoint=False
+    ) -> ndarray:
+        if high is None:
+            low, high = 0, low
+        if endpoint:
+            high = int(high) + 1
+        return self._state.randint(low, high, size, dtype)
+
+    def permutation(self, x) -> ndarray:
+        return self._state.permutation(x)
+
+    def shuffle(self, x: ndarray):
+        self._state.shuffle(x)
+
+
+def default_rng(seed: Optional[int] = None) -> Generator:
+    return Generator(seed)
+
+
+_random_state = None  # type: Optional[RandomState]
+
+
+def get_random_state() -> RandomState:
+    global _random_state
+    if _random_state is None:
+        _random_state = RandomState()
+    return _random_state
+
+
+def seed(seed: Optional[int] = None):
+    get_random_state().seed(seed)
+
+
+def rand(*size) -> ndarray:
+    return get_random_state().rand(*size)
+
+
+def randn(*size) -> ndarray:
+    return get_random_state().randn(*size)
+
+
+def random_sample(size=None, dtype=np.float32) -> ndarray:
+    return get_random_state().random_sample(size, dtype)
+
+
+def random(size=None) -> ndarray:
+    return get_random_state().random_sample(size)
+
+
+def uniform(low=0.0, high=1.0, size=None, dtype=np.float32) -> ndarray:
+    return get_random_state().uniform(low, high, size, dtype)
+
+
+def normal(loc=0.0, scale=1.0, size=None, dtype=np.float32) -> ndarray:
+    return get_random_state().normal(loc, scale, size, dtype)
+
+
+def standard_normal(size=None, dtype=np.float32) -> ndarray:
+    return get_random_state().standard_normal(size, dtype)
+
+
+def randint(low, high=None, size=None, dtype=np.int32) -> ndarray:
+    return get_random_state().randint(low, high, size, dtype)
 
 
-def randn(*args) -> ndarray:
-    return asarray(np.random.randn(*args))
+def permutation(x) -> ndarray:
+    return get_random_state().permutation(x)
 
 
-def normal(*args, **kwargs) -> ndarray:
-    return asarray(np.random.normal(*args, **kwargs))
+def shuffle(x: ndarray):
+    get_random_state().shuffle(x)
@@ -23,4 +23,16 @@ def var(x: ndarray, **kwargs) -> ndarray:
     return x.array_func.reduction.var(x, **kwargs)
 
 
-__all__ = ["sum", "max", "min", "mean", "var"]
+def any(x: ndarray, axis=None, out=None, keepdims=False) -> ndarray:
+    return x.array_func.reduction.any(x, axis=axis, out=out, keepdims=keepdims)
+
+
+def all(x: ndarray, axis=None, out=None, keepdims=False) -> ndarray:
+    return x.array_func.reduction.all(x, axis=axis, out=out, keepdims=keepdims)
+
+
+def count_nonzero(x: ndarray, axis=None) -> ndarray:
+    return x.array_func.reduction.count_nonzero(x, axis=axis)
+
+
+__all__ = ["sum", "max", "min", "mean", "var", "any", "all", "count_nonzero"]
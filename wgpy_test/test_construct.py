@@ -0,0 +1,83 @@
+import numpy as np
+import wgpy as cp
+
+
+def allclose(expected, actual):
+    np.testing.assert_allclose(expected, actual, rtol=1e-2, atol=1e-2)
+
+
+def test_zeros_ones_full():
+    t1 = cp.zeros((4, 3), dtype=np.float32)
+    assert t1.dtype == np.float32
+    allclose(np.zeros((4, 3)), cp.asnumpy(t1))
+    t2 = cp.ones(5, dtype=np.int32)
+    assert t2.dtype == np.int32
+    assert np.array_equal(np.ones(5, dtype=np.int32), cp.asnumpy(t2))
+    t3 = cp.full((2, 3), 7.5, dtype=np.float32)
+    allclose(np.full((2, 3), 7.5), cp.asnumpy(t3))
+    t4 = cp.full((3,), True)
+    assert np.array_equal(np.full((3,), True), cp.asnumpy(t4))
+
+
+def test_like():
+    t1 = cp.asarray(np.random.rand(2, 3).astype(np.float32))
+    allclose(np.zeros((2, 3)), cp.asnumpy(cp.zeros_like(t1)))
+    allclose(np.ones((2, 3)), cp.asnumpy(cp.ones_like(t1)))
+    t2 = cp.full_like(t1, 3, dtype=np.int32)
+    assert t2.dtype == np.int32
+    assert np.array_equal(np.full((2, 3), 3), cp.asnumpy(t2))
+    assert cp.empty_like(t1).shape == (2, 3)
+
+
+def test_fill():
+    n1 = np.random.rand(4, 3).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t1[1:3].fill(2.5)
+    n1[1:3].fill(2.5)
+    allclose(n1, cp.asnumpy(t1))
+    t1.fill(0)
+    allclose(np.zeros((4, 3)), cp.asnumpy(t1))
+
+
+def test_eye():
+    allclose(np.eye(3), cp.asnumpy(cp.eye(3, dtype=np.float32)))
+    allclose(np.eye(3, 5, k=1), cp.asnumpy(cp.eye(3, 5, k=1, dtype=np.float32)))
+    assert np.array_equal(
+        np.eye(4, 2, k=-1, dtype=np.int32),
+        cp.asnumpy(cp.eye(4, 2, k=-1, dtype=np.int32)),
+    )
+
+
+def test_arange():
+    assert np.array_equal(np.arange(5), cp.asnumpy(cp.arange(5)))
+    assert np.array_equal(np.arange(2, 11, 3), cp.asnumpy(cp.arange(2, 11, 3)))
+    assert np.array_equal(np.arange(5, 0, -2), cp.asnumpy(cp.arange(5, 0, -2)))
+    allclose(np.arange(0.5, 2.0, 0.25), cp.asnumpy(cp.arange(0.5, 2.0, 0.25)))
+    assert cp.arange(3, 1).shape == (0,)
+
+
+def test_linspace():
+    allclose(np.linspace(0, 1, 11), cp.asnumpy(cp.linspace(0, 1, 11)))
+    allclose(
+        np.linspace(-2, 3, 7, endpoint=False),
+        cp.asnumpy(cp.linspace(-2, 3, 7, endpoint=False)),
+    )
+    t1, step = cp.linspace(1, 2, 5, retstep=True)
+    assert step == 0.25
+    assert float(t1[4]) == 2.0
+    allclose(np.linspace(3, 4, 1), cp.asnumpy(cp.linspace(3, 4, 1)))
+
+
+def test_dtype_passed_to_backend():
+    # the requested dtype is stored as the backend stores the same host array
+    float64 = cp.asarray(np.zeros((1,))).dtype
+    assert cp.zeros((2, 3)).dtype == float64
+    assert cp.empty((2,), dtype=np.float64).dtype == float64
+    t1 = cp.asarray(np.arange(6, dtype=np.float32).reshape(2, 3))
+    t2 = t1.astype(np.float64)
+    assert t2.dtype == float64
+    allclose(np.arange(6).reshape(2, 3), cp.asnumpy(t2))
+    t3 = cp.ones_like(t2)
+    assert t3.dtype == float64
+    allclose(np.ones((2, 3)), cp.asnumpy(t3))
+    assert cp.full((2,), 3).dtype == cp.asarray(np.full((2,), 3)).dtype
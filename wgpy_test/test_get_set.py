@@ -1,3 +1,5 @@
+import importlib
+import pytest
 import numpy as np
 import wgpy as cp
 
@@ -48,6 +50,68 @@ def test_get_adv_binary():
     allclose(n1[n1 > 0], n2)
 
 
+def test_get_adv_gpu_index():
+    n1 = np.arange(5 * 3, dtype=np.float32).reshape(5, 3)
+    ni = np.array([[4, 0], [-1, 2]], dtype=np.int32)
+    t1 = cp.asarray(n1)
+    ti = cp.asarray(ni)
+    allclose(n1[ni], cp.asnumpy(t1[ti]))
+    allclose(n1[ni, 1], cp.asnumpy(t1[ti, 1]))
+    allclose(n1[1:, ni[0]], cp.asnumpy(t1[1:, ti[0]]))
+
+
+def test_get_adv_mixed():
+    n1 = np.arange(2 * 3 * 4 * 5, dtype=np.float32).reshape(2, 3, 4, 5)
+    t1 = cp.asarray(n1)
+    # adjacent index arrays
+    idxs = (slice(None), [0, 2, 1], [[3], [1]], slice(1, None, 2))
+    allclose(n1[idxs], cp.asnumpy(t1[idxs]))
+    # separated index arrays come first
+    idxs = ([1, 0], slice(None), np.newaxis, [3, 2], slice(None, None, -1))
+    allclose(n1[idxs], cp.asnumpy(t1[idxs]))
+    # ellipsis and transposed view
+    idxs = (Ellipsis, [1, 0, 0])
+    allclose(n1.T[idxs], cp.asnumpy(t1.T[idxs]))
+
+
+def test_take():
+    n1 = np.arange(3 * 4, dtype=np.float32).reshape(3, 4)
+    t1 = cp.asarray(n1)
+    allclose(np.take(n1, [5, -1, 0]), cp.asnumpy(cp.take(t1, [5, -1, 0])))
+    ti = cp.asarray(np.array([[3, 1], [0, 0]], dtype=np.int32))
+    allclose(np.take(n1, ti.get(), axis=1), cp.asnumpy(cp.take(t1, ti, axis=1)))
+    allclose(np.take(n1, 2, axis=0), cp.asnumpy(cp.take(t1, 2, axis=0)))
+
+
+def test_take_along_axis():
+    n1 = np.array([[10, 30, 20], [60, 40, 50]], dtype=np.float32)
+    ni = np.argsort(n1, axis=1).astype(np.int32)
+    t1 = cp.asarray(n1)
+    ti = cp.asarray(ni)
+    allclose(
+        np.take_along_axis(n1, ni, axis=1),
+        cp.asnumpy(cp.take_along_axis(t1, ti, axis=1)),
+    )
+    ni = np.array([[1, 0, 1]], dtype=np.int32)
+    allclose(
+        np.take_along_axis(n1, ni, axis=0),
+        cp.asnumpy(cp.take_along_axis(t1, ni, axis=0)),
+    )
+
+
+def test_argsort():
+    n1 = np.array([3, -1, 7, 3, 0, -1, 5], dtype=np.int32)
+    t1 = cp.argsort(cp.asarray(n1))
+    # stable: equal keys keep their order
+    assert np.array_equal(np.argsort(n1, kind="stable"), cp.asnumpy(t1))
+    n2 = np.array([[2, 1], [0, 1]], dtype=np.uint8)
+    assert np.array_equal(
+        np.argsort(n2, axis=None, kind="stable"),
+        cp.asnumpy(cp.argsort(cp.asarray(n2), axis=None)),
+    )
+    assert cp.argsort(cp.asarray(np.zeros((0,), dtype=np.int32))).shape == (0,)
+
+
 def test_set_slice_1d():
     n1 = np.array([1, 2, 3, 4], dtype=np.float32)
     nx = np.array([20, 30], dtype=np.float32)
@@ -84,3 +148,343 @@ def test_set_adv_binary():
     t1[t1 > 0.0] = np.array([50, 10, 40])
     n1[n1 > 0] = np.array([50, 10, 40])
     allclose(n1, cp.asnumpy(t1))
+
+
+def test_set_adv_mask_scalar():
+    n1 = np.random.rand(4, 3).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t1[t1 > 0.5] = 0.0
+    n1[n1 > 0.5] = 0.0
+    allclose(n1, cp.asnumpy(t1))
+    # mask of leading dims
+    nm = np.array([True, False, True, True])
+    t1[cp.asarray(nm)] = cp.asarray(np.array([1, 2, 3], dtype=np.float32))
+    n1[nm] = np.array([1, 2, 3], dtype=np.float32)
+    allclose(n1, cp.asnumpy(t1))
+
+
+def test_set_adv_duplicate():
+    # the last value is assigned for duplicate indices, like numpy
+    n1 = np.zeros((5,), dtype=np.int32)
+    t1 = cp.asarray(n1)
+    ni = np.array([3, 1, 3, 3, 0], dtype=np.int32)
+    nv = np.array([10, 20, 30, 40, 50], dtype=np.int32)
+    t1[cp.asarray(ni)] = cp.asarray(nv)
+    n1[ni] = nv
+    assert np.array_equal(n1, cp.asnumpy(t1))
+
+
+def test_get_adv_mask():
+    n1 = np.random.rand(4, 3, 2).astype(np.float32)
+    t1 = cp.asarray(n1)
+    allclose(n1[n1 > 0.5], cp.asnumpy(t1[t1 > 0.5]))
+    nm = np.random.rand(3, 2) > 0.5
+    allclose(n1[:, nm], cp.asnumpy(t1[:, cp.asarray(nm)]))
+    assert cp.asnumpy(t1[t1 > 2.0]).shape == (0,)
+    allclose(n1[..., nm[0]], cp.asnumpy(t1[..., cp.asarray(nm[0])]))
+    allclose(n1[..., nm], cp.asnumpy(t1[..., cp.asarray(nm)]))
+    # mask must match the shape of the indexed axes
+    for idx in [
+        (cp.asarray(nm),),
+        (0, cp.asarray(nm[:2])),
+        (Ellipsis, cp.asarray(nm.T)),
+    ]:
+        with pytest.raises(IndexError):
+            t1[idx]
+
+
+def test_nonzero():
+    n1 = np.random.randint(0, 2, size=(4, 3, 2)).astype(np.int32)
+    t1 = cp.asarray(n1)
+    for expected, actual in zip(np.nonzero(n1), cp.nonzero(t1)):
+        assert np.array_equal(expected, cp.asnumpy(actual))
+    n2 = np.zeros((100000,), dtype=np.float32)
+    n2[[5, 777, 99999]] = 1.0
+    t2 = cp.asarray(n2)
+    assert np.array_equal(np.flatnonzero(n2), cp.asnumpy(cp.flatnonzero(t2)))
+    assert np.array_equal(np.nonzero(n2)[0], cp.asnumpy(t2.nonzero()[0]))
+
+
+def test_synchronize():
+    # kernels are queued and sent together; results must be the same as eager execution
+    n1 = np.array([1, 2, 3, 4], dtype=np.float32)
+    t1 = cp.asarray(n1)
+    t2 = t1 + 1
+    t3 = t2 * 2
+    cp.synchronize()
+    t4 = t3 - t1
+    allclose((n1 + 1) * 2, cp.asnumpy(t3))
+    allclose((n1 + 1) * 2 - n1, cp.asnumpy(t4))
+
+
+def test_buffer_pool_reuse():
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    t1 = cp.asarray(np.zeros((1000,), dtype=np.float32))
+    del t1
+    hit = backend.get_performance_metrics()[f"{backend_name}.pool.hit"]
+    # slightly different size falls into the same size class
+    n2 = np.arange(999, dtype=np.float32)
+    t2 = cp.asarray(n2)
+    assert backend.get_performance_metrics()[f"{backend_name}.pool.hit"] == hit + 1
+    allclose(n2, cp.asnumpy(t2))
+
+
+def test_memory_pool():
+    import cupy
+
+    pool = cupy.get_default_memory_pool()
+    t1 = cp.asarray(np.zeros((4096,), dtype=np.float32))
+    assert pool.used_bytes() >= 4096 * 4
+    assert pool.total_bytes() >= pool.used_bytes()
+    del t1
+    pool.free_all_blocks()
+    assert pool.n_free_blocks() == 0
+    assert pool.total_bytes() == pool.used_bytes()
+
+    pool.set_limit(size=pool.total_bytes() + 1024 * 1024)
+    try:
+        n2 = np.arange(1024, dtype=np.float32)
+        allclose(n2, cp.asnumpy(cp.asarray(n2)))
+    finally:
+        pool.set_limit(size=0)
+
+
+def test_get_partial_range():
+    # only the range referred by the view is read from the buffer
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    n1 = np.arange(512 * 1024, dtype=np.float32).reshape(512, 1024)
+    t1 = cp.asarray(n1)
+    read_size = backend.get_performance_metrics()[f"{backend_name}.buffer.read_size"]
+    allclose(n1[300, 700], cp.asnumpy(t1[300, 700]))
+    allclose(n1[3:5, 10:20], cp.asnumpy(t1[3:5, 10:20]))
+    allclose(n1[511, ::-3], cp.asnumpy(t1[511, ::-3]))
+    allclose(n1[200:100:-7, 5], cp.asnumpy(t1[200:100:-7, 5]))
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.buffer.read_size"]
+        - read_size
+        < n1.nbytes
+    )
+
+
+def test_set_partial_no_readback():
+    # partial writes are done on GPU without reading back the buffer
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    n1 = np.arange(6 * 7 * 5, dtype=np.float32).reshape(6, 7, 5)
+    t1 = cp.asarray(n1)
+    read_count = backend.get_performance_metrics()[f"{backend_name}.buffer.read_count"]
+    t1[2:4] = np.full((2, 7, 5), -1, dtype=np.float32)
+    n1[2:4] = -1
+    t1[1, 3] = np.array([10, 11, 12, 13, 14], dtype=np.float32)
+    n1[1, 3] = [10, 11, 12, 13, 14]
+    t1[::2, 5:1:-2, 1] = np.arange(6, dtype=np.float32).reshape(3, 2) + 100
+    n1[::2, 5:1:-2, 1] = np.arange(6, dtype=np.float32).reshape(3, 2) + 100
+    t1[:, :, 4] = 7
+    n1[:, :, 4] = 7
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.buffer.read_count"]
+        == read_count
+    )
+    allclose(n1, cp.asnumpy(t1))
+
+
+def test_set_overlapping_view():
+    n1 = np.arange(4 * 5, dtype=np.float32).reshape(4, 5)
+    t1 = cp.asarray(n1)
+    # zero stride: each element of row 1 is written three times; the last one remains
+    data = np.arange(3 * 5, dtype=np.float32).reshape(3, 5) + 100
+    t1[1].broadcast_to((3, 5)).set(data)
+    n1[1] = data[2]
+    allclose(n1, cp.asnumpy(t1))
+    # kernels cannot write overlapping output views
+    with pytest.raises(NotImplementedError):
+        cp.add(t1[2], 1, out=t1[2].broadcast_to((3, 5)))
+
+
+def _run_awaitable(awaitable):
+    # the test runner is synchronous; awaiting a JavaScript promise from it needs
+    # stack switching (JSPI) of Pyodide
+    try:
+        from pyodide.ffi import can_run_sync, run_sync
+    except ImportError:
+        can_run_sync = None
+    if can_run_sync is None or not can_run_sync():
+        awaitable.close()
+        pytest.skip("awaiting in the synchronous test runner is not supported")
+    return run_sync(awaitable)
+
+
+def test_get_async():
+    n1 = np.arange(16, dtype=np.float32)
+    t1 = cp.asarray(n1)
+    # host array resolves immediately
+    coro = cp.asnumpy_async(n1)
+    try:
+        coro.send(None)
+        assert False, "not resolved immediately"
+    except StopIteration as e:
+        allclose(n1, e.value)
+    awaitable = cp.asnumpy_async(t1[2:5])
+    # write issued after the request does not affect the result
+    t1 += 100
+    allclose(n1[2:5], _run_awaitable(awaitable))
+    # synchronous read after asynchronous request
+    allclose(n1[2:5] + 100, cp.asnumpy(t1[2:5]))
+    allclose(n1 + 100, _run_awaitable(t1.get_async()))
+
+
+def test_set_zero_copy():
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    count = backend.get_performance_metrics()[
+        f"{backend_name}.buffer.write_zero_copy_count"
+    ]
+    n1 = np.arange(64 * 33, dtype=np.float32).reshape(64, 33)
+    t1 = cp.asarray(n1)
+    assert (
+        backend.get_performance_metrics()[
+            f"{backend_name}.buffer.write_zero_copy_count"
+        ]
+        > count
+    )
+    allclose(n1, cp.asnumpy(t1))
+    # non-contiguous array is copied before upload
+    n2 = n1[:, ::2]
+    allclose(n2, cp.asnumpy(cp.asarray(n2)))
+
+
+def test_kernel_warmup():
+    import json
+
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    t1 = cp.asarray(np.arange(4, dtype=np.float32))
+    allclose(np.arange(4) * 2, cp.asnumpy(t1 + t1))
+    manifest = json.loads(json.dumps(cp.get_kernel_manifest()))
+    assert len(manifest["kernels"]) > 0
+    count = backend.get_performance_metrics()[f"{backend_name}.kernel.precompile_count"]
+    # kernels compiled in this session are already registered
+    cp.warmup(manifest)
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.kernel.precompile_count"]
+        == count
+    )
+    # a source not compiled yet (as in a fresh session) is precompiled
+    kernel = dict(manifest["kernels"][-1])
+    kernel["source"] += "\n// test_kernel_warmup\n"
+    cp.warmup({"backend": backend_name, "kernels": [kernel]})
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.kernel.precompile_count"]
+        == count + 1
+    )
+
+
+def test_memoize():
+    calls = []
+
+    @cp.memoize(for_each_device=True)
+    def scaled(x, factor):
+        calls.append(factor)
+        return x * factor
+
+    n1 = np.array([1, 2, 3, 4], dtype=np.float32)
+    t1 = cp.asarray(n1)
+    allclose(n1 * 2, cp.asnumpy(scaled(t1, 2)))
+    allclose(n1 * 2, cp.asnumpy(scaled(t1, 2)))
+    assert len(calls) == 1
+    scaled(t1, 3)
+    # equal values of different types are cached separately
+    scaled(t1, 2.0)
+    assert len(calls) == 3
+    # writing to the array invalidates the entry
+    t1 += 1
+    allclose((n1 + 1) * 2, cp.asnumpy(scaled(t1, 2)))
+    t1[0] = 10
+    n1 = n1 + 1
+    n1[0] = 10
+    allclose(n1 * 2, cp.asnumpy(scaled(t1, 2)))
+    assert len(calls) == 5
+    info = scaled.cache_info()
+    assert info.hits == 1
+    assert info.misses == 5
+
+    @cp.memoize(maxsize=2)
+    def make_range(n, dtype):
+        calls.append(n)
+        return cp.asarray(np.arange(n, dtype=dtype))
+
+    calls.clear()
+    make_range(3, np.float32)
+    make_range(4, np.float32)
+    make_range(3, np.float32)
+    make_range(5, np.float32)  # evicts n=4
+    make_range(3, np.float32)
+    make_range(4, np.float32)
+    assert calls == [3, 4, 5, 4]
+    assert make_range.cache_info().currsize == 2
+    cp.clear_memo()
+    assert make_range.cache_info().currsize == 0
+
+
+def test_set_device_to_device():
+    n1 = np.arange(3 * 4, dtype=np.float32).reshape(3, 4)
+    nx = np.array([20, 30, 40], dtype=np.float32)
+    t1 = cp.asarray(n1)
+    # broadcast into transposed view
+    t1[:, ::2].T[...] = cp.asarray(nx)
+    n1[:, ::2].T[...] = nx
+    allclose(n1, cp.asnumpy(t1))
+    # scalar fill
+    t1[1] = 5
+    n1[1] = 5
+    allclose(n1, cp.asnumpy(t1))
+    # cast
+    t1[2, 1:3] = cp.asarray(np.array([7, 8], dtype=np.int32))
+    n1[2, 1:3] = np.array([7, 8], dtype=np.int32)
+    allclose(n1, cp.asnumpy(t1))
+    # overlapping source and destination
+    t1[1:] = t1[:-1]
+    n1[1:] = n1[:-1].copy()
+    allclose(n1, cp.asnumpy(t1))
+
+
+def test_scatter_add():
+    import cupyx
+
+    n1 = np.zeros((4, 3), dtype=np.float32)
+    ni = np.array([0, 2, 0, 3, 0], dtype=np.int32)
+    nv = np.arange(5 * 3, dtype=np.float32).reshape(5, 3)
+    expected = n1.copy()
+    np.add.at(expected, ni, nv)
+    for deterministic in [False, True]:
+        t1 = cp.asarray(n1)
+        cupyx.scatter_add(
+            t1, cp.asarray(ni), cp.asarray(nv), deterministic=deterministic
+        )
+        allclose(expected, cp.asnumpy(t1))
+    # mixed with slice and scalar value
+    t1 = cp.asarray(n1)
+    t1.scatter_add((slice(1, None), [2, 2]), 1.5)
+    expected = n1.copy()
+    np.add.at(expected, (slice(1, None), [2, 2]), 1.5)
+    allclose(expected, cp.asnumpy(t1))
+
+
+def test_ufunc_at():
+    n1 = np.array([5, 1, 7, 3], dtype=np.int32)
+    ni = np.array([1, 1, 3, 0], dtype=np.int32)
+    nv = np.array([4, 9, -1, 2], dtype=np.int32)
+    t1 = cp.asarray(n1)
+    t1.array_func.ufunc.maximum.at(t1, cp.asarray(ni), cp.asarray(nv))
+    expected = n1.copy()
+    np.maximum.at(expected, ni, nv)
+    allclose(expected, cp.asnumpy(t1))
+    # not atomic, applied in the order of the index
+    n1 = np.array([1, 2, 3], dtype=np.float32)
+    t1 = cp.asarray(n1)
+    t1.array_func.ufunc.sub.at(t1, [2, 0, 2], cp.asarray(nv[:3].astype(np.float32)))
+    expected = n1.copy()
+    np.subtract.at(expected, [2, 0, 2], nv[:3].astype(np.float32))
+    allclose(expected, cp.asnumpy(t1))
@@ -0,0 +1,103 @@
+import importlib
+import numpy as np
+import wgpy as cp
+
+
+def allclose(expected, actual):
+    np.testing.assert_allclose(expected, actual, rtol=1e-2, atol=1e-2)
+
+
+def test_lazy():
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    with cp.lazy():
+        d = t1 * t2 + t1 * t2  # common subexpression
+        mask = d > 0.5
+        i = (d * 10).astype(np.int32)
+        unused = cp.exp(t1)
+        # pending until used
+        assert d._lazy is not None
+        assert d.shape == (3, 4)
+        assert mask.dtype == np.bool_
+        # reduction evaluates the operand
+        s = cp.sum(d)
+    allclose(n1 * n2 + n1 * n2, cp.asnumpy(d))
+    assert np.array_equal(n1 * n2 + n1 * n2 > 0.5, cp.asnumpy(mask))
+    assert np.array_equal(((n1 * n2 + n1 * n2) * 10).astype(np.int32), cp.asnumpy(i))
+    allclose(np.sum(n1 * n2 + n1 * n2), cp.asnumpy(s))
+    # arrays escaping the scope are evaluated
+    assert unused._lazy is None
+    allclose(np.exp(n1), cp.asnumpy(unused))
+
+    # in-place write evaluates pending expressions reading the array first
+    t3 = cp.asarray(n1)
+    with cp.lazy():
+        y = t3 * 2
+        t3 += 1
+        z = t3 * 2
+    allclose(n1 * 2, cp.asnumpy(y))
+    allclose((n1 + 1) * 2, cp.asnumpy(z))
+
+    cp.set_lazy_mode(True)
+    try:
+        w = t1 - 1.5
+        assert w._lazy is not None
+    finally:
+        cp.set_lazy_mode(False)
+    assert w._lazy is None
+    allclose(n1 - 1.5, cp.asnumpy(w))
+
+
+def test_lazy_kernel_out():
+    # kernels writing into out evaluate pending expressions reading it first
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(3, 4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    double = t1.array_func.fusion.ElementwiseKernel(
+        in_params="T x", out_params="T y", operation="y = x + x", name="double"
+    )
+    with cp.lazy():
+        y = t1 * 2
+        double(t2, t1)
+        assert y._lazy is None
+    allclose(n1 * 2, cp.asnumpy(y))
+    allclose(n2 * 2, cp.asnumpy(t1))
+
+    n3 = np.random.rand(3).astype(np.float32)
+    t3 = cp.asarray(n3)
+    with cp.lazy():
+        z = t3 + 1
+        cp.sum(t2, axis=1, out=t3)
+    allclose(n3 + 1, cp.asnumpy(z))
+    allclose(np.sum(n2, axis=1), cp.asnumpy(t3))
+
+
+def test_lazy_dispatch_count():
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    cp.synchronize()
+    count = backend.get_performance_metrics()[f"{backend_name}.queue.dispatch_count"]
+    with cp.lazy():
+        d = (t1 * t2 + 1) * t1 - 0.5
+        unused = cp.exp(d)
+        del unused
+        cp.synchronize()
+        # nothing runs while the results are pending
+        assert (
+            backend.get_performance_metrics()[f"{backend_name}.queue.dispatch_count"]
+            == count
+        )
+    cp.synchronize()
+    # the chain runs as one kernel, and the dead temporary is never evaluated
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.queue.dispatch_count"]
+        == count + 1
+    )
+    allclose((n1 * n2 + 1) * n1 - 0.5, cp.asnumpy(d))
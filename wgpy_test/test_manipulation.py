@@ -1,3 +1,4 @@
+import importlib
 import numpy as np
 import wgpy as cp
 
@@ -120,3 +121,89 @@ def test_reduced_view():
     # size 1 (not ndim 1) => scalar
     t5 = cp.asarray(np.zeros((1, 1), dtype=np.float32))
     assert t5.reduced_view().shape == ()
+
+
+def test_concatenate():
+    n1 = np.random.rand(2, 3, 4).astype(np.float32)
+    n2 = np.random.rand(2, 5, 4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    allclose(
+        np.concatenate([n1, n2], axis=1), cp.asnumpy(cp.concatenate([t1, t2], axis=1))
+    )
+    # non-contiguous input and cast
+    n3 = np.arange(3 * 2 * 4).reshape(4, 2, 3).astype(np.int32)
+    t3 = cp.asarray(n3)
+    allclose(
+        np.concatenate([n1, n3.transpose(1, 2, 0)], axis=-1),
+        cp.asnumpy(cp.concatenate([t1, t3.transpose(1, 2, 0)], axis=-1)),
+    )
+    allclose(
+        np.concatenate([n1, n2], axis=None),
+        cp.asnumpy(cp.concatenate([t1, t2], axis=None)),
+    )
+    # input shares the buffer of output
+    t4 = cp.zeros((4, 3, 4), dtype=np.float32)
+    t4[:2] = t1
+    cp.concatenate([t4[:2], t1], out=t4)
+    allclose(np.concatenate([n1, n1]), cp.asnumpy(t4))
+    cp.concatenate([t4[2:], t4[:2]], out=t4)
+    allclose(np.concatenate([n1, n1]), cp.asnumpy(t4))
+
+
+def test_concatenate_dispatch_count():
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    n1 = np.random.rand(2, 3).astype(np.float32)
+    n2 = np.random.rand(4, 3).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    cp.synchronize()
+    count = backend.get_performance_metrics()[f"{backend_name}.queue.dispatch_count"]
+    t3 = cp.concatenate([t1, t2])
+    cp.synchronize()
+    # WebGPU copies contiguous inputs between buffers without kernels;
+    # WebGL gathers all the inputs into the texture by one kernel.
+    expected = {"webgpu": 0, "webgl": 1}[backend_name]
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.queue.dispatch_count"]
+        == count + expected
+    )
+    allclose(np.concatenate([n1, n2]), cp.asnumpy(t3))
+    # more inputs than gathered by one kernel
+    n4 = [np.full((i + 1, 2), i, dtype=np.int32) for i in range(20)]
+    allclose(
+        np.concatenate(n4),
+        cp.asnumpy(cp.concatenate([cp.asarray(n) for n in n4])),
+    )
+
+
+def test_stack():
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(3, 4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    allclose(np.stack([n1, n2]), cp.asnumpy(cp.stack([t1, t2])))
+    allclose(np.stack([n1, n2], axis=-1), cp.asnumpy(cp.stack([t1, t2], axis=-1)))
+    allclose(np.hstack([n1, n2]), cp.asnumpy(cp.hstack([t1, t2])))
+    allclose(np.vstack([n1, n2]), cp.asnumpy(cp.vstack([t1, t2])))
+    allclose(np.vstack([n1[0], n2[1]]), cp.asnumpy(cp.vstack([t1[0], t2[1]])))
+
+
+def test_split():
+    n1 = np.random.rand(6, 5).astype(np.float32)
+    t1 = cp.asarray(n1)
+    for expected, actual in zip(np.split(n1, 3), cp.split(t1, 3)):
+        allclose(expected, cp.asnumpy(actual))
+    for expected, actual in zip(
+        np.split(n1, [1, 3], axis=1), cp.split(t1, [1, 3], axis=1)
+    ):
+        allclose(expected, cp.asnumpy(actual))
+    for expected, actual in zip(
+        np.array_split(n1, 3, axis=1), cp.array_split(t1, 3, axis=1)
+    ):
+        allclose(expected, cp.asnumpy(actual))
+    # views of the original array
+    t2 = cp.split(t1, 2)[1]
+    t2[0, 0] = 100.0
+    assert float(t1[3, 0]) == 100.0
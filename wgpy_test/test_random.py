@@ -0,0 +1,54 @@
+import numpy as np
+import wgpy as cp
+
+
+def test_philox_known_answer():
+    # Philox4x32-10 of key (0, 0) and counter (0, 0, 0, 0) is
+    # (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)
+    rs = cp.random.RandomState(0)
+    assert float(rs.rand(1)[0]) == (0x6627E8D5 >> 8) / 2**24
+
+
+def test_reproducible():
+    t1 = cp.random.RandomState(123).rand(4, 5)
+    t2 = cp.random.RandomState(123).rand(4, 5)
+    assert t1.shape == (4, 5)
+    assert np.array_equal(cp.asnumpy(t1), cp.asnumpy(t2))
+    # the counter advances by the number of generated elements
+    rs = cp.random.RandomState(123)
+    t3 = rs.rand(4, 2)
+    t4 = rs.rand(4, 3)
+    n5 = np.concatenate([cp.asnumpy(t3).ravel(), cp.asnumpy(t4).ravel()])
+    assert np.array_equal(cp.asnumpy(t1).ravel(), n5)
+    cp.random.seed(5)
+    t6 = cp.random.randn(100)
+    cp.random.seed(5)
+    assert np.array_equal(cp.asnumpy(t6), cp.asnumpy(cp.random.randn(100)))
+    assert not np.array_equal(cp.asnumpy(t6), cp.asnumpy(cp.random.randn(100)))
+
+
+def test_distributions():
+    rs = cp.random.RandomState(1)
+    n1 = cp.asnumpy(rs.uniform(-2.0, 3.0, size=(100000,)))
+    assert n1.dtype == np.float32
+    assert n1.min() >= -2.0 and n1.max() < 3.0
+    assert abs(n1.mean() - 0.5) < 0.05
+    n2 = cp.asnumpy(rs.normal(1.0, 2.0, size=(100000,)))
+    assert abs(n2.mean() - 1.0) < 0.05
+    assert abs(n2.std() - 2.0) < 0.05
+    n3 = cp.asnumpy(rs.randint(-3, 4, size=(10000,)))
+    assert n3.min() == -3 and n3.max() == 3
+    n4 = cp.asnumpy(cp.random.default_rng(2).integers(5, size=(1000,), endpoint=True))
+    assert n4.min() == 0 and n4.max() == 5
+
+
+def test_permutation_shuffle():
+    rs = cp.random.RandomState(3)
+    n1 = cp.asnumpy(rs.permutation(1000))
+    assert np.array_equal(np.sort(n1), np.arange(1000))
+    assert not np.array_equal(n1, np.arange(1000))
+    n2 = np.arange(10 * 3).reshape(10, 3).astype(np.float32)
+    t2 = cp.asarray(n2)
+    rs.shuffle(t2)
+    n3 = cp.asnumpy(t2)
+    assert np.array_equal(n3[np.argsort(n3[:, 0])], n2)
@@ -1,3 +1,4 @@
+import importlib
 import pytest
 import numpy as np
 import wgpy as cp
@@ -69,3 +70,109 @@ def test_var():
         np.var(n1, axis=(0, 2), keepdims=True),
         cp.asnumpy(cp.var(t1, axis=(0, 2), keepdims=True)),
     )
+
+
+def test_large_reduction():
+    # large reduced extents, reduced in parallel (tree reduction, split into chunks) by
+    # the backends supporting it
+    n1 = np.random.rand(300000).astype(np.float32)
+    t1 = cp.asarray(n1)
+    np.testing.assert_allclose(np.sum(n1), cp.asnumpy(cp.sum(t1)), rtol=1e-3)
+    allclose(np.mean(n1), cp.asnumpy(cp.mean(t1)))
+    allclose(np.var(n1), cp.asnumpy(cp.var(t1)))
+    allclose(np.max(n1), cp.asnumpy(cp.max(t1)))
+    allclose(np.min(n1), cp.asnumpy(cp.min(t1)))
+
+    n2 = np.random.rand(48, 5000).astype(np.float32)
+    t2 = cp.asarray(n2)
+    allclose(np.mean(n2, axis=1), cp.asnumpy(cp.mean(t2, axis=1)))
+    allclose(np.max(n2.T, axis=0), cp.asnumpy(cp.max(t2.T, axis=0)))
+    allclose(np.mean(n2, axis=0), cp.asnumpy(cp.mean(t2, axis=0)))
+
+    n3 = np.random.rand(3, 100, 40).astype(np.float32)
+    t3 = cp.asarray(n3)
+    allclose(np.sum(n3, axis=(0, 2)), cp.asnumpy(cp.sum(t3, axis=(0, 2))))
+
+    n4 = np.zeros((200000,), dtype=np.bool_)
+    n4[123456] = True
+    t4 = cp.asarray(n4)
+    assert cp.asnumpy(cp.max(t4))
+    assert not cp.asnumpy(cp.min(t4))
+
+    # reduced in multiple passes by the backends supporting it
+    n5 = np.random.randint(0, 10, size=(2, 600, 600)).astype(np.int32)
+    t5 = cp.asarray(n5)
+    assert np.array_equal(np.sum(n5), cp.asnumpy(cp.sum(t5)))
+    assert np.array_equal(
+        np.max(n5, axis=(1, 2), keepdims=True),
+        cp.asnumpy(cp.max(t5, axis=(1, 2), keepdims=True)),
+    )
+
+
+def test_any_all():
+    n1 = np.random.rand(4, 3, 2) > 0.7
+    t1 = cp.asarray(n1)
+    assert cp.asnumpy(cp.any(t1)) == np.any(n1)
+    assert cp.asnumpy(t1.all()) == np.all(n1)
+    assert np.array_equal(np.any(n1, axis=1), cp.asnumpy(cp.any(t1, axis=1)))
+    assert np.array_equal(
+        np.all(n1, axis=(0, 2), keepdims=True),
+        cp.asnumpy(cp.all(t1, axis=(0, 2), keepdims=True)),
+    )
+    n2 = np.random.randint(0, 3, size=(5, 6)).astype(np.int32)
+    t2 = cp.asarray(n2)
+    assert np.array_equal(np.all(n2, axis=0), cp.asnumpy(cp.all(t2, axis=0)))
+    # early exit of large reductions
+    n3 = np.zeros((300000,), dtype=np.float32)
+    n3[250000] = 0.5
+    t3 = cp.asarray(n3)
+    assert cp.asnumpy(cp.any(t3))
+    assert not cp.asnumpy(cp.all(t3))
+    assert not cp.asnumpy(cp.all(t3 == 0.0))
+    n4 = np.ones((48, 5000), dtype=np.bool_)
+    n4[7, 4999] = False
+    t4 = cp.asarray(n4)
+    assert np.array_equal(np.all(n4, axis=1), cp.asnumpy(cp.all(t4, axis=1)))
+    assert np.array_equal(np.any(~n4, axis=1), cp.asnumpy(cp.any(~t4, axis=1)))
+
+
+def test_count_nonzero():
+    n1 = np.random.randint(0, 3, size=(4, 3, 2)).astype(np.float32)
+    t1 = cp.asarray(n1)
+    assert int(cp.count_nonzero(t1)) == np.count_nonzero(n1)
+    assert np.array_equal(
+        np.count_nonzero(n1, axis=1), cp.asnumpy(cp.count_nonzero(t1, axis=1))
+    )
+
+
+def test_reduction_shape_agnostic():
+    # reduced extents are passed as uniforms, so the kernel compiled for one shape is
+    # reused for another shape of the same rank
+    backend_name = cp.get_backend_name()
+    backend = importlib.import_module(f"wgpy_backends.{backend_name}")
+    n1 = np.random.rand(16, 10).astype(np.float32)
+    allclose(np.sum(n1, axis=1), cp.asnumpy(cp.sum(cp.asarray(n1), axis=1)))
+    compile_count = backend.get_performance_metrics()[
+        f"{backend_name}.kernel.compile_count"
+    ]
+    n2 = np.random.rand(24, 30).astype(np.float32)
+    allclose(np.sum(n2, axis=1), cp.asnumpy(cp.sum(cp.asarray(n2), axis=1)))
+    assert (
+        backend.get_performance_metrics()[f"{backend_name}.kernel.compile_count"]
+        == compile_count
+    )
+
+
+def test_sum_out_view():
+    n1 = np.random.rand(4, 3, 5).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.zeros((8, 3), dtype=np.float32)
+    n2 = np.zeros((8, 3), dtype=np.float32)
+    cp.sum(t1, axis=2, out=t2[::2])
+    np.sum(n1, axis=2, out=n2[::2])
+    allclose(n2, cp.asnumpy(t2))
+    t3 = cp.zeros((5, 2), dtype=np.float32)
+    n3 = np.zeros((5, 2), dtype=np.float32)
+    cp.sum(t1, axis=(0, 1), keepdims=True, out=t3[:, 1:].T[np.newaxis])
+    np.sum(n1, axis=(0, 1), keepdims=True, out=n3[:, 1:].T[np.newaxis])
+    allclose(n3, cp.asnumpy(t3))
@@ -48,12 +48,25 @@ def test_iadd_view():
     n2 = np.array([-0.5, 1.5], dtype=np.float32)
     t1 = cp.asarray(n1)
     t1v = t1[1:3]
-    # inplace update of view is not yet implemented
-    with pytest.raises(NotImplementedError):
-        t1v += n2
+    t1v += n2
+    n1[1:3] += n2
+    allclose(n1, cp.asnumpy(t1))
 
-    # n1[1:3] += n2
-    # allclose(n1, cp.asnumpy(t1))
+
+def test_out_view():
+    n1 = np.arange(12, dtype=np.float32).reshape(3, 4)
+    n2 = np.random.rand(3, 3).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t1[:, 1:] += cp.asarray(n2)
+    n1[:, 1:] += n2
+    allclose(n1, cp.asnumpy(t1))
+    # transposed and strided output
+    n3 = np.random.rand(4, 3).astype(np.float32)
+    t4 = cp.zeros((3, 8), dtype=np.float32)
+    n4 = np.zeros((3, 8), dtype=np.float32)
+    cp.divide(cp.asarray(n3), 0.5, out=t4[:, ::2].T)
+    np.divide(n3, 0.5, out=n4[:, ::2].T)
+    allclose(n4, cp.asnumpy(t4))
 
 
 def test_add_int32():
@@ -442,3 +455,112 @@ def test_divide_int():
 
     t4 = cp.divide(t1, 2)
     allclose(np.divide(n1, 2), cp.asnumpy(t4))
+
+
+def test_scalar_operand():
+    n1 = np.array([[1.5], [2.5]], dtype=np.float32)
+    t1 = cp.asarray(n1)
+    # int scalar does not change the dtype of float array
+    t2 = t1 * 2
+    assert t2.dtype == np.float32
+    allclose(n1 * 2, cp.asnumpy(t2))
+    t3 = 3 - t1
+    allclose(3 - n1, cp.asnumpy(t3))
+    t4 = t1 + np.float32(0.5)
+    allclose(n1 + np.float32(0.5), cp.asnumpy(t4))
+    t5 = t1 < np.array(2.0)  # 0-d host array
+    assert t5.dtype == np.bool_
+    allclose(n1 < 2.0, cp.asnumpy(t5))
+
+    n2 = np.array([1, 2, 3, 4], dtype=np.int32)
+    t6 = cp.asarray(n2) + 5
+    assert t6.dtype == np.int32
+    allclose(n2 + 5, cp.asnumpy(t6))
+    t7 = cp.asarray(n2) * 0.5  # array is cast to float
+    allclose(n2 * 0.5, cp.asnumpy(t7))
+    t8 = cp.asarray(n2)
+    t8 += 1
+    allclose(n2 + 1, cp.asnumpy(t8))
+    # integer out of the range of the array type is not wrapped around
+    with pytest.raises(OverflowError):
+        cp.asarray(n2) + 2**40
+    with pytest.raises(TypeError):
+        cp.asarray(n2) * 1j
+
+
+def test_fuse():
+    @cp.fuse()
+    def step(xs, ys, real):
+        return xs * xs - ys * ys + real
+
+    @cp.fuse
+    def norm_and_mask(xs, ys, limit):
+        r = cp.sqrt(xs * xs + ys * ys)
+        return r, r > limit
+
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(3, 4).astype(np.float32)
+    n3 = np.random.rand(4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    t3 = cp.asarray(n3)
+    # broadcasting and scalar arguments
+    allclose(n1 * n1 - n2 * n2 + n3, cp.asnumpy(step(t1, t2, t3)))
+    allclose(n1 * n1 - n2 * n2 + 0.5, cp.asnumpy(step(t1, t2, 0.5)))
+    # cached per signature
+    assert len(step._fused_kernels) == 2
+    allclose(n1 * n1 - n2 * n2 - 1.5, cp.asnumpy(step(t1, t2, -1.5)))
+    assert len(step._fused_kernels) == 2
+    # type resolution: int array is cast to float by the op
+    n4 = np.array([[1, 2, 3, 4]], dtype=np.int32)
+    allclose(n1 * n1 - n4 * n4 + 1, cp.asnumpy(step(t1, cp.asarray(n4), 1)))
+    # same array passed twice
+    allclose(n1 * n1 - n1 * n1 + 1.0, cp.asnumpy(step(t1, t1, 1.0)))
+
+    r, mask = norm_and_mask(t1, t2, 0.8)
+    expected_r = np.sqrt(n1 * n1 + n2 * n2)
+    allclose(expected_r, cp.asnumpy(r))
+    assert mask.dtype == np.bool_
+    assert np.array_equal(expected_r > 0.8, cp.asnumpy(mask))
+    # numpy arrays run the function as is
+    allclose(n1 * n1 - n2 * n2 + 0.5, step(n1, n2, 0.5))
+
+    # keyword arguments
+    allclose(n1 * n1 - n2 * n2 + 0.5, cp.asnumpy(step(t1, real=0.5, ys=t2)))
+    r, mask = norm_and_mask(t1, t2, limit=0.8)
+    assert np.array_equal(expected_r > 0.8, cp.asnumpy(mask))
+
+
+def test_fuse_outputs_and_arguments():
+    @cp.fuse
+    def separate(xs, ys, shift):
+        return xs + shift, ys * 2
+
+    n1 = np.random.rand(3, 4).astype(np.float32)
+    n2 = np.random.rand(3, 4).astype(np.float32)
+    t1 = cp.asarray(n1)
+    t2 = cp.asarray(n2)
+    o1, o2 = separate(t1, t2, 0.5)
+    allclose(n1 + 0.5, cp.asnumpy(o1))
+    allclose(n2 * 2, cp.asnumpy(o2))
+    # each output runs only its own op, with its own inputs
+    (fused_kernel,) = separate._fused_kernels.values()
+    assert [len(indices) for _, indices, _ in fused_kernel.kernels] == [2, 2]
+
+    @cp.fuse
+    def add(xs, value):
+        return xs + value
+
+    # type of the op follows the value of the scalar, as the ufunc does
+    t3 = cp.asarray(np.array([1, 2, 3], dtype=np.uint8))
+    assert add(t3, 1).dtype == (t3 + 1).dtype
+    assert add(t3, 300).dtype == (t3 + 300).dtype
+    assert np.array_equal(cp.asnumpy(t3 + 300), cp.asnumpy(add(t3, 300)))
+
+    @cp.fuse
+    def scale(xs, factors):
+        return xs * factors[0]
+
+    with pytest.raises(TypeError):
+        scale(t1, [2.0])
+    allclose(n1 * 2.0, cp.asnumpy(scale(t1, (2.0,))))
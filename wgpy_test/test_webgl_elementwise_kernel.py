@@ -33,3 +33,29 @@ def test_elementwise_raw_1():
     # raw T x is accessed as if x is "c-contiguous" flattened array even if it has different strides
     y_gpu = kernel(cp.asarray(x).T, cp.asarray(p))
     allclose(x.T.flatten()[p], cp.asnumpy(y_gpu))
+
+
+def test_elementwise_dedup():
+    from wgpy_backends.webgl import get_performance_metrics
+
+    # two kernels with the same operation generate the same source and share one
+    # compiled kernel
+    kernels = [
+        ElementwiseKernel(
+            in_params="float x",
+            out_params="float y",
+            operation="y = x * 3.0 + 1.0",
+            name=f"test_elementwise_dedup_{i}",
+            uniforms="",
+        )
+        for i in range(2)
+    ]
+    x = np.array([1.0, 2.0, -3.0, 2.5], dtype=np.float32)
+    allclose(x * 3.0 + 1.0, cp.asnumpy(kernels[0](cp.asarray(x))))
+    metrics = get_performance_metrics()
+    compile_count = metrics["webgl.kernel.compile_count"]
+    dedup_count = metrics["webgl.kernel.dedup_count"]
+    allclose(x * 3.0 + 1.0, cp.asnumpy(kernels[1](cp.asarray(x))))
+    metrics = get_performance_metrics()
+    assert metrics["webgl.kernel.compile_count"] == compile_count
+    assert metrics["webgl.kernel.dedup_count"] == dedup_count + 1
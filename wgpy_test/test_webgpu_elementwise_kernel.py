@@ -57,3 +57,53 @@ def test_elementwise_raw_1():
 
 
 # TODO: user-defined uniform
+
+
+def test_elementwise_dedup():
+    from wgpy_backends.webgpu import get_performance_metrics
+
+    # two kernels with the same operation generate the same source and share one
+    # compiled kernel
+    kernels = [
+        ElementwiseKernel(
+            in_params="f32 x",
+            out_params="f32 y",
+            operation="y = x * 3.0 + 1.0",
+            name=f"test_elementwise_dedup_{i}",
+            uniforms="",
+        )
+        for i in range(2)
+    ]
+    x = np.array([1.0, 2.0, -3.0, 2.5], dtype=np.float32)
+    allclose(x * 3.0 + 1.0, cp.asnumpy(kernels[0](cp.asarray(x))))
+    metrics = get_performance_metrics()
+    compile_count = metrics["webgpu.kernel.compile_count"]
+    dedup_count = metrics["webgpu.kernel.dedup_count"]
+    allclose(x * 3.0 + 1.0, cp.asnumpy(kernels[1](cp.asarray(x))))
+    metrics = get_performance_metrics()
+    assert metrics["webgpu.kernel.compile_count"] == compile_count
+    assert metrics["webgpu.kernel.dedup_count"] == dedup_count + 1
+
+
+def test_elementwise_uniform_ring():
+    from wgpy_backends.webgpu import get_performance_metrics
+
+    kernel = ElementwiseKernel(
+        in_params="f32 x",
+        out_params="f32 y",
+        operation="y = x + f32(cmeta.k)",
+        name="test_elementwise_uniform_ring",
+        uniforms="i32 k",
+    )
+    x = np.arange(64, dtype=np.float32)
+    x_gpu = cp.asarray(x)
+    kernel(x_gpu, uniforms={"k": 0})
+    buffer_count = get_performance_metrics()["webgpu.buffer.buffer_count"]
+    # dispatches with different offsets and uniforms are queued together, each reading
+    # its own range of the uniform buffer
+    outputs = [kernel(x_gpu[i : i + 8], uniforms={"k": i}) for i in range(40)]
+    for i, y_gpu in enumerate(outputs):
+        allclose(x[i : i + 8] + i, cp.asnumpy(y_gpu))
+    # uniform values do not allocate buffers
+    del outputs, y_gpu
+    assert get_performance_metrics()["webgpu.buffer.buffer_count"] <= buffer_count + 40